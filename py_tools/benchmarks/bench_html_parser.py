@@ -0,0 +1,85 @@
+"""Benchmarks HTMLParser implementations on a page corpus.
+
+Reports pages/sec, MB/sec, mean extracted words and the peak RSS growth of
+parsing the corpus. Each parser runs in a fresh process so peak memory numbers
+do not leak into each other.
+
+    python -m benchmarks.bench_html_parser [--corpus DIR] [--rounds N] [--json FILE]
+"""
+import argparse
+import json
+import multiprocessing
+import resource
+import time
+from typing import Any, Dict, List, Optional
+
+from pydantic import HttpUrl
+
+from benchmarks.corpus import generate_corpus, load_corpus
+
+PARSERS = {
+    "basic": ("src.rags.web_search.basic_html_parser", "BasicHTMLParser", {}),
+    "lxml": ("src.rags.web_search.lxml_html_parser", "LxmlHTMLParser", {}),
+    "lxml_markdown": ("src.rags.web_search.lxml_html_parser", "LxmlHTMLParser", {"markdown": True}),
+}
+
+
+def _pages(corpus: Optional[str]) -> List[str]:
+    return load_corpus(corpus) if corpus else generate_corpus()
+
+
+def _run(name: str, corpus: Optional[str], rounds: int, queue: "multiprocessing.Queue[Dict[str, Any]]") -> None:
+    import importlib
+    from src.rags.web_search.search_result import SearchResult
+
+    module, cls, kwargs = PARSERS[name]
+    parser = getattr(importlib.import_module(module), cls)(**kwargs)
+    pages = _pages(corpus)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    words = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for page in pages:
+            result = SearchResult(url=HttpUrl("http://example.com"), title="", content="")
+            words += len(parser.parse(page, result).content.split())
+    elapsed = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    n_pages = len(pages) * rounds
+    queue.put({
+        "parser": name,
+        "pages": n_pages,
+        "seconds": elapsed,
+        "pages_per_sec": n_pages / elapsed,
+        "mb_per_sec": sum(len(p) for p in pages) * rounds / elapsed / 1e6,
+        "mean_words": words / n_pages,
+        "peak_rss_growth_kb": rss_after - rss_before,
+    })
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--corpus", help="Directory of saved .html pages (default: synthetic corpus).")
+    arg_parser.add_argument("--rounds", type=int, default=3)
+    arg_parser.add_argument("--parsers", nargs="+", default=list(PARSERS), choices=list(PARSERS))
+    arg_parser.add_argument("--json", help="Write the results to this file.")
+    args = arg_parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for name in args.parsers:
+        queue = ctx.Queue()
+        process = ctx.Process(target=_run, args=(name, args.corpus, args.rounds, queue))
+        process.start()
+        results.append(queue.get())
+        process.join()
+
+    print(f"{'parser':<15}{'pages/s':>10}{'MB/s':>8}{'words':>9}{'peak RSS +KB':>14}")
+    for r in results:
+        print(f"{r['parser']:<15}{r['pages_per_sec']:>10.1f}{r['mb_per_sec']:>8.2f}{r['mean_words']:>9.0f}{r['peak_rss_growth_kb']:>14}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
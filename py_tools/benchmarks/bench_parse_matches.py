@@ -0,0 +1,108 @@
+"""Benchmarks parsing fbref schedule tables into matches.
+
+Compares the previous row-by-row parser (kept here as the baseline) with the
+vectorized `FbrefFetcher.parse_matches` and with `parse_matches_frame`, which
+stops at the typed frame, on a synthetic schedule of a large number of rows.
+All three must produce the same matches.
+
+    python -m benchmarks.bench_parse_matches [--rows N] [--rounds N] [--json FILE]
+"""
+import argparse
+import datetime
+import json
+import random
+import time
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from src.rags.football.fbref import FbrefFetcher, Match, Score, Team
+
+TEAMS = [f"Team {i}" for i in range(40)]
+
+
+def generate_schedule(n_rows: int = 50_000, seed: int = 7) -> pd.DataFrame:
+    """A raw schedule table as `read_schedule_table` returns it, including spacer rows and unplayed matches."""
+    rng = random.Random(seed)
+    start = datetime.date(2000, 8, 1)
+    rows: List[List[Any]] = []
+    for i in range(n_rows):
+        if i % 11 == 10:
+            rows.append([np.nan] * 9)
+            continue
+        date = start + datetime.timedelta(days=i // 10)
+        played = rng.random() < 0.8
+        home, away = rng.sample(TEAMS, 2)
+        rows.append([
+            i // 10 + 1, "Sat", date.strftime("%Y-%m-%d"), f"{rng.randint(12, 21)}:{rng.choice(['00', '30'])}",
+            home,
+            round(rng.random() * 3, 1) if played else np.nan,
+            f"{rng.randint(0, 5)}–{rng.randint(0, 5)}" if played else np.nan,
+            round(rng.random() * 3, 1) if played else np.nan,
+            away,
+        ])
+    return pd.DataFrame(rows, columns=["Wk", "Day", "Date", "Time", "Home", "xG", "Score", "xG.1", "Away"])
+
+
+def parse_matches_rowwise(matches_df: pd.DataFrame, start_strf: str, end_strf: str) -> List[Match]:
+    """The previous implementation: one validated model per `to_dict("records")` row."""
+    matches_df = matches_df[
+        (matches_df["Date"] >= start_strf) & (matches_df["Date"] <= end_strf)
+    ]
+    matches: List[Match] = []
+    for m in matches_df.to_dict("records"):
+        matches.append(Match(
+            week=int(m["Wk"]),
+            date_time=datetime.datetime.strptime(m["Date"] + " " + m["Time"], "%Y-%m-%d %H:%M"),
+            home=Team(name=m["Home"]),
+            away=Team(name=m["Away"]),
+            score=Score.from_str(m["Score"]) if not pd.isna(m["Score"]) else None,
+            home_xg=float(m["xG"]) if not pd.isna(m["xG"]) else None,
+            away_xg=float(m["xG.1"]) if not pd.isna(m["xG.1"]) else None,
+        ))
+    return matches
+
+
+def _time(fn: Callable[[], object], rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--rows", type=int, default=50_000)
+    arg_parser.add_argument("--rounds", type=int, default=3)
+    arg_parser.add_argument("--json", help="Write the results to this file.")
+    args = arg_parser.parse_args()
+
+    frame = generate_schedule(args.rows)
+    span = ("0000-00-00", "9999-99-99")
+    expected = parse_matches_rowwise(frame, *span)
+    assert FbrefFetcher.parse_matches(frame, *span) == expected
+
+    candidates: Dict[str, Callable[[], object]] = {
+        "rowwise": lambda: parse_matches_rowwise(frame, *span),
+        "vectorized": lambda: FbrefFetcher.parse_matches(frame, *span),
+        "frame_only": lambda: FbrefFetcher.parse_matches_frame(frame, *span),
+    }
+    results: List[Dict[str, Any]] = []
+    for name, fn in candidates.items():
+        seconds = _time(fn, args.rounds)
+        results.append({"parser": name, "rows": len(frame), "matches": len(expected), "seconds": seconds, "rows_per_sec": len(frame) / seconds})
+
+    baseline = results[0]["seconds"]
+    print(f"{'parser':<12}{'seconds':>10}{'rows/s':>12}{'speedup':>9}")
+    for r in results:
+        print(f"{r['parser']:<12}{r['seconds']:>10.3f}{r['rows_per_sec']:>12.0f}{baseline / r['seconds']:>8.1f}x")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
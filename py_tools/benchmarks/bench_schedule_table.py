@@ -0,0 +1,89 @@
+"""Benchmarks extracting the schedule table out of fbref schedule pages.
+
+Compares `pd.read_html` (every table of the page, as the fetcher used to) with
+`read_schedule_table`, on saved schedule pages whose match rows are repeated
+`--scale` times to reach the size of a full season. Reports pages/sec and
+the peak RSS growth, each parser in a fresh process.
+
+    python -m benchmarks.bench_schedule_table [--pages DIR] [--scale N] [--rounds N] [--json FILE]
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import re
+import resource
+import time
+from typing import Any, Dict, List
+
+from benchmarks.corpus import load_corpus
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "..", "src", "rags", "football", "fixtures")
+SCHEDULE_ROWS = re.compile(r"""(<table[^>]*id=["']sched_.*?<tbody>)(.*?)(</tbody>)""", re.DOTALL)
+PARSERS = ["read_html", "schedule_table"]
+
+
+def scale_page(html: str, scale: int) -> str:
+    """Repeats the rows of the page's schedule table `scale` times."""
+    return SCHEDULE_ROWS.sub(lambda m: m.group(1) + m.group(2) * scale + m.group(3), html, count=1)
+
+
+def _pages(directory: str, scale: int) -> List[str]:
+    return [scale_page(page, scale) for page in load_corpus(directory)]
+
+
+def _run(name: str, directory: str, scale: int, rounds: int, queue: "multiprocessing.Queue[Dict[str, Any]]") -> None:
+    import pandas as pd
+    from src.rags.football.schedule_table import read_schedule_table
+
+    parse = {
+        "read_html": lambda html: pd.read_html(io.StringIO(html)),
+        "schedule_table": read_schedule_table,
+    }[name]
+    pages = _pages(directory, scale)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for page in pages:
+            parse(page)
+    elapsed = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    n_pages = len(pages) * rounds
+    queue.put({
+        "parser": name,
+        "pages": n_pages,
+        "mean_page_kb": sum(len(p) for p in pages) / len(pages) / 1e3,
+        "seconds": elapsed,
+        "pages_per_sec": n_pages / elapsed,
+        "peak_rss_growth_kb": rss_after - rss_before,
+    })
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--pages", default=FIXTURES, help="Directory of saved fbref schedule pages.")
+    arg_parser.add_argument("--scale", type=int, default=30)
+    arg_parser.add_argument("--rounds", type=int, default=5)
+    arg_parser.add_argument("--json", help="Write the results to this file.")
+    args = arg_parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for name in PARSERS:
+        queue = ctx.Queue()
+        process = ctx.Process(target=_run, args=(name, args.pages, args.scale, args.rounds, queue))
+        process.start()
+        results.append(queue.get())
+        process.join()
+
+    print(f"{'parser':<16}{'page KB':>9}{'pages/s':>10}{'peak RSS +KB':>14}")
+    for r in results:
+        print(f"{r['parser']:<16}{r['mean_page_kb']:>9.0f}{r['pages_per_sec']:>10.1f}{r['peak_rss_growth_kb']:>14}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""End-to-end benchmark of web search and retrieval against local stand-ins.
+
+Starts the stand-ins of Searxng and the result pages (see
+`benchmarks.stand_ins`) with the given injected latency, then measures:
+
+- `search_and_retrieve`: `--requests` distinct queries, `--concurrency` at a
+  time, through the components the API wires up;
+- every fetcher: the static (httpx) and dynamic (browser) fetchers on the
+  stand-in pages, and the Reddit extractor on a stand-in client;
+- every parser: `--rounds` passes over the page corpus, one page at a time.
+
+Each reports latency percentiles, calls/sec and completed pages/sec. The
+dynamic fetcher is reported as skipped when no browser can be launched.
+Results are written as JSON together with the commit they were measured on
+(by default to .cache/bench/search_rag-<commit>.json). With `--baseline`,
+the run is compared to an earlier result file and exits with status 1 when
+a latency percentile or throughput regressed by more than `--tolerance`.
+
+    python -m benchmarks.bench_search_rag [--requests N] [--concurrency N] [--latency S] [--json FILE] [--baseline FILE]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+import httpx
+from pydantic import HttpUrl
+
+from benchmarks.bench_html_parser import PARSERS
+from benchmarks.corpus import WORDS, generate_corpus, load_corpus
+from benchmarks.stand_ins import StandInConfig, running
+from benchmarks.stats import run_metadata, summarize
+
+# Latency metrics regress upwards, throughput metrics downwards
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms")
+HIGHER_IS_BETTER = ("pages_per_sec",)
+
+
+async def measure(calls: List[Callable[[], Awaitable[int]]], concurrency: int) -> Dict[str, float]:
+    """Runs the calls `concurrency` at a time; each returns the number of pages it completed."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    pages = 0
+    errors = 0
+
+    async def run(call: Callable[[], Awaitable[int]]) -> None:
+        nonlocal pages, errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                completed = await call()
+            except Exception:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - start)
+            pages += completed
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run(call) for call in calls))
+    elapsed = time.perf_counter() - start
+    return {
+        **summarize(latencies),
+        "errors": errors,
+        "seconds": elapsed,
+        "calls_per_sec": len(latencies) / elapsed,
+        "pages_per_sec": pages / elapsed,
+    }
+
+
+def _queries(n: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    return [" ".join(rng.sample(WORDS, 3)) + f" {i}" for i in range(n)]
+
+
+def _complete(results: List[Any]) -> int:
+    from src.rags.web_search.search_result import ResultStatus
+    return sum(result.status == ResultStatus.Complete for result in results)
+
+
+class StandInSubmission:
+    """A Reddit thread with a synthetic comment forest."""
+
+    class Comment:
+        def __init__(self, score: int, body: str, replies: List[Any]):
+            self.score = score
+            self.body = body
+            self.replies = replies
+
+    def __init__(self, rng: random.Random, n_comments: int):
+        self.title = " ".join(rng.sample(WORDS, 6))
+        self.score = rng.randint(0, 5000)
+        self.selftext = " ".join(rng.choice(WORDS) for _ in range(80))
+        comments: List[StandInSubmission.Comment] = []
+        self.comments = comments
+        for _ in range(n_comments):
+            siblings = comments
+            # Replies nest a random number of levels under the latest thread
+            while siblings and rng.random() < 0.6:
+                siblings = siblings[-1].replies
+            siblings.append(self.Comment(rng.randint(0, 2000), " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 60))), []))
+
+
+class StandInReddit:
+    """Answers submission requests after the injected latency, like the Reddit API."""
+
+    def __init__(self, latency: float, n_comments: int = 300, n_threads: int = 16, seed: int = 7):
+        self.latency = latency
+        rng = random.Random(seed)
+        # Built up front, so making them up is not timed as extraction
+        self.threads = [StandInSubmission(rng, n_comments) for _ in range(n_threads)]
+        self.served = 0
+
+    async def submission(self, url: str) -> StandInSubmission:
+        await asyncio.sleep(self.latency)
+        self.served += 1
+        return self.threads[self.served % len(self.threads)]
+
+
+async def bench_search_and_retrieve(base_url: str, args: argparse.Namespace) -> Dict[str, float]:
+    from src.rags.executors import ExecutorConfig, Executors
+    from src.rags.http_clients import HttpClientConfig, HttpClientRegistry
+    from src.rags.web_search.config import SearxngConfig
+    from src.rags.web_search.lxml_html_parser import LxmlHTMLParser
+    from src.rags.web_search.scheduler import FetchScheduler
+    from src.rags.web_search.search_params import SearchParams
+    from src.rags.web_search.search_rag import SearchRAG
+    from src.rags.web_search.searxng_search_engine import SearxngSearchEngine
+    from src.rags.web_search.web_scraper import WebScraper
+
+    config = SearxngConfig(
+        base_url=HttpUrl(base_url + "/"),
+        results_per_page=args.results,
+        max_pages=1,
+        lazy_paging=True,
+        # Every stand-in page is on one host, so the per-host limit would serialize them
+        max_concurrent_per_host=SearxngConfig().max_concurrent_fetches,
+    )
+    http_clients = HttpClientRegistry(HttpClientConfig())
+    executors = Executors(ExecutorConfig(cpu_workers=args.cpu_workers))
+    await executors.start()
+    try:
+        scraper = WebScraper(
+            config=config,
+            html_parser=LxmlHTMLParser(),
+            scheduler=FetchScheduler.from_config(config),
+            http_client=http_clients.get("web"),
+            executors=executors,
+            static_websites=[base_url],
+        )
+        search_rag = SearchRAG(SearxngSearchEngine(config, http_client=http_clients.get("searxng")), scraper, default_deadline=config.deadline)
+
+        def call(query: str) -> Callable[[], Awaitable[int]]:
+            async def run() -> int:
+                return _complete(await search_rag.search_and_retrieve(SearchParams(query=query, num_results=args.results)))
+            return run
+
+        queries = _queries(args.warmup + args.requests, args.seed)
+        await measure([call(q) for q in queries[:args.warmup]], args.concurrency)
+        return await measure([call(q) for q in queries[args.warmup:]], args.concurrency)
+    finally:
+        await executors.close()
+        await http_clients.close()
+
+
+async def bench_fetchers(base_url: str, args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    from src.rags.web_search.browser_pool import BrowserPool
+    from src.rags.web_search.config import BrowserPoolConfig, RedditConfig, SearchConfig
+    from src.rags.web_search.lxml_html_parser import LxmlHTMLParser
+    from src.rags.web_search.reddit_extractor import RedditExtractor
+    from src.rags.web_search.search_result import SearchResult
+    from src.rags.web_search.web_scraper import WebScraper
+
+    config = SearchConfig()
+    results: Dict[str, Dict[str, Any]] = {}
+    rng = random.Random(args.seed)
+    page_ids = [rng.randrange(args.pages) for _ in range(args.warmup + args.fetches)]
+
+    async def run(scraper: WebScraper, urls: List[str]) -> Dict[str, Any]:
+        def call(url: str) -> Callable[[], Awaitable[int]]:
+            async def fetch() -> int:
+                return _complete(await scraper.scrape([SearchResult(url=HttpUrl(url), title="", content="")]))
+            return fetch
+
+        await measure([call(url) for url in urls[:args.warmup]], args.concurrency)
+        return await measure([call(url) for url in urls[args.warmup:]], args.concurrency)
+
+    # One client for every scraper: without one, each scrape would build its own
+    async with httpx.AsyncClient() as client:
+        static = WebScraper(config=config, html_parser=LxmlHTMLParser(), http_client=client, static_websites=[base_url])
+        results["fetch/static"] = await run(static, [f"{base_url}/pages/{n}" for n in page_ids])
+
+        pool = BrowserPool(BrowserPoolConfig(size=1, pages_per_browser=args.concurrency))
+        try:
+            await pool.start()
+        except Exception as e:
+            reason = str(e).splitlines()[0] if str(e) else type(e).__name__
+            results["fetch/dynamic"] = {"skipped": f"no browser could be launched: {reason}"}
+        else:
+            try:
+                dynamic = WebScraper(config=config, html_parser=LxmlHTMLParser(), http_client=client, browser_pool=pool)
+                results["fetch/dynamic"] = await run(dynamic, [f"{base_url}/dynamic/{n}" for n in page_ids])
+            finally:
+                await pool.close()
+
+        # Reddit is read through its API client, so the client is what stands in; the rate limit is lifted to measure extraction
+        reddit_config = RedditConfig(requests_per_second=1e9, burst=args.concurrency)
+        extractor = RedditExtractor(reddit_config, StandInReddit(args.latency, seed=args.seed))  # type: ignore[arg-type]
+        reddit = WebScraper(config=config, html_parser=LxmlHTMLParser(), http_client=client, reddit_extractor=extractor)
+        # Distinct threads, so no fetch is coalesced with another
+        results["fetch/reddit"] = await run(reddit, [f"{reddit.reddit_prefix}/r/bench/comments/{i}/" for i in range(args.warmup + args.fetches)])
+    return results
+
+
+def bench_parsers(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    import importlib
+    from src.rags.web_search.search_result import SearchResult
+
+    pages = load_corpus(args.corpus) if args.corpus else generate_corpus(args.pages, args.seed)
+    results = {}
+    for name, (module, cls, kwargs) in PARSERS.items():
+        parser = getattr(importlib.import_module(module), cls)(**kwargs)
+        latencies = []
+        start = time.perf_counter()
+        for page in pages * args.rounds:
+            page_start = time.perf_counter()
+            parser.parse(page, SearchResult(url=HttpUrl("http://example.com"), title="", content=""))
+            latencies.append(time.perf_counter() - page_start)
+        elapsed = time.perf_counter() - start
+        results[f"parse/{name}"] = {**summarize(latencies), "seconds": elapsed, "pages_per_sec": len(latencies) / elapsed}
+    return results
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], tolerance: float) -> List[str]:
+    """Prints the change of every metric from the baseline and returns the regressions."""
+    regressions = []
+    print(f"\n{'benchmark':<22}{'metric':<15}{'baseline':>11}{'now':>11}{'change':>9}")
+    for name, result in results.items():
+        before = baseline.get(name, {})
+        for metric in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+            if metric not in result or not before.get(metric):
+                continue
+            change = result[metric] / before[metric] - 1
+            worse = change > tolerance if metric in LOWER_IS_BETTER else change < -tolerance
+            flag = "  REGRESSED" if worse else ""
+            print(f"{name:<22}{metric:<15}{before[metric]:>11.1f}{result[metric]:>11.1f}{change:>+9.1%}{flag}")
+            if worse:
+                regressions.append(f"{name} {metric}")
+    return regressions
+
+
+async def run_all(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    stand_ins = StandInConfig(
+        corpus=args.corpus,
+        n_pages=args.pages,
+        results_per_page=args.results,
+        latency=args.latency,
+        search_latency=args.search_latency,
+        jitter=args.jitter,
+        seed=args.seed,
+    )
+    results: Dict[str, Dict[str, Any]] = {}
+    with running(stand_ins) as base_url:
+        results["search_and_retrieve"] = await bench_search_and_retrieve(base_url, args)
+        results.update(await bench_fetchers(base_url, args))
+    results.update(bench_parsers(args))
+    return results
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--requests", type=int, default=100, help="Searches measured.")
+    arg_parser.add_argument("--fetches", type=int, default=200, help="Pages fetched per fetcher.")
+    arg_parser.add_argument("--concurrency", type=int, default=8)
+    arg_parser.add_argument("--warmup", type=int, default=5, help="Calls made before measuring, to open connections and start workers.")
+    arg_parser.add_argument("--results", type=int, default=5, help="Results per search.")
+    arg_parser.add_argument("--latency", type=float, default=0.05, help="Injected delay of page responses in seconds.")
+    arg_parser.add_argument("--search-latency", type=float, default=0.2, help="Injected delay of Searxng responses in seconds.")
+    arg_parser.add_argument("--jitter", type=float, default=0.02, help="Mean exponential delay added to every response in seconds.")
+    arg_parser.add_argument("--corpus", help="Directory of saved .html pages (default: synthetic corpus).")
+    arg_parser.add_argument("--pages", type=int, default=60, help="Pages of the synthetic corpus.")
+    arg_parser.add_argument("--rounds", type=int, default=3, help="Passes of the parsers over the corpus.")
+    arg_parser.add_argument("--cpu-workers", type=int, default=2, help="Parser processes of the end-to-end run; 0 parses on threads.")
+    arg_parser.add_argument("--seed", type=int, default=7)
+    arg_parser.add_argument("--json", help="Write the results to this file (default: .cache/bench/search_rag-<commit>.json).")
+    arg_parser.add_argument("--baseline", help="Result file of an earlier run to compare with.")
+    arg_parser.add_argument("--tolerance", type=float, default=0.2, help="Relative change of a metric counted as a regression.")
+    args = arg_parser.parse_args()
+
+    meta = run_metadata()
+    results = asyncio.run(run_all(args))
+
+    print(f"{'benchmark':<22}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'calls/s':>9}{'pages/s':>9}{'errors':>8}")
+    for name, r in results.items():
+        if "skipped" in r:
+            print(f"{name:<22}skipped: {r['skipped']}")
+            continue
+        print(
+            f"{name:<22}{r.get('p50_ms', 0):>9.1f}{r.get('p95_ms', 0):>9.1f}{r.get('p99_ms', 0):>9.1f}"
+            f"{r.get('calls_per_sec', r['pages_per_sec']):>9.1f}{r['pages_per_sec']:>9.1f}{r.get('errors', 0):>8}"
+        )
+
+    path = args.json or os.path.join(".cache", "bench", f"search_rag-{str(meta['commit'] or 'unknown')[:12]}.json")
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"meta": meta, "config": vars(args), "results": results}, f, indent=2)
+    print(f"\nWrote {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.tolerance)
+        print(f"\nCompared with {(baseline['meta'].get('commit') or 'unknown')[:12]}: {len(regressions)} regression(s)")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Benchmarks the Open WebUI tool's page text normalization.
+
+Compares the original pipeline (NFKC over the whole page, whitespace regex,
+per-character symbol removal, then truncation) with
+TextProcessor.normalize_and_truncate on large pages, checks that both give the
+same output and reports MB/sec.
+
+    python -m benchmarks.bench_text_processor [--corpus DIR] [--words N] [--json FILE]
+"""
+import argparse
+import json
+import random
+import re
+import time
+import unicodedata
+from typing import Callable, Dict, List
+
+from benchmarks.corpus import WORDS, load_corpus
+from src.owui.tools.web_search import TextProcessor
+
+# Text as extracted from real pages: unicode spaces, compatibility forms, accents, emoji
+EXTRA = ["café", "naïve", "ﬁle", "Ｆｕｌｌ", "①", "½", " ", "　", "\U0001F600", "❤️", "©", "™", "한국어", "日本語"]
+
+
+def baseline(text: str, word_limit: int) -> str:
+    """The pipeline before normalize_and_truncate."""
+    formatted = unicodedata.normalize("NFKC", text)
+    formatted = re.sub(r"\s+", " ", formatted)
+    formatted = formatted.strip()
+    formatted = "".join(c for c in formatted if not unicodedata.category(c).startswith("So"))
+    return " ".join(formatted.split()[:word_limit])
+
+
+def generate_texts(n_texts: int, mb_per_text: float, unicode_ratio: float, seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(n_texts):
+        parts: List[str] = []
+        size = 0
+        while size < mb_per_text * 1e6:
+            word = rng.choice(EXTRA) if rng.random() < unicode_ratio else rng.choice(WORDS)
+            parts.append(word)
+            parts.append(rng.choice(" \n\t  "))
+            size += len(word) + 1
+        texts.append("".join(parts))
+    return texts
+
+
+def measure(fn: Callable[[str, int], str], texts: List[str], word_limit: int, rounds: int) -> Dict[str, float]:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            fn(text, word_limit)
+    elapsed = time.perf_counter() - start
+    return {
+        "seconds": elapsed,
+        "pages_per_sec": len(texts) * rounds / elapsed,
+        "mb_per_sec": sum(len(t) for t in texts) * rounds / elapsed / 1e6,
+    }
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--corpus", help="Directory of saved .html pages used as raw text (default: synthetic text).")
+    arg_parser.add_argument("--pages", type=int, default=10, help="Synthetic pages.")
+    arg_parser.add_argument("--mb", type=float, default=2.0, help="Size of each synthetic page in MB.")
+    arg_parser.add_argument("--unicode-ratio", type=float, default=0.1, help="Fraction of non-ASCII words in synthetic pages.")
+    arg_parser.add_argument("--words", type=int, default=5000, help="Word limit, as PAGE_CONTENT_WORDS_LIMIT.")
+    arg_parser.add_argument("--rounds", type=int, default=1)
+    arg_parser.add_argument("--json", help="Write the results to this file.")
+    args = arg_parser.parse_args()
+
+    texts = load_corpus(args.corpus) if args.corpus else generate_texts(args.pages, args.mb, args.unicode_ratio)
+    processor = TextProcessor()
+    processor.normalize_and_truncate("warm up the symbol table", 1)
+    for text in texts:
+        assert processor.normalize_and_truncate(text, args.words) == baseline(text, args.words), "outputs differ"
+
+    results = {
+        "baseline": measure(baseline, texts, args.words, args.rounds),
+        "normalize_and_truncate": measure(processor.normalize_and_truncate, texts, args.words, args.rounds),
+    }
+    results["speedup"] = {"x": results["baseline"]["seconds"] / results["normalize_and_truncate"]["seconds"]}
+    print(f"{len(texts)} pages, {sum(len(t) for t in texts) / 1e6:.1f} MB, {args.words} word limit, identical output")
+    for name in ("baseline", "normalize_and_truncate"):
+        r = results[name]
+        print(f"{name:<24}{r['pages_per_sec']:>10.1f} pages/s{r['mb_per_sec']:>10.1f} MB/s")
+    print(f"speedup {results['speedup']['x']:.1f}x")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
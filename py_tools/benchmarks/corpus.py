@@ -0,0 +1,88 @@
+"""Page corpus for the benchmarks.
+
+Saved pages (*.html) are loaded from a directory. Without one, a deterministic
+synthetic corpus is generated that mimics real pages: navigation, cookie
+banners, ads, scripts, an article with headings, paragraphs, lists and tables,
+comments and a footer.
+"""
+import os
+import random
+from typing import List
+
+WORDS = (
+    "the match season league goal team player coach transfer market report analysis data model "
+    "python async request server latency cache browser page content search result query index "
+    "research paper study method experiment climate energy policy economy inflation rate growth "
+    "history city river mountain music film review release version update security network"
+).split()
+
+
+def _sentence(rng: random.Random, n_words: int) -> str:
+    words = [rng.choice(WORDS) for _ in range(n_words)]
+    return " ".join(words).capitalize() + "."
+
+
+def _paragraph(rng: random.Random) -> str:
+    return " ".join(_sentence(rng, rng.randint(8, 25)) for _ in range(rng.randint(2, 6)))
+
+
+def generate_page(rng: random.Random, size: str = "medium") -> str:
+    """Generates one synthetic page; size is small, medium or large."""
+    sections = {"small": 2, "medium": 6, "large": 40}[size]
+    nav = "".join(f'<li><a href="/{w}">{w}</a></li>' for w in rng.sample(WORDS, 12))
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>", _sentence(rng, 6), "</title>",
+        "<script>window.dataLayer=[];function gtag(){dataLayer.push(arguments)}</script>",
+        "<style>body{font-family:sans-serif}.ad{display:block}</style></head><body>",
+        f'<header class="site-header"><nav class="navbar"><ul>{nav}</ul></nav></header>',
+        '<div id="cookie-consent">We use cookies to improve your experience. <button>Accept</button></div>',
+        '<div class="layout"><aside class="sidebar"><ul>', nav, "</ul></aside>",
+        "<article><h1>", _sentence(rng, 8), "</h1>",
+    ]
+    for i in range(sections):
+        parts.append(f"<h2>{_sentence(rng, 5)}</h2>")
+        for _ in range(rng.randint(2, 5)):
+            parts.append(f"<p>{_paragraph(rng)}</p>")
+        if i % 2 == 0:
+            items = "".join(f"<li>{_sentence(rng, rng.randint(4, 12))}</li>" for _ in range(rng.randint(3, 8)))
+            parts.append(f"<ul>{items}</ul>")
+        if i % 3 == 1:
+            rows = "".join(
+                "<tr>" + "".join(f"<td>{rng.randint(0, 999)}</td>" for _ in range(5)) + "</tr>"
+                for _ in range(rng.randint(5, 20))
+            )
+            parts.append(f"<table><thead><tr>{'<th>col</th>' * 5}</tr></thead><tbody>{rows}</tbody></table>")
+        if i % 4 == 2:
+            parts.append(f'<div class="ad-slot sponsored">{_sentence(rng, 10)}</div>')
+    parts.append("</article>")
+    comments = "".join(f'<div class="comment"><p>{_sentence(rng, 12)}</p></div>' for _ in range(rng.randint(3, 15)))
+    parts.append(f'<section id="comments">{comments}</section></div>')
+    parts.append(f'<footer class="site-footer"><p>{_sentence(rng, 10)}</p><ul>{nav}</ul></footer>')
+    parts.append("<script src='/static/app.js'></script></body></html>")
+    return "".join(parts)
+
+
+def generate_corpus(n_pages: int = 60, seed: int = 7) -> List[str]:
+    """Generates a deterministic mix of small, medium and large pages."""
+    rng = random.Random(seed)
+    sizes = ["small", "medium", "medium", "large"]
+    return [generate_page(rng, sizes[i % len(sizes)]) for i in range(n_pages)]
+
+
+def load_corpus(directory: str) -> List[str]:
+    """Loads saved pages (*.html) from a directory."""
+    pages = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith((".html", ".htm")):
+            with open(os.path.join(directory, name), encoding="utf-8", errors="replace") as f:
+                pages.append(f.read())
+    if not pages:
+        raise ValueError(f"No .html pages found in {directory}")
+    return pages
+
+
+def save_corpus(directory: str, pages: List[str]) -> None:
+    os.makedirs(directory, exist_ok=True)
+    for i, page in enumerate(pages):
+        with open(os.path.join(directory, f"page_{i:04d}.html"), "w", encoding="utf-8") as f:
+            f.write(page)
@@ -0,0 +1,417 @@
+"""HTTP load test of the API against local stand-ins of every upstream.
+
+Starts the upstream stand-ins (see `benchmarks.stand_ins`) and the app under
+uvicorn with Searxng and fbref pointed at them. The app runs in a fresh
+working directory, so its caches start cold and the development caches stay
+untouched. Then `/web_search` and `/football/matches` are driven through a
+sequence of stages:
+
+- `10rps:60` sends 10 requests/sec for 60 seconds with Poisson arrivals. This
+  is an open loop: the rate holds however slow the app gets, as with real users.
+- `16users:60` keeps 16 requests in flight for 60 seconds (closed loop).
+
+A ramp is several stages, e.g. `--stages 5rps:30 10rps:30 20rps:30 40rps:30`.
+`--football-ratio` of the requests ask for matches. Of the searches,
+`--repeat-ratio` repeat one of `--hot-queries` popular queries (Zipf weighted)
+and the rest are unique, which sets how often the caches can answer.
+
+Open-loop latency counts from when a request was due, so queueing in a backed
+up generator is not hidden. The report has p50/p95/p99 latency and error rate
+per stage and endpoint, and a per-second timeline of throughput, latency and,
+with psutil installed, RSS and CPU of the app's worker and pool processes. It
+is written as JSON, by default to .cache/bench/load_test-<commit>.json.
+`--app-url` targets an already running app instead, with `--app-pid` to
+sample its resources.
+
+    python -m benchmarks.load_test [--stages 5rps:30 ...] [--workers N] [--repeat-ratio R] [--json FILE]
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+import httpx
+from pydantic import BaseModel
+
+from benchmarks.corpus import WORDS
+from benchmarks.stand_ins import StandInConfig, free_port, running, wait_ready
+from benchmarks.stats import run_metadata, summarize
+
+try:
+    import psutil  # type: ignore[import-untyped]
+    HAS_PSUTIL = True
+except ImportError:
+    HAS_PSUTIL = False
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STAGE = re.compile(r"^(\d+(?:\.\d+)?)(rps|users):(\d+(?:\.\d+)?)$")
+TOURNAMENTS = ["Premier_League", "Serie_A", "Champions_League"]
+ENDPOINTS = {"web_search": "/web_search", "football": "/football/matches"}
+
+
+class Stage(BaseModel):
+    """One load level: `value` requests/sec (rps) or requests in flight (users) for `seconds`."""
+    kind: str
+    value: float
+    seconds: float
+
+    @classmethod
+    def parse(cls, spec: str) -> "Stage":
+        match = STAGE.match(spec)
+        if match is None:
+            raise argparse.ArgumentTypeError(f"stage {spec!r} is not RATErps:SECONDS or USERSusers:SECONDS")
+        return cls(kind=match.group(2), value=float(match.group(1)), seconds=float(match.group(3)))
+
+    def __str__(self) -> str:
+        return f"{self.value:g}{self.kind}:{self.seconds:g}"
+
+
+class Sample(NamedTuple):
+    stage: int
+    endpoint: str
+    due: float
+    send_lag: float
+    latency: float
+    done: float
+    ok: bool
+    status: str
+
+
+class QueryMix:
+    """Draws the endpoint and parameters of the next request."""
+
+    def __init__(self, args: argparse.Namespace, rng: random.Random):
+        self.args = args
+        self.rng = rng
+        self.hot = [" ".join(rng.sample(WORDS, 3)) + f" hot {i}" for i in range(args.hot_queries)]
+        self.weights = [1 / (rank + 1) for rank in range(len(self.hot))]
+        self.unique = 0
+
+    def next(self) -> Tuple[str, Dict[str, Any]]:
+        rng = self.rng
+        if rng.random() < self.args.football_ratio:
+            return "football", self._football()
+        if self.hot and rng.random() < self.args.repeat_ratio:
+            query = rng.choices(self.hot, self.weights)[0]
+        else:
+            self.unique += 1
+            query = " ".join(rng.sample(WORDS, 3)) + f" {self.unique}"
+        return "web_search", {"query": query, "num_results": self.args.num_results}
+
+    def _football(self) -> Dict[str, Any]:
+        rng = self.rng
+        tournaments = rng.sample(TOURNAMENTS, rng.randint(1, 2))
+        # Half ask for a past season, served from the match store, half for recent days of the cached current season
+        if rng.random() < 0.5:
+            start = datetime.datetime(2023, 8, 11) + datetime.timedelta(days=rng.randrange(260))
+            end = start + datetime.timedelta(days=rng.randint(1, 28))
+            return {"tournaments": tournaments, "start_date": start.isoformat(), "end_date": end.isoformat()}
+        start = datetime.datetime.now() - datetime.timedelta(days=rng.randint(1, 14))
+        return {"tournaments": tournaments, "start_date": start.replace(microsecond=0).isoformat()}
+
+
+class ResourceSampler:
+    """RSS and CPU of a process and all its descendants: uvicorn workers and their executor pools."""
+
+    def __init__(self, pid: int):
+        self.root = psutil.Process(pid)
+        # Kept across samples, since cpu_percent measures from the previous call on the same object
+        self.processes: Dict[int, Any] = {}
+
+    def sample(self) -> Dict[str, Any]:
+        try:
+            current = [self.root] + self.root.children(recursive=True)
+        except psutil.NoSuchProcess:
+            return {"rss_mb": 0.0, "cpu_percent": 0.0, "processes": []}
+        processes = []
+        for process in current:
+            process = self.processes.setdefault(process.pid, process)
+            try:
+                with process.oneshot():
+                    processes.append({
+                        "pid": process.pid,
+                        "rss_mb": process.memory_info().rss / 1e6,
+                        "cpu_percent": process.cpu_percent(None),
+                    })
+            except psutil.NoSuchProcess:
+                self.processes.pop(process.pid, None)
+        return {
+            "rss_mb": sum(p["rss_mb"] for p in processes),
+            "cpu_percent": sum(p["cpu_percent"] for p in processes),
+            "processes": processes,
+        }
+
+
+class LoadGenerator:
+    """Sends the stages' requests and records one sample per request."""
+
+    def __init__(self, client: httpx.AsyncClient, mix: QueryMix, args: argparse.Namespace):
+        self.client = client
+        self.mix = mix
+        self.args = args
+        self.samples: List[Sample] = []
+        self.in_flight: Set["asyncio.Task[None]"] = set()
+        self.dropped = [0] * len(args.stages)
+        self.origin = time.perf_counter()
+
+    async def send(self, stage: int, due: float) -> None:
+        endpoint, params = self.mix.next()
+        sent = time.perf_counter()
+        try:
+            response = await self.client.get(ENDPOINTS[endpoint], params=params)
+            ok, status = response.status_code < 400, str(response.status_code)
+        except httpx.HTTPError as e:
+            ok, status = False, type(e).__name__
+        done = time.perf_counter()
+        self.samples.append(Sample(stage, endpoint, due - self.origin, sent - due, done - due, done - self.origin, ok, status))
+
+    async def open_loop(self, index: int, stage: Stage) -> None:
+        start = time.perf_counter()
+        due = start
+        while True:
+            due += self.mix.rng.expovariate(stage.value)
+            if due - start >= stage.seconds:
+                return
+            wait = due - time.perf_counter()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            if len(self.in_flight) >= self.args.max_in_flight:
+                self.dropped[index] += 1
+                continue
+            task = asyncio.create_task(self.send(index, due))
+            self.in_flight.add(task)
+            task.add_done_callback(self.in_flight.discard)
+
+    async def closed_loop(self, index: int, stage: Stage) -> None:
+        end = time.perf_counter() + stage.seconds
+
+        async def user() -> None:
+            while time.perf_counter() < end:
+                await self.send(index, time.perf_counter())
+
+        await asyncio.gather(*(user() for _ in range(int(stage.value))))
+
+    async def run(self, monitor: "Monitor") -> None:
+        for index, stage in enumerate(self.args.stages):
+            print(f"Stage {index + 1}/{len(self.args.stages)}: {stage}")
+            monitor.stage = index
+            if stage.kind == "rps":
+                await self.open_loop(index, stage)
+            else:
+                await self.closed_loop(index, stage)
+        # Requests still in flight belong to the stage that sent them
+        await asyncio.gather(*self.in_flight)
+
+
+class Monitor:
+    """Samples the app's resources every second and prints a progress line."""
+
+    def __init__(self, generator: LoadGenerator, sampler: Optional[ResourceSampler]):
+        self.generator = generator
+        self.sampler = sampler
+        self.stage = 0
+        self.resources: List[Dict[str, Any]] = []
+
+    async def run(self) -> None:
+        seen = 0
+        while True:
+            await asyncio.sleep(1.0)
+            now = time.perf_counter() - self.generator.origin
+            samples = self.generator.samples[seen:]
+            seen += len(samples)
+            line = f"{now:6.0f}s  {self.generator.args.stages[self.stage]!s:<14}done {len(samples):>4}  errors {sum(not s.ok for s in samples):>3}  in flight {len(self.generator.in_flight):>4}"
+            if samples:
+                line += f"  p95 {summarize([s.latency for s in samples])['p95_ms']:>7.0f} ms"
+            if self.sampler is not None:
+                resources = await asyncio.to_thread(self.sampler.sample)
+                self.resources.append({"t": now, **resources})
+                line += f"  rss {resources['rss_mb']:>6.0f} MB  cpu {resources['cpu_percent']:>5.0f}%"
+            print(line)
+
+
+def _latencies(samples: List[Sample]) -> Dict[str, Any]:
+    errors = sum(not s.ok for s in samples)
+    statuses: Dict[str, int] = {}
+    for s in samples:
+        if not s.ok:
+            statuses[s.status] = statuses.get(s.status, 0) + 1
+    return {
+        **summarize([s.latency for s in samples if s.ok]),
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": errors / len(samples) if samples else 0.0,
+        "error_statuses": statuses,
+    }
+
+
+def report(generator: LoadGenerator, monitor: Monitor) -> Dict[str, Any]:
+    stages = []
+    for index, stage in enumerate(generator.args.stages):
+        samples = [s for s in generator.samples if s.stage == index]
+        endpoints = {name: _latencies([s for s in samples if s.endpoint == name]) for name in ENDPOINTS}
+        stages.append({
+            "stage": str(stage),
+            "achieved_rps": len(samples) / stage.seconds,
+            "dropped": generator.dropped[index],
+            "send_lag_p99_ms": summarize([s.send_lag for s in samples]).get("p99_ms", 0.0),
+            **_latencies(samples),
+            "endpoints": {name: result for name, result in endpoints.items() if result["requests"]},
+        })
+
+    timeline = []
+    seconds = int(max((s.done for s in generator.samples), default=0)) + 1
+    by_second: List[List[Sample]] = [[] for _ in range(seconds)]
+    for s in generator.samples:
+        by_second[int(s.done)].append(s)
+    # A resource sample is taken at the end of each second
+    resources = {int(r["t"]) - 1: r for r in monitor.resources}
+    for second, samples in enumerate(by_second):
+        point: Dict[str, Any] = {"t": second, "completed": len(samples), "errors": sum(not s.ok for s in samples)}
+        latency = summarize([s.latency for s in samples if s.ok])
+        point.update({key: latency[key] for key in ("p50_ms", "p95_ms", "p99_ms") if key in latency})
+        if second in resources:
+            point.update({key: resources[second][key] for key in ("rss_mb", "cpu_percent", "processes")})
+        timeline.append(point)
+    return {"stages": stages, "timeline": timeline}
+
+
+@contextmanager
+def app_process(args: argparse.Namespace, upstream_url: str) -> Iterator[Tuple[str, int]]:
+    """Runs the app under uvicorn in a fresh working directory and yields its url and pid."""
+    port = free_port()
+    workdir = tempfile.mkdtemp(prefix="load_test_")
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])),
+        "SEARXNG_URL": f"{upstream_url}/",
+        "FBREF_URL": f"{upstream_url}/en/comps",
+        "BROWSER_POOL_SIZE": str(args.browsers),
+        # The Reddit client needs credentials to be built, though the stand-ins never return Reddit results
+        "REDDIT_CLIENT_ID": os.environ.get("REDDIT_CLIENT_ID", "load-test"),
+        "REDDIT_CLIENT_SECRET": os.environ.get("REDDIT_CLIENT_SECRET", "load-test"),
+    }
+    command = [
+        sys.executable, "-m", "uvicorn", "src.api.app:app", "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(args.workers), "--log-level", "warning", "--no-access-log",
+    ]
+    log_path = os.path.join(workdir, "app.log")
+    with open(log_path, "w") as log:
+        process = subprocess.Popen(command, cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        try:
+            wait_ready(f"{url}/metrics", lambda: process.poll() is None, timeout=120)
+        except (RuntimeError, TimeoutError):
+            with open(log_path) as f:
+                print(f.read()[-4000:])
+            raise
+        print(f"App at {url} with {args.workers} worker(s), log at {log_path}")
+        yield url, process.pid
+    finally:
+        process.terminate()
+        try:
+            process.wait(30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        if not args.keep_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+async def drive(args: argparse.Namespace, app_url: str, pid: Optional[int]) -> Dict[str, Any]:
+    sampler = None
+    if pid is not None:
+        if not HAS_PSUTIL:
+            print("psutil is not installed, worker RSS and CPU are not sampled")
+        else:
+            sampler = ResourceSampler(pid)
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    async with httpx.AsyncClient(base_url=app_url, timeout=args.timeout, limits=limits) as client:
+        generator = LoadGenerator(client, QueryMix(args, random.Random(args.seed)), args)
+        monitor = Monitor(generator, sampler)
+        monitor_task = asyncio.create_task(monitor.run())
+        try:
+            await generator.run(monitor)
+        finally:
+            monitor_task.cancel()
+        try:
+            app_stats = (await client.get("/web_search/stats")).json()
+        except (httpx.HTTPError, ValueError):
+            app_stats = None
+    return {**report(generator, monitor), "app_stats": app_stats}
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--stages", nargs="+", type=Stage.parse, default=[Stage.parse(s) for s in ("2rps:20", "5rps:20", "10rps:20")], help="Load stages, RATErps:SECONDS or USERSusers:SECONDS.")
+    arg_parser.add_argument("--repeat-ratio", type=float, default=0.5, help="Fraction of searches repeating a popular query.")
+    arg_parser.add_argument("--hot-queries", type=int, default=20, help="Popular queries repeated searches draw from.")
+    arg_parser.add_argument("--football-ratio", type=float, default=0.2, help="Fraction of requests for football matches.")
+    arg_parser.add_argument("--num-results", type=int, default=5, help="Results per search.")
+    arg_parser.add_argument("--max-in-flight", type=int, default=1000, help="Open-loop requests beyond this many in flight are dropped and counted.")
+    arg_parser.add_argument("--timeout", type=float, default=60.0, help="Seconds before a request counts as failed.")
+    arg_parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes of the app.")
+    arg_parser.add_argument("--browsers", type=int, default=0, help="Warm browsers of the app; needs a Playwright browser installed.")
+    arg_parser.add_argument("--latency", type=float, default=0.05, help="Injected delay of page and schedule responses in seconds.")
+    arg_parser.add_argument("--search-latency", type=float, default=0.2, help="Injected delay of Searxng responses in seconds.")
+    arg_parser.add_argument("--jitter", type=float, default=0.02, help="Mean exponential delay added to every upstream response in seconds.")
+    arg_parser.add_argument("--upstream-error-rate", type=float, default=0.0, help="Fraction of page responses that fail.")
+    arg_parser.add_argument("--dynamic-ratio", type=float, default=0.0, help="Fraction of results that are script-rendered pages.")
+    arg_parser.add_argument("--hosts", type=int, default=8 if sys.platform.startswith("linux") else 1, help="Loopback hosts the result pages are spread over.")
+    arg_parser.add_argument("--app-url", help="Load an already running app instead of starting one.")
+    arg_parser.add_argument("--app-pid", type=int, help="Process of the already running app whose resources are sampled.")
+    arg_parser.add_argument("--keep-workdir", action="store_true", help="Keep the app's working directory with its caches and log.")
+    arg_parser.add_argument("--seed", type=int, default=7)
+    arg_parser.add_argument("--json", help="Write the report to this file (default: .cache/bench/load_test-<commit>.json).")
+    args = arg_parser.parse_args()
+
+    meta = run_metadata()
+    stand_ins = StandInConfig(
+        results_per_page=args.num_results,
+        dynamic_ratio=args.dynamic_ratio,
+        hosts=args.hosts,
+        latency=args.latency,
+        search_latency=args.search_latency,
+        jitter=args.jitter,
+        error_rate=args.upstream_error_rate,
+        seed=args.seed,
+    )
+    if args.app_url:
+        result = asyncio.run(drive(args, args.app_url.rstrip("/"), args.app_pid))
+    else:
+        with running(stand_ins) as upstream_url, app_process(args, upstream_url) as (app_url, pid):
+            result = asyncio.run(drive(args, app_url, pid))
+
+    print(f"\n{'stage':<14}{'endpoint':<12}{'requests':>9}{'rps':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for stage in result["stages"]:
+        rows = [("all", stage)] + list(stage["endpoints"].items())
+        for name, r in rows:
+            rps = f"{stage['achieved_rps']:>7.1f}" if name == "all" else " " * 7
+            print(
+                f"{stage['stage'] if name == 'all' else '':<14}{name:<12}{r['requests']:>9}{rps}"
+                f"{r.get('p50_ms', 0):>9.0f}{r.get('p95_ms', 0):>9.0f}{r.get('p99_ms', 0):>9.0f}{r['error_rate']:>8.1%}"
+            )
+        if stage["dropped"]:
+            print(f"{'':<14}{stage['dropped']} requests dropped at --max-in-flight")
+
+    config = {**vars(args), "stages": [str(stage) for stage in args.stages]}
+    path = args.json or os.path.join(".cache", "bench", f"load_test-{str(meta['commit'] or 'unknown')[:12]}.json")
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"meta": meta, "config": config, **result}, f, indent=2)
+    print(f"\nWrote {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Local stand-ins for the upstream services, so benchmarks run offline.
+
+One server plays every upstream the app talks to:
+
+- a Searxng JSON API (`POST /search`) whose results link back to this server,
+- static pages (`GET /pages/{n}`) from the benchmark page corpus, spread over `hosts`
+  loopback addresses,
+- dynamic pages (`GET /dynamic/{n}`) that only render their article with a script,
+- fbref schedule pages (`GET /en/comps/...`) made from the schedule fixtures.
+
+Results are a deterministic function of the query, so a repeated query gets
+the same pages. Every response waits `latency` seconds plus an exponentially
+distributed delay with mean `jitter`, which gives latencies the long tail of
+real upstreams; `error_rate` of the page responses fail with a 503. The server
+runs in its own process, so it does not compete with the code under test for
+the event loop.
+
+    python -m benchmarks.stand_ins [--port N] [--latency S] [--search-latency S] [--jitter S]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import socket
+import time
+import zlib
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional
+from urllib.parse import parse_qs
+
+import httpx
+from pydantic import BaseModel, Field
+
+from benchmarks.bench_schedule_table import FIXTURES, scale_page
+from benchmarks.corpus import generate_corpus, load_corpus
+
+if TYPE_CHECKING:
+    from fastapi import FastAPI
+
+SCHEDULE_FIXTURE = "sched_2023-2024_9_1.html"
+
+
+class StandInConfig(BaseModel):
+    """Configuration of the local upstream stand-ins."""
+    corpus: Optional[str] = Field(default=None, description="Directory of saved .html pages served as result pages (default: synthetic corpus).")
+    n_pages: int = Field(default=60, description="Pages of the synthetic corpus.", ge=1)
+    results_per_page: int = Field(default=5, description="Results returned per Searxng results page.", ge=0)
+    dynamic_ratio: float = Field(default=0.0, description="Fraction of results linking to script-rendered pages.", ge=0, le=1)
+    hosts: int = Field(default=1, description="Loopback addresses 127.0.0.1 to 127.0.0.N the result pages are spread over, so per-host fetch limits apply as across real sites. More than one needs Linux.", ge=1, le=254)
+    latency: float = Field(default=0.05, description="Base delay of page and schedule responses in seconds.", ge=0)
+    search_latency: float = Field(default=0.2, description="Base delay of Searxng responses in seconds.", ge=0)
+    jitter: float = Field(default=0.02, description="Mean of the exponential delay added to every response in seconds.", ge=0)
+    error_rate: float = Field(default=0.0, description="Fraction of page responses that fail with a 503.", ge=0, le=1)
+    schedule_scale: int = Field(default=20, description="Times the fixture's match rows are repeated, to reach the size of a full season.", ge=1)
+    seed: int = Field(default=7, description="Seed of the synthetic corpus, the delays and the injected errors.")
+
+
+def _dynamic_page(html: str) -> str:
+    """A page whose article is only in the DOM after its script ran, like a client-rendered app."""
+    body = json.dumps(html).replace("</", "<\\/")
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>Loading</title></head>"
+        f"<body><div id='app'>Loading...</div><script>document.getElementById('app').innerHTML = {body};</script></body></html>"
+    )
+
+
+def create_app(config: StandInConfig) -> "FastAPI":
+    from fastapi import FastAPI, HTTPException, Request
+    from fastapi.responses import HTMLResponse
+
+    pages = load_corpus(config.corpus) if config.corpus else generate_corpus(config.n_pages, config.seed)
+    with open(os.path.join(FIXTURES, SCHEDULE_FIXTURE), encoding="utf-8") as f:
+        schedule = scale_page(f.read(), config.schedule_scale)
+    rng = random.Random(config.seed)
+    app = FastAPI()
+
+    async def delay(base: float) -> None:
+        wait = base + (rng.expovariate(1 / config.jitter) if config.jitter else 0.0)
+        if wait:
+            await asyncio.sleep(wait)
+
+    def page(n: int) -> str:
+        if rng.random() < config.error_rate:
+            raise HTTPException(status_code=503)
+        return pages[n % len(pages)]
+
+    @app.get("/health")
+    async def health() -> Dict[str, int]:
+        return {"pages": len(pages)}
+
+    @app.post("/search")
+    async def search(request: Request) -> Dict[str, List[Dict[str, str]]]:
+        # Searxng takes urlencoded form data; parsed by hand to not need python-multipart
+        form = parse_qs((await request.body()).decode())
+        q, pageno = form.get("q", [""])[0], form.get("pageno", ["1"])[0]
+        await delay(config.search_latency)
+        results = []
+        for i in range(config.results_per_page):
+            h = zlib.crc32(f"{q}\0{pageno}\0{i}".encode())
+            kind = "dynamic" if (h >> 16) % 1000 < config.dynamic_ratio * 1000 else "pages"
+            n = h % len(pages)
+            host = f"127.0.0.{n % config.hosts + 1}:{request.url.port}"
+            results.append({"url": f"http://{host}/{kind}/{n}", "title": f"Result {n} for {q}", "content": f"Snippet of page {n} about {q}."})
+        return {"results": results}
+
+    @app.get("/pages/{n}", response_class=HTMLResponse)
+    async def static_page(n: int) -> str:
+        await delay(config.latency)
+        return page(n)
+
+    @app.get("/dynamic/{n}", response_class=HTMLResponse)
+    async def dynamic_page(n: int) -> str:
+        await delay(config.latency)
+        return _dynamic_page(page(n))
+
+    @app.get("/en/comps/{competition}/schedule/", response_class=HTMLResponse)
+    @app.get("/en/comps/{competition}/{season}/schedule/", response_class=HTMLResponse)
+    async def fbref_schedule(competition: int, season: Optional[str] = None) -> str:
+        await delay(config.latency)
+        return schedule
+
+    return app
+
+
+def serve(config: StandInConfig, port: int) -> None:
+    import uvicorn
+    sockets = []
+    for i in range(config.hosts):
+        sock = socket.socket()
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((f"127.0.0.{i + 1}", port))
+        sockets.append(sock)
+    server = uvicorn.Server(uvicorn.Config(create_app(config), log_level="warning", access_log=False))
+    server.run(sockets=sockets)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port: int = s.getsockname()[1]
+        return port
+
+
+def wait_ready(url: str, is_alive: Optional[Callable[[], bool]] = None, timeout: float = 30.0) -> None:
+    """Polls `url` until it answers, failing early when the server process died."""
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if is_alive is not None and not is_alive():
+            raise RuntimeError(f"Server process exited before answering {url}")
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise TimeoutError(f"{url} did not answer within {timeout} seconds")
+
+
+@contextmanager
+def running(config: StandInConfig) -> Iterator[str]:
+    """Runs the stand-ins in a fresh process and yields their base url."""
+    port = free_port()
+    process = multiprocessing.get_context("spawn").Process(target=serve, args=(config, port), daemon=True)
+    process.start()
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_ready(f"{base_url}/health", process.is_alive)
+        yield base_url
+    finally:
+        process.terminate()
+        process.join(5)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--port", type=int, default=8888)
+    for name, field in StandInConfig.model_fields.items():
+        if name != "corpus":
+            arg_parser.add_argument(f"--{name.replace('_', '-')}", type=type(field.default), default=field.default, help=field.description)
+    arg_parser.add_argument("--corpus", help=StandInConfig.model_fields["corpus"].description)
+    args = vars(arg_parser.parse_args())
+    port = args.pop("port")
+    print(f"Searxng at http://127.0.0.1:{port}/, fbref at http://127.0.0.1:{port}/en/comps")
+    serve(StandInConfig(**args), port)
+
+
+if __name__ == "__main__":
+    main()
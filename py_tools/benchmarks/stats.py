@@ -0,0 +1,51 @@
+"""Latency summaries and run metadata shared by the benchmarks."""
+import math
+import os
+import platform
+import subprocess
+import time
+from typing import Dict, Optional, Sequence
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(sorted_values: Sequence[float], p: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return math.nan
+    rank = max(math.ceil(p / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: Sequence[float]) -> Dict[str, float]:
+    """Count, mean, max and percentiles of latencies in seconds, reported in milliseconds."""
+    values = sorted(latencies)
+    summary: Dict[str, float] = {"count": len(values)}
+    if not values:
+        return summary
+    summary["mean_ms"] = sum(values) / len(values) * 1000
+    for p in PERCENTILES:
+        summary[f"p{p}_ms"] = percentile(values, p) * 1000
+    summary["max_ms"] = values[-1] * 1000
+    return summary
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_metadata() -> Dict[str, object]:
+    """Identifies the code and machine a result came from, so results of two commits can be told apart."""
+    status = _git("status", "--porcelain", "--untracked-files=no")
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(status) if status is not None else None,
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
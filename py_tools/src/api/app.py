@@ -1,19 +1,38 @@
 import time
 import uvicorn
-from fastapi import FastAPI, APIRouter, Request
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable
+from fastapi import FastAPI, APIRouter, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from src.api.routes import register_routes
+from src.api.routes import register_routes, startup, shutdown, trace_exporter
+from src.rags.metrics import HTTP_REQUEST_SECONDS
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    await startup()
+    yield
+    await shutdown()
+
+app = FastAPI(lifespan=lifespan)
 router = APIRouter()
 
 # Middlewares
 @app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
+async def add_process_time_header(request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
     start_time = time.time()
-    response = await call_next(request)
+    # Streaming responses are traced up to their headers
+    with trace_exporter.trace(f"{request.method} {request.url.path}", query=str(request.url.query)) as trace:
+        response = await call_next(request)
     process_time = time.time() - start_time
     response.headers["X-Process-Time"] = str(process_time)
+    if trace is not None:
+        if trace_exporter.config.server_timing:
+            response.headers["Server-Timing"] = trace.server_timing()
+        await trace_exporter.export(trace)
+    # Label by route template, not raw path, to keep the series count bounded
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    HTTP_REQUEST_SECONDS.labels(route, request.method, str(response.status_code)).observe(process_time)
     return response
 
 app.add_middleware(
@@ -1,78 +1,295 @@
+import asyncio
 import os
 import json
+import secrets
 import datetime
 import asyncpraw
-from fastapi import APIRouter, Query
-from typing import Dict, List, Optional
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from typing import Any, AsyncIterator, Dict, List, Optional
 from dotenv import load_dotenv
 from pydantic import HttpUrl
 
-from src.rags.football.fbref import FbrefFetcher, TournamentEnum
+from src.rags.football.fbref import FbrefFetcher, TournamentEnum, match_columns
+from src.rags.football.config import FbrefConfig, MatchStoreConfig
+from src.rags.football.match_store import MatchStore
+from src.rags.http_clients import HttpClientConfig, HttpClientRegistry
+from src.rags.executors import ExecutorConfig, Executors
+from src.rags.metrics import REGISTRY, expose_cache
+from src.rags.profiler import collapsed, sample_stacks
+from src.rags.tracing import TraceExporter, TracingConfig, span
 from src.rags.web_search.search_rag import SearchRAG
 from src.rags.web_search.searxng_search_engine import SearxngSearchEngine
 from src.rags.web_search.web_scraper import WebScraper
-from src.rags.web_search.basic_html_parser import BasicHTMLParser
-from src.rags.web_search.config import SearxngConfig
-from src.rags.web_search.search_params import SearchParams, SearchTimeRange
+from src.rags.web_search.lxml_html_parser import LxmlHTMLParser
+from src.rags.web_search.config import SearxngConfig, BrowserPoolConfig, ContentCacheConfig, SearchResultsCacheConfig, FetchRouterConfig, DedupConfig, RedditConfig
+from src.rags.web_search.fetch_router import FetchRouter
+from src.rags.web_search.reddit_extractor import RedditExtractor
+from src.rags.web_search.dedup import NearDuplicateFilter
+from src.rags.web_search.search_results_cache import SearchResultsCache
+from src.rags.web_search.content_cache import ContentCache
+from src.rags.web_search.browser_pool import BrowserPool
+from src.rags.web_search.scheduler import FetchScheduler
+from src.rags.web_search.search_params import BatchSearchParams, PassageParams, SearchParams, SearchTimeRange
 
 load_dotenv()
 
 
-football_client = FbrefFetcher()
-
 # Initialize SearchRAG components
+# Upstreams can be pointed elsewhere through the environment, e.g. at local stand-ins under load tests
 searxng_config = SearxngConfig(
-    base_url=HttpUrl("http://100.109.37.59:8181/"),  # Replace with your Searxng base URL if needed
+    base_url=HttpUrl(os.environ.get("SEARXNG_URL", "http://100.109.37.59:8181/")),  # Replace with your Searxng base URL if needed
     results_per_page=5,
     max_pages=1,
     timeout=10,
+    lazy_paging=True,
 )
 reddit_client = asyncpraw.Reddit(
         client_id=str(os.environ["REDDIT_CLIENT_ID"]),
         client_secret=str(os.environ["REDDIT_CLIENT_SECRET"]),
         user_agent="ChangeMeClient/0.1 by Lusion7",
     )
-search_engine = SearxngSearchEngine(searxng_config)
-html_parser = BasicHTMLParser()
-web_scraper = WebScraper(config=searxng_config, html_parser=html_parser, reddit_client=reddit_client)
-search_rag = SearchRAG(search_engine, web_scraper)
+http_clients = HttpClientRegistry(HttpClientConfig())
+executors = Executors(ExecutorConfig())
+match_store = MatchStore(MatchStoreConfig(), executors=executors)
+trace_exporter = TraceExporter(TracingConfig())
+profile_lock = asyncio.Lock()
+football_client = FbrefFetcher(
+    FbrefConfig(base_url=os.environ.get("FBREF_URL", FbrefConfig().base_url)),
+    executors=executors,
+    match_store=match_store,
+)
+# BROWSER_POOL_SIZE=0 serves without warm browsers, on hosts that have none installed
+browser_pool_size = int(os.environ.get("BROWSER_POOL_SIZE", BrowserPoolConfig().size))
+browser_pool = BrowserPool(BrowserPoolConfig(size=browser_pool_size)) if browser_pool_size > 0 else None
+content_cache = ContentCache(ContentCacheConfig(), executors=executors)
+fetch_router = FetchRouter(FetchRouterConfig())
+search_engine = SearxngSearchEngine(searxng_config, results_cache=SearchResultsCache(SearchResultsCacheConfig()))
+html_parser = LxmlHTMLParser()
+web_scraper = WebScraper(
+    config=searxng_config,
+    html_parser=html_parser,
+    reddit_client=reddit_client,
+    reddit_extractor=RedditExtractor(RedditConfig(), reddit_client),
+    browser_pool=browser_pool,
+    scheduler=FetchScheduler.from_config(searxng_config),
+    content_cache=content_cache,
+    fetch_router=fetch_router,
+    executors=executors,
+)
+search_rag = SearchRAG(
+    search_engine,
+    web_scraper,
+    default_deadline=searxng_config.deadline,
+    dedup=NearDuplicateFilter(DedupConfig(), content_cache=content_cache),
+)
+
+
+def expose_caches() -> None:
+    """Publishes the hit counts the caches already keep as metrics."""
+    expose_cache("content", lambda: content_cache.hits, lambda: content_cache.misses)
+    if search_engine.results_cache is not None:
+        results = search_engine.results_cache.cache
+        expose_cache("search_results", lambda: results.hits, lambda: results.misses)
+    expose_cache("fbref_schedules", lambda: football_client.schedules.hits, lambda: football_client.schedules.misses)
+
+
+expose_caches()
 
 
-def register_routes(router: APIRouter):
+async def startup() -> None:
+    """Starts long-lived resources owned by the app lifespan."""
+    fetch_router.load()
+    search_engine.http_client = http_clients.get("searxng")
+    web_scraper.http_client = http_clients.get("web")
+    football_client.http_client = http_clients.get("fbref")
+    await executors.start()
+    if browser_pool is not None:
+        await browser_pool.start()
+
+
+async def shutdown() -> None:
+    """Releases long-lived resources owned by the app lifespan."""
+    if browser_pool is not None:
+        await browser_pool.close()
+    await http_clients.close()
+    await content_cache.close()
+    await executors.close()
+    await match_store.close()
+    fetch_router.save()
+    await reddit_client.close()
+
+
+def register_routes(router: APIRouter) -> None:
     router.add_api_route("/football/matches", football_get_matches, methods=["GET"])
     router.add_api_route("/web_search", web_search_get, methods=["GET"])
+    router.add_api_route("/web_search/stream", web_search_stream_get, methods=["GET"])
+    router.add_api_route("/web_search/batch", web_search_batch_post, methods=["POST"])
+    router.add_api_route("/web_search/stats", web_search_stats_get, methods=["GET"])
+    router.add_api_route("/metrics", metrics_get, methods=["GET"], response_class=PlainTextResponse)
+    router.add_api_route("/debug/traces", debug_traces_get, methods=["GET"])
+    router.add_api_route("/debug/profile", debug_profile_get, methods=["GET"], response_class=PlainTextResponse)
 
 
-async def football_get_matches(tournaments: List[str] = Query(...), start_date: datetime.datetime = Query(...)) -> Dict:
+async def football_get_matches(
+    tournaments: List[str] = Query(...),
+    start_date: datetime.datetime = Query(...),
+    end_date: Optional[datetime.datetime] = Query(default=None),
+    columnar: bool = Query(default=False),
+) -> Dict:
     """
-    Fetch matches for the given tournaments.
+    Fetch matches for the given tournaments between start_date and end_date
+    (default now). Completed seasons are served from the local match store.
+    With columnar, each tournament is returned as one list per field instead
+    of a list of match objects.
     """
     global football_client
     tournaments_enums = [TournamentEnum.from_str(t) for t in tournaments]
-    data = football_client.get_matches(tournaments_enums, start_date=start_date)
+    if columnar:
+        frames = await football_client.aget_match_frames(tournaments_enums, start_date=start_date, end_date=end_date)
+        return {"matches": {t: match_columns(frame) for t, frame in frames.items()}}
+    data = await football_client.aget_matches(tournaments_enums, start_date=start_date, end_date=end_date)
     return {"matches": data}
 
 
-async def web_search_get(
-    query: str = Query(...),
-    num_results: int = Query(default=5),
-    time_range: Optional[str] = Query(default=None),
-    website: Optional[str] = Query(default=None),
-) -> Dict:
-    """
-    Perform web search using SearchRAG.
-    """
+def build_search_params(query: str, num_results: int, time_range: Optional[str], website: Optional[str]) -> SearchParams:
     search_time_range = None
     if time_range:
         search_time_range = SearchTimeRange(time_range)
 
-    params = SearchParams(
+    return SearchParams(
         query=query,
         num_results=num_results,
         time_range=search_time_range,
         website=website,
     )
-    results = await search_rag.search_and_retrieve(params)
+
+
+async def web_search_get(
+    query: str = Query(...),
+    num_results: int = Query(default=5),
+    time_range: Optional[str] = Query(default=None),
+    website: Optional[str] = Query(default=None),
+    deadline: Optional[float] = Query(default=None, gt=0),
+    passage_words: Optional[int] = Query(default=None, ge=10),
+    top_k: Optional[int] = Query(default=None, ge=1),
+    token_budget: Optional[int] = Query(default=None, ge=1),
+) -> JSONResponse:
+    """
+    Perform web search using SearchRAG. Pages not scraped within `deadline`
+    seconds are returned with their search snippet and a timed out status.
+    When any of `passage_words`, `top_k` or `token_budget` is given, the pages
+    are cut into passages and only the ones most relevant to the query are kept;
+    pages without such a passage are returned empty with a no relevant passage status.
+    """
+    params = build_search_params(query, num_results, time_range, website)
+    passages = None
+    if passage_words is not None or top_k is not None or token_budget is not None:
+        passages = PassageParams(**{
+            name: value for name, value in
+            (("passage_words", passage_words), ("top_k", top_k), ("token_budget", token_budget))
+            if value is not None
+        })
+    results = await search_rag.search_and_retrieve(params, deadline=deadline, passages=passages)
     res = {"results": [result.__dict__ for result in results]}
     # print(f"search api results {json.dumps(res, indent=4, default=str)}")
-    return res
+    with span("serialize"):
+        return JSONResponse(jsonable_encoder(res))
+
+
+async def web_search_stream_get(
+    query: str = Query(...),
+    num_results: int = Query(default=5),
+    time_range: Optional[str] = Query(default=None),
+    website: Optional[str] = Query(default=None),
+    deadline: Optional[float] = Query(default=None, gt=0),
+) -> StreamingResponse:
+    """
+    Perform web search using SearchRAG, streaming NDJSON records: the search
+    snippets first, then each scraped result as soon as it completes, then the
+    near-duplicates among them, then a summary.
+    """
+    params = build_search_params(query, num_results, time_range, website)
+
+    async def ndjson() -> AsyncIterator[str]:
+        async for event in search_rag.search_and_retrieve_stream(params, deadline=deadline):
+            yield event.model_dump_json() + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+async def web_search_batch_post(batch: BatchSearchParams) -> JSONResponse:
+    """
+    Perform several related web searches at once. Pages returned by more than
+    one query are scraped once and shared between their results.
+    """
+    batch_results = await search_rag.batch_search_and_retrieve(batch.queries, deadline=batch.deadline)
+    with span("serialize"):
+        return JSONResponse(batch_results.model_dump(mode="json"))
+
+
+async def web_search_stats_get() -> Dict[str, Any]:
+    """
+    Report scheduler queue depths and wait times, browser pool, cache and executor usage,
+    Reddit rate limiting and how many requests were coalesced.
+    """
+    stats = web_scraper.scheduler.stats() if web_scraper.scheduler else None
+    return {
+        "scheduler": stats,
+        "browser_pool": browser_pool.stats() if browser_pool is not None else None,
+        "content_cache": content_cache.stats(),
+        "http_clients": http_clients.stats(),
+        "executors": executors.stats(),
+        "reddit": web_scraper.reddit_extractor.stats() if web_scraper.reddit_extractor else None,
+        "coalescing": {
+            "search": search_rag.inflight.stats(),
+            "searxng_pages": search_engine.inflight.stats(),
+            "page_fetches": web_scraper.inflight.stats(),
+        },
+    }
+
+
+async def metrics_get() -> PlainTextResponse:
+    """
+    Stage latency histograms, in-flight gauges, fetch outcomes, bytes fetched and
+    cache hit ratios in the Prometheus text format.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def check_admin_token(token: Optional[str]) -> None:
+    """Admin endpoints are disabled unless ADMIN_TOKEN is set, and need it in the X-Admin-Token header."""
+    expected = os.environ.get("ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=404)
+    if token is None or not secrets.compare_digest(token, expected):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+async def debug_traces_get(x_admin_token: Optional[str] = Header(default=None)) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    The latest exported traces (requests slower than the tracing threshold),
+    newest first, as span trees. Admin only.
+    """
+    check_admin_token(x_admin_token)
+    return {"traces": list(reversed(trace_exporter.recent))}
+
+
+async def debug_profile_get(
+    seconds: float = Query(default=10.0, gt=0, le=120),
+    interval: float = Query(default=0.005, ge=0.001, le=1),
+    include_idle: bool = Query(default=False),
+    x_admin_token: Optional[str] = Header(default=None),
+) -> PlainTextResponse:
+    """
+    Sample the stacks of the live process for `seconds` and return them in the
+    collapsed-stack format, for flamegraph.pl, speedscope or inferno. One
+    profile runs at a time. Admin only.
+    """
+    check_admin_token(x_admin_token)
+    if profile_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    async with profile_lock:
+        counts = await asyncio.to_thread(sample_stacks, seconds, interval, include_idle)
+    return PlainTextResponse(collapsed(counts))
@@ -0,0 +1,52 @@
+import random
+import re
+import unicodedata
+import httpx
+import pytest
+from src.owui.tools.web_search import TextProcessor, Tools, _SymbolTable
+
+def reference(text, word_limit):
+    """The original format_text + truncate_to_n_words pipeline."""
+    formatted = unicodedata.normalize("NFKC", text)
+    formatted = re.sub(r"\s+", " ", formatted).strip()
+    formatted = "".join(c for c in formatted if not unicodedata.category(c).startswith("So"))
+    return " ".join(formatted.split()[:word_limit])
+
+def test_normalize_and_truncate_matches_reference():
+    # Combining marks, Hangul jamo, compatibility forms, unicode spaces and emoji
+    alphabet = list("ab e\t\n\r\x0b\x0c\x1c 　̧́가ೕ½ﬁＡ①\U0001F600❤️‍©")
+    rng = random.Random(0)
+    processor = TextProcessor()
+    processor.MIN_CHUNK_CHARS = 3
+    processor.CHARS_PER_WORD = 1
+    for _ in range(2000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 50)))
+        word_limit = rng.randint(-2, 15)
+        assert processor.normalize_and_truncate(text, word_limit) == reference(text, word_limit)
+
+def test_symbol_table_classifies_only_seen_code_points() -> None:
+    table = _SymbolTable()
+    assert "a\U0001F600b a".translate(table) == "ab a"
+    assert table == {ord("a"): ord("a"), 0x1F600: None, ord("b"): ord("b"), ord(" "): ord(" ")}
+
+def test_process_search_result_truncates_large_page():
+    page = "Ｗord  \U0001F600emoji ﬁne\n" * 100_000
+    result = TextProcessor().process_search_result({"content": page}, 5)
+    assert result["content"] == "Word emoji fine Word emoji"
+
+@pytest.mark.asyncio
+async def test_query_sends_deadline_and_waits_past_it():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"results": []})
+
+    tools = Tools()
+    tools.valves.SEARCH_DEADLINE = 12.5
+    tools.valves.DEADLINE_MARGIN = 2.5
+    tools._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    await tools.call_search_and_scrape_query("test", "", "")
+    assert requests[0].url.params["deadline"] == "12.5"
+    assert requests[0].extensions["timeout"]["read"] == 15
+    await tools._client.aclose()
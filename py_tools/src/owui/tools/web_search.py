@@ -8,13 +8,13 @@ license: MIT
 
 import asyncio
 from pydantic.type_adapter import P
-import requests
+import httpx
 import json
 from urllib.parse import urlparse
 import re
 import unicodedata
 from pydantic import BaseModel, Field
-from typing import Callable, Any, Dict, List
+from typing import Callable, Any, Dict, List, Optional
 
 
 class HelpFunctions:
@@ -32,6 +32,12 @@ class HelpFunctions:
 
 
 
+def describe_error(e: BaseException) -> str:
+    if isinstance(e, asyncio.TimeoutError):
+        return "timed out"
+    return str(e) or type(e).__name__
+
+
 class EventEmitter:
     def __init__(self, event_emitter: Callable[[dict], Any] = None):
         self.event_emitter = event_emitter
@@ -71,12 +77,46 @@ class Tools:
             default=False,
             description="If True, send custom citations with links",
         )
+        SEARCH_DEADLINE: float = Field(
+            default=30,
+            description="Seconds the search API may spend searching and scraping before returning snippets for unfinished pages.",
+        )
+        DEADLINE_MARGIN: float = Field(
+            default=5,
+            description="Seconds past the deadline to wait for the search API's answer to arrive.",
+        )
+        STREAM_RESULTS: bool = Field(
+            default=False,
+            description="If True, use the streaming search endpoint and send citations and status updates as each page arrives.",
+        )
+        BATCH_QUERIES: bool = Field(
+            default=False,
+            description="If True (and not streaming), send all queries in one batch request so pages shared between queries are scraped once.",
+        )
 
     def __init__(self):
         self.valves = self.Valves()
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3"
         }
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def get_client(self) -> httpx.AsyncClient:
+        """Returns the client shared by all tool calls, so connections to the search API are reused."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                headers=self.headers,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60),
+            )
+        return self._client
+
+    def request_timeout(self) -> float:
+        """Seconds to wait for one search request: the deadline the API is held to, plus the margin for its answer.
+
+        Used both as the httpx timeout, which bounds each phase of the request, and
+        to bound the whole request, so neither cuts the API off before its deadline.
+        """
+        return self.valves.SEARCH_DEADLINE + self.valves.DEADLINE_MARGIN
 
     async def search_web(
         self,
@@ -114,7 +154,10 @@ class Tools:
         await emitter.emit(f"Initiating web search for: {' and '.join(queries)}")
 
         try:
-            search_results = await self.search_and_scrape(queries, time_range, website)
+            if self.valves.STREAM_RESULTS:
+                search_results = await self.stream_search_and_scrape(queries, time_range, website, emitter, __event_emitter__)
+            else:
+                search_results = await self.search_and_scrape(queries, time_range, website, emitter)
         except Exception as e:
             await emitter.emit(
                 status="error",
@@ -129,7 +172,8 @@ class Tools:
         processed_results: List[SearchResults] = []
         if search_results:
             try:
-                processed_results = self.process_results(search_results)
+                # Streamed results were processed as they arrived
+                processed_results = search_results if self.valves.STREAM_RESULTS else self.process_results(search_results)
             except Exception as e:
                 await emitter.emit(
                     status="error",
@@ -138,19 +182,11 @@ class Tools:
                 )
                 return json.dumps({"error": str(e)})
 
-            if self.valves.CITATION_LINKS and __event_emitter__:
+            # Streamed results already had their citations sent as they arrived
+            if self.valves.CITATION_LINKS and __event_emitter__ and not self.valves.STREAM_RESULTS:
                 for s_results in processed_results:
                     for r in s_results.results:
-                        await __event_emitter__(
-                            {
-                                "type": "citation",
-                                "data": {
-                                    "document": [r['content']],
-                                    "metadata": [{"source": r['url']}],
-                                    "source": {"name": r['title']},
-                                },
-                            }
-                        )
+                        await self.emit_citation(__event_emitter__, r)
 
         await emitter.emit(
             status="complete",
@@ -161,38 +197,136 @@ class Tools:
         # print(f"Final data to llm:\n{json.dumps(results_json, indent=4)}")
         return json.dumps([r.model_dump(mode='json') for r in processed_results], ensure_ascii=False)
 
-    async def search_and_scrape(self, queries: List[str], time_range: str, website: str) -> List[SearchResults]:
-        # Search and scrape asynchronously
-        results = [self.call_search_and_scrape_query(query, time_range, website) for query in queries]
-        return await asyncio.gather(*results)
-
+    async def search_and_scrape(self, queries: List[str], time_range: str, website: str, emitter: Optional[EventEmitter] = None) -> List[SearchResults]:
+        # Search and scrape concurrently, a failed or slow query does not take down the others
+        if self.valves.BATCH_QUERIES:
+            return await self.call_search_and_scrape_batch(queries, time_range, website)
+        results = await asyncio.gather(
+            *(self.call_search_and_scrape_query(query, time_range, website) for query in queries),
+            return_exceptions=True,
+        )
+        search_results: List[SearchResults] = []
+        for query, result in zip(queries, results):
+            if isinstance(result, BaseException):
+                if emitter:
+                    await emitter.emit(f"Search failed for {query}: {describe_error(result)}")
+                result = SearchResults(query=query, results=[])
+            search_results.append(result)
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors and len(errors) == len(results):
+            raise errors[0]
+        return search_results
 
-    async def call_search_and_scrape_query(self, query: str, time_range: str, website: str) -> SearchResults:
-        params = {
+    def build_params(self, query: str, time_range: str, website: str) -> Dict[str, Any]:
+        params: Dict[str, Any] = {
             "query": query,
-            "number_of_results": self.valves.NUM_RESULTS,
+            "num_results": self.valves.NUM_RESULTS,
+            "deadline": self.valves.SEARCH_DEADLINE,
         }
         if time_range:
             for tr in ['day', 'month', 'year']:
                 if tr in time_range.lower():
                     params['time_range'] = tr
                     break
-        else:
-            params['time_range'] = None
-
         if website:
             params['website'] = website
-        else:
-            params['website'] = None
+        return params
 
-        resp = requests.get(
-            self.valves.WEB_SEARCH_API_URL, params=params, headers=self.headers, timeout=120
+    async def call_search_and_scrape_query(self, query: str, time_range: str, website: str) -> SearchResults:
+        params = self.build_params(query, time_range, website)
+        resp = await asyncio.wait_for(
+            self.get_client().get(self.valves.WEB_SEARCH_API_URL, params=params, timeout=self.request_timeout()),
+            timeout=self.request_timeout(),
         )
         resp.raise_for_status()
         data = resp.json()
 
         return SearchResults(query=query, results=data.get("results", []))
 
+    async def call_search_and_scrape_batch(self, queries: List[str], time_range: str, website: str) -> List[SearchResults]:
+        body = {
+            "queries": [
+                {k: v for k, v in self.build_params(query, time_range, website).items() if k != "deadline"}
+                for query in queries
+            ],
+            "deadline": self.valves.SEARCH_DEADLINE,
+        }
+        resp = await asyncio.wait_for(
+            self.get_client().post(f"{self.valves.WEB_SEARCH_API_URL.rstrip('/')}/batch", json=body, timeout=self.request_timeout()),
+            timeout=self.request_timeout(),
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        return [SearchResults(query=query, results=results) for query, results in zip(queries, data.get("results", []))]
+
+    async def stream_search_and_scrape(
+        self,
+        queries: List[str],
+        time_range: str,
+        website: str,
+        emitter: EventEmitter,
+        event_emitter: Callable[[dict], Any] = None,
+    ) -> List[SearchResults]:
+        """Consumes the streaming endpoint for every query concurrently, reporting each page as it arrives."""
+        async def stream_query(query: str) -> SearchResults:
+            try:
+                return await asyncio.wait_for(
+                    self.call_search_and_scrape_stream(query, time_range, website, emitter, event_emitter),
+                    timeout=self.request_timeout(),
+                )
+            except Exception as e:
+                await emitter.emit(f"Search failed for {query}: {describe_error(e)}")
+                return SearchResults(query=query, results=[])
+
+        return list(await asyncio.gather(*(stream_query(query) for query in queries)))
+
+    async def call_search_and_scrape_stream(
+        self,
+        query: str,
+        time_range: str,
+        website: str,
+        emitter: EventEmitter,
+        event_emitter: Callable[[dict], Any] = None,
+    ) -> SearchResults:
+        params = self.build_params(query, time_range, website)
+        processor = TextProcessor()
+        results: List[Any] = []
+        url = f"{self.valves.WEB_SEARCH_API_URL.rstrip('/')}/stream"
+        async with self.get_client().stream("GET", url, params=params, timeout=self.request_timeout()) as resp:
+            resp.raise_for_status()
+            async for line in resp.aiter_lines():
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                if event["type"] == "snippets":
+                    results = event["results"]
+                    await emitter.emit(f"Found {len(results)} pages for {query}, scraping")
+                elif event["type"] == "result":
+                    result = processor.process_search_result(event["result"], self.valves.PAGE_CONTENT_WORDS_LIMIT)
+                    results[event["index"]] = result
+                    await emitter.emit(f"Read {result['title'] or result['url']}")
+                    if self.valves.CITATION_LINKS and event_emitter:
+                        await self.emit_citation(event_emitter, result)
+                elif event["type"] == "duplicates":
+                    for i, urls in event["alternate_urls"].items():
+                        results[int(i)]["alternate_urls"] = urls
+                    dropped = set(event["dropped"])
+                    results = [result for i, result in enumerate(results) if i not in dropped]
+        return SearchResults(query=query, results=results)
+
+    @staticmethod
+    async def emit_citation(event_emitter: Callable[[dict], Any], result: Dict[str, Any]) -> None:
+        await event_emitter(
+            {
+                "type": "citation",
+                "data": {
+                    "document": [result['content']],
+                    "metadata": [{"source": result['url']}],
+                    "source": {"name": result['title']},
+                },
+            }
+        )
+
     def process_results(self, search_results: List[SearchResults]) -> List[SearchResults]:
         processor = TextProcessor()
         for r in search_results:
@@ -203,7 +337,34 @@ class Tools:
                 )
         return search_results
 
+_ASCII_WHITESPACE = re.compile(r"[ \t\n\r\f\v]")
+
+
+class _SymbolTable(Dict[int, Optional[int]]):
+    """str.translate table deleting every "So" (other symbol, e.g. emoji) code point.
+
+    Filled in as translate looks code points up, so only characters that occur
+    in pages are ever classified, and each of them once.
+    """
+
+    def __missing__(self, cp: int) -> Optional[int]:
+        mapped = None if unicodedata.category(chr(cp)) == "So" else cp
+        self[cp] = mapped
+        return mapped
+
+
+_SYMBOL_TABLE = _SymbolTable()
+
+
+def symbol_table() -> Dict[int, Optional[int]]:
+    return _SYMBOL_TABLE
+
+
 class TextProcessor:
+    # Characters of input normalized per step, grown with the words still needed
+    MIN_CHUNK_CHARS = 16_384
+    CHARS_PER_WORD = 8
+
     def format_text(self, original_text):
         # soup = BeautifulSoup(original_text, "html.parser")
         # formatted_text = soup.get_text(separator=" ", strip=True)
@@ -214,16 +375,36 @@ class TextProcessor:
         return formatted_text
 
     def remove_emojis(self, text):
-        return "".join(c for c in text if not unicodedata.category(c).startswith("So"))
+        return text.translate(symbol_table())
 
     def process_search_result(self, result: Dict[str, str], page_content_word_limit: int) -> Dict[str, str]:
-        content = self.format_text(result['content'])
-        content = self.truncate_to_n_words(
-            content, page_content_word_limit
-        )
-        result['content'] = content
+        result['content'] = self.normalize_and_truncate(result['content'], page_content_word_limit)
         return result
 
+    def normalize_and_truncate(self, text: str, word_limit: int) -> str:
+        """Same output as truncate_to_n_words(format_text(text), word_limit), without normalizing the whole text.
+
+        The text is normalized in chunks that end on ASCII whitespace, where NFKC
+        cannot combine characters across the cut, and stops as soon as enough
+        words are collected. ASCII chunks skip normalization and symbol removal.
+        """
+        if word_limit < 0:
+            return self.truncate_to_n_words(self.format_text(text), word_limit)
+        words: List[str] = []
+        pos = 0
+        while pos < len(text) and len(words) < word_limit:
+            remaining = word_limit - len(words)
+            end = pos + max(self.MIN_CHUNK_CHARS, remaining * self.CHARS_PER_WORD)
+            if end < len(text):
+                boundary = _ASCII_WHITESPACE.search(text, end)
+                end = boundary.end() if boundary else len(text)
+            chunk = text[pos:end]
+            if not chunk.isascii():
+                chunk = unicodedata.normalize("NFKC", chunk).translate(symbol_table())
+            words.extend(chunk.split(None, remaining)[:remaining])
+            pos = end
+        return " ".join(words)
+
     def truncate_to_n_words(self, text: str, token_limit: int):
         tokens = text.split()
         truncated_tokens = tokens[:token_limit]
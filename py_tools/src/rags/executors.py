@@ -0,0 +1,189 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from pydantic import BaseModel, Field, computed_field
+
+T = TypeVar("T")
+
+
+class ExecutorConfig(BaseModel):
+    """Sizes of the pools that keep blocking work off the event loop."""
+    io_workers: int = Field(default=8, description="Threads for blocking I/O such as the SQLite stores.", ge=1)
+    cpu_workers: int = Field(
+        default=min(4, os.cpu_count() or 1),
+        description="Processes for CPU-heavy parsing. 0 runs CPU work on the I/O threads instead.",
+        ge=0,
+    )
+    max_queued_io: int = Field(default=64, description="Calls allowed to wait for an I/O thread before callers are held back.", ge=0)
+    max_queued_cpu: int = Field(default=32, description="Calls allowed to wait for a CPU process before callers are held back.", ge=0)
+    mp_start_method: str = Field(default="spawn", description="multiprocessing start method of the CPU pool.")
+    loop_lag_interval: float = Field(default=0.1, description="Seconds between event loop lag samples; 0 disables sampling.", ge=0)
+
+
+class PoolStats(BaseModel):
+    """Queue depth and timing numbers for one executor pool."""
+    workers: int
+    in_flight: int = Field(default=0, description="Calls submitted to the pool and not yet finished.")
+    waiting: int = Field(default=0, description="Calls held back on the loop because the pool queue is full.")
+    max_in_flight: int = Field(default=0, description="Highest number of calls in the pool observed.")
+    completed: int = 0
+    failed: int = 0
+    total_wait_seconds: float = Field(default=0.0, description="Summed time between submitting a call and a worker starting it.")
+    total_run_seconds: float = Field(default=0.0, description="Summed time calls spent running in a worker.")
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def avg_run_seconds(self) -> float:
+        done = self.completed + self.failed
+        return self.total_run_seconds / done if done else 0.0
+
+
+class LoopStats(BaseModel):
+    """How late the event loop runs scheduled callbacks, i.e. time it spent blocked."""
+    samples: int = 0
+    total_lag_seconds: float = 0.0
+    max_lag_seconds: float = 0.0
+
+
+def _timed(fn: Callable[..., T], *args: Any) -> Tuple[T, float, float]:
+    """Runs `fn` in a worker and reports when it started and how long it ran."""
+    started = time.time()
+    result = fn(*args)
+    return result, started, time.time() - started
+
+
+class _Pool:
+    """An executor with a bounded number of calls in flight."""
+
+    def __init__(self, factory: Callable[[], Executor], workers: int, max_queued: int):
+        self._factory = factory
+        self._executor: Optional[Executor] = None
+        self._slots = asyncio.Semaphore(workers + max_queued)
+        self.stats = PoolStats(workers=workers)
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        self.stats.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.stats.waiting -= 1
+        try:
+            if self._executor is None:
+                self._executor = self._factory()
+            future = self._executor.submit(_timed, fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        self.stats.in_flight += 1
+        self.stats.max_in_flight = max(self.stats.max_in_flight, self.stats.in_flight)
+        submitted = time.time()
+        loop = asyncio.get_running_loop()
+        # The slot is held until the worker is done with the call: a cancelled
+        # caller stops waiting, but a call that already started keeps running
+        future.add_done_callback(lambda f: self._call_soon(loop, self._finish, f, submitted))
+        result, _, _ = await asyncio.wrap_future(future)
+        return result
+
+    @staticmethod
+    def _call_soon(loop: asyncio.AbstractEventLoop, callback: Callable[..., None], *args: Any) -> None:
+        try:
+            loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            # The loop is closed, nobody is left to account for the call
+            pass
+
+    def _finish(self, future: "Future[Tuple[Any, float, float]]", submitted: float) -> None:
+        self.stats.in_flight -= 1
+        self._slots.release()
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            self.stats.failed += 1
+            return
+        _, started, run_seconds = future.result()
+        self.stats.completed += 1
+        self.stats.total_wait_seconds += max(started - submitted, 0.0)
+        self.stats.total_run_seconds += run_seconds
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+class Executors:
+    """App-wide thread and process pools for blocking calls made from async handlers.
+
+    `run_io` runs blocking I/O on a thread pool, `run_cpu` runs CPU-heavy work
+    (functions and arguments must be picklable) on a process pool. Each pool
+    admits a bounded number of calls; further callers wait on the loop, which
+    keeps memory bounded under bursts. Pools are created on first use and shut
+    down in the app lifespan.
+    """
+
+    def __init__(self, config: ExecutorConfig):
+        self.config = config
+        self._io = _Pool(
+            lambda: ThreadPoolExecutor(max_workers=config.io_workers, thread_name_prefix="io"),
+            config.io_workers,
+            config.max_queued_io,
+        )
+        if config.cpu_workers:
+            self._cpu = _Pool(
+                lambda: ProcessPoolExecutor(
+                    max_workers=config.cpu_workers,
+                    mp_context=multiprocessing.get_context(config.mp_start_method),
+                ),
+                config.cpu_workers,
+                config.max_queued_cpu,
+            )
+        else:
+            self._cpu = self._io
+        self._loop_stats = LoopStats()
+        self._lag_task: Optional[asyncio.Task[None]] = None
+
+    async def start(self) -> None:
+        if self.config.loop_lag_interval and self._lag_task is None:
+            self._lag_task = asyncio.create_task(self._sample_loop_lag())
+
+    async def close(self) -> None:
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            self._lag_task = None
+        self._io.shutdown()
+        self._cpu.shutdown()
+
+    async def run_io(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Runs a blocking I/O call on the thread pool."""
+        if kwargs:
+            fn = functools.partial(fn, **kwargs)
+        return await self._io.run(fn, *args)
+
+    async def run_cpu(self, fn: Callable[..., T], *args: Any) -> T:
+        """Runs a CPU-heavy call on the process pool."""
+        return await self._cpu.run(fn, *args)
+
+    def stats(self) -> Dict[str, Any]:
+        pools = {"io": self._io.stats}
+        if self._cpu is not self._io:
+            pools["cpu"] = self._cpu.stats
+        return {
+            "pools": {name: stats.model_dump() for name, stats in pools.items()},
+            "loop": self._loop_stats.model_dump(),
+        }
+
+    async def _sample_loop_lag(self) -> None:
+        interval = self.config.loop_lag_interval
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time()
+            await asyncio.sleep(interval)
+            lag = max(loop.time() - scheduled - interval, 0.0)
+            self._loop_stats.samples += 1
+            self._loop_stats.total_lag_seconds += lag
+            self._loop_stats.max_lag_seconds = max(self._loop_stats.max_lag_seconds, lag)
@@ -0,0 +1,20 @@
+from pydantic import BaseModel, Field
+
+
+class FbrefConfig(BaseModel):
+    """Configuration for fetching fbref schedules."""
+    base_url: str = Field(default="https://fbref.com/en/comps", description="Base url of the fbref competition pages.")
+    user_agent: str = Field(
+        default="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
+        description="User agent sent to fbref.",
+    )
+    timeout: float = Field(default=30.0, description="Seconds to wait for a schedule page.", gt=0)
+    match_day_ttl: int = Field(default=5 * 60, description="Seconds a schedule is cached on a day its tournament has matches.", ge=0)
+    ttl: int = Field(default=6 * 3600, description="Longest time a schedule is cached on other days; it also expires when the next match day starts.", ge=0)
+    max_cached_ranges: int = Field(default=64, description="Parsed date ranges memoized per cached schedule.", ge=0)
+    season_start_month: int = Field(default=8, description="Month a season starts in; seasons are named like 2023-2024.", ge=1, le=12)
+
+
+class MatchStoreConfig(BaseModel):
+    """Configuration for the local store of completed seasons."""
+    path: str = Field(default=".cache/matches.sqlite3", description="SQLite file holding the matches of completed seasons.")
@@ -1,9 +1,22 @@
+import asyncio
 import datetime
+from contextlib import nullcontext
+import httpx
 import pandas as pd
 from enum import Enum
 from abc import ABC, abstractmethod
-from pydantic import BaseModel, PrivateAttr
-from typing import List, Dict, Optional
+from pydantic import BaseModel, TypeAdapter
+from typing import TYPE_CHECKING, Any, List, Dict, Optional, Tuple
+
+from src.rags.executors import Executors
+from src.rags.football.config import FbrefConfig
+from src.rags.football.schedule_table import read_schedule_table
+from src.rags.metrics import FETCHED_BYTES, track, timed
+from src.rags.single_flight import SingleFlight
+from src.rags.ttl_cache import TTLCache
+
+if TYPE_CHECKING:
+    from src.rags.football.match_store import MatchStore
 
 
 class TournamentEnum(Enum):
@@ -48,6 +61,9 @@ class Match(BaseModel):
     away_xg: Optional[float]
 
 
+MATCH_LIST = TypeAdapter(List[Match])
+
+
 class FootballFetcher(ABC):
     def get_matches(
         self,
@@ -58,19 +74,107 @@ class FootballFetcher(ABC):
         raise NotImplementedError
 
 
+# Columns of the typed match frames `parse_matches_frame` returns
+MATCH_COLUMNS = ["week", "date_time", "home", "away", "home_goals", "away_goals", "home_xg", "away_xg"]
+MATCH_DTYPES = {
+    "week": "Int64",
+    "date_time": "datetime64[ns]",
+    "home": object,
+    "away": object,
+    "home_goals": "Int64",
+    "away_goals": "Int64",
+    "home_xg": float,
+    "away_xg": float,
+}
+
+
+def empty_match_frame() -> pd.DataFrame:
+    return pd.DataFrame({name: pd.Series([], dtype=dtype) for name, dtype in MATCH_DTYPES.items()})
+
+
+def match_columns(frame: pd.DataFrame) -> Dict[str, List[Any]]:
+    """A typed match frame as one JSON-ready list per column, with missing values as None."""
+    records = frame.astype(object).where(frame.notna(), None).to_dict("list")
+    columns = {str(name): values for name, values in records.items()}
+    columns["date_time"] = [d.isoformat() for d in frame["date_time"].dt.to_pydatetime()]
+    return columns
+
+
+class CachedSchedule:
+    """A downloaded tournament schedule plus the match frames already parsed out of it per date range."""
+
+    def __init__(self, frame: pd.DataFrame, max_ranges: int):
+        self.frame = frame
+        self.ranges: TTLCache[Tuple[str, str], pd.DataFrame] = TTLCache(max_entries=max(max_ranges, 1))
+
+
 class FbrefFetcher(FootballFetcher):
-    _season_start_month: int = PrivateAttr()
+    def __init__(
+        self,
+        config: Optional[FbrefConfig] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+        executors: Optional[Executors] = None,
+        match_store: Optional["MatchStore"] = None,
+    ):
+        self.config = config or FbrefConfig()
+        self.http_client = http_client
+        self.executors = executors
+        self.match_store = match_store
+        # Keyed by tournament and season; season None is the current season's page
+        self.schedules: TTLCache[Tuple[TournamentEnum, Optional[str]], CachedSchedule] = TTLCache(max_entries=256)
+        self.inflight: SingleFlight[Tuple[TournamentEnum, Optional[str]], CachedSchedule] = SingleFlight()
 
-    def model_post_init(self):
-        self._season_start_month = 8
+    def schedule_url(self, tournament: TournamentEnum, season: Optional[str] = None) -> str:
+        if season is None:
+            return f"{self.config.base_url}/{tournament.value}/schedule/"
+        return f"{self.config.base_url}/{tournament.value}/{season}/schedule/"
 
-    def get_matches(
+    def season_of(self, date: datetime.datetime) -> str:
+        """Name of the season a date falls in, e.g. 2023-2024."""
+        start_year = date.year if date.month >= self.config.season_start_month else date.year - 1
+        return f"{start_year}-{start_year + 1}"
+
+    def seasons_between(self, start_date: datetime.datetime, end_date: datetime.datetime) -> List[str]:
+        first = int(self.season_of(start_date)[:4])
+        last = int(self.season_of(end_date)[:4])
+        return [f"{year}-{year + 1}" for year in range(first, last + 1)]
+
+    def schedule_ttl(self, frame: pd.DataFrame, now: Optional[datetime.datetime] = None) -> float:
+        """Short on match days, so scores and xG show up soon; otherwise until the next match day starts."""
+        now = now or datetime.datetime.now()
+        today = now.strftime("%Y-%m-%d")
+        dates = frame["Date"].dropna().astype(str)
+        if (dates == today).any():
+            return self.config.match_day_ttl
+        upcoming = dates[dates > today]
+        if upcoming.empty:
+            return self.config.ttl
+        next_match_day = datetime.datetime.strptime(upcoming.min(), "%Y-%m-%d")
+        return max(min(self.config.ttl, (next_match_day - now).total_seconds()), self.config.match_day_ttl)
+
+    async def aget_matches(
         self,
         tournaments: List[TournamentEnum],
         start_date: Optional[datetime.datetime] = None,
         end_date: Optional[datetime.datetime] = None,
     ) -> Dict[TournamentEnum, List[Match]]:
-        """
+        """Async `get_matches` that also covers past seasons, see `aget_match_frames`."""
+        frames = await self.aget_match_frames(tournaments, start_date, end_date)
+        return {t: self.matches_from_frame(frame) for t, frame in frames.items()}
+
+    @timed("matches", "fbref")
+    async def aget_match_frames(
+        self,
+        tournaments: List[TournamentEnum],
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+    ) -> Dict[TournamentEnum, pd.DataFrame]:
+        """Matches of the tournaments between two dates, as typed frames with `MATCH_COLUMNS`.
+
+        The current season is downloaded for all tournaments concurrently and
+        cached with a TTL. Completed seasons are downloaded once: into the match
+        store when there is one, which then answers the date range with a single
+        indexed query, else into the in-memory cache without expiry.
         """
         now = datetime.datetime.now()
         if start_date is None:
@@ -80,42 +184,199 @@ class FbrefFetcher(FootballFetcher):
         start_strf = start_date.strftime("%Y-%m-%d")
         end_strf = end_date.strftime("%Y-%m-%d")
 
-        matches: Dict[TournamentEnum, List[Match]] = {}
-        if start_date.year < now.year:
-            raise NotImplementedError
+        parts: Dict[TournamentEnum, List[pd.DataFrame]] = {t: [] for t in tournaments}
+        current = self.season_of(now)
+        seasons = self.seasons_between(start_date, end_date)
+        past = [season for season in seasons if season < current]
 
-        if end_date.year == now.year:
+        if past and self.match_store is not None:
+            await asyncio.gather(*(self.ensure_stored(t, season) for t in tournaments for season in past))
+            stored = await self.match_store.query_frames(tournaments, start_strf, end_strf)
             for t in tournaments:
-                t_matches = pd.read_html(
-                    f"https://fbref.com/en/comps/{t.value}/schedule/"
-                )[0]
-                t_matches_lst = self.parse_matches(t_matches, start_strf, end_strf)
-                matches[t] = t_matches_lst
+                parts[t].append(stored[t])
+        elif past:
+            keys = [(t, season) for t in tournaments for season in past]
+            schedules = await asyncio.gather(*(self.get_schedule(t, season) for t, season in keys))
+            for (t, _), schedule in zip(keys, schedules):
+                parts[t].append(self._matches_in_range(schedule, start_strf, end_strf))
+
+        if current in seasons:
+            schedules = await asyncio.gather(*(self.get_schedule(t) for t in tournaments))
+            for t, schedule in zip(tournaments, schedules):
+                parts[t].append(self._matches_in_range(schedule, start_strf, end_strf))
 
-        return matches
+        return self._join_parts(parts)
+
+    @staticmethod
+    def _join_parts(parts: Dict[TournamentEnum, List[pd.DataFrame]]) -> Dict[TournamentEnum, pd.DataFrame]:
+        return {
+            t: frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True) if frames else empty_match_frame()
+            for t, frames in parts.items()
+        }
+
+    def _matches_in_range(self, schedule: CachedSchedule, start_strf: str, end_strf: str) -> pd.DataFrame:
+        frame = schedule.ranges.get((start_strf, end_strf))
+        if frame is None:
+            frame = self.parse_matches_frame(schedule.frame, start_strf, end_strf)
+            schedule.ranges.set((start_strf, end_strf), frame)
+        return frame
+
+    async def ensure_stored(self, tournament: TournamentEnum, season: str) -> None:
+        """Downloads a completed season into the match store unless it is already there."""
+        assert self.match_store is not None
+        if await self.match_store.has_season(tournament, season):
+            return
+        schedule = await self.get_schedule(tournament, season)
+        await self.match_store.put_season(tournament, season, self.parse_matches_frame(schedule.frame, "0000-00-00", "9999-99-99"))
+
+    async def get_schedule(self, tournament: TournamentEnum, season: Optional[str] = None) -> CachedSchedule:
+        """Returns the cached schedule of a tournament season, downloading it once for concurrent callers."""
+        key = (tournament, season)
+        schedule = self.schedules.get(key)
+        if schedule is not None:
+            return schedule
+        return await self.inflight.do(key, lambda: self._download_schedule(tournament, season))
+
+    @timed("download", "fbref")
+    async def _download_schedule(self, tournament: TournamentEnum, season: Optional[str]) -> CachedSchedule:
+        # Use the shared pooled client when there is one, else a client for this download only
+        async with nullcontext(self.http_client) if self.http_client is not None else httpx.AsyncClient() as client:
+            response = await client.get(
+                self.schedule_url(tournament, season),
+                headers={"User-Agent": self.config.user_agent},
+                timeout=self.config.timeout,
+                follow_redirects=True,
+            )
+            response.raise_for_status()
+        FETCHED_BYTES.labels("fbref").inc(len(response.content))
+        with track("parse", "fbref_schedule"):
+            if self.executors is not None:
+                frame = await self.executors.run_cpu(read_schedule_table, response.text)
+            else:
+                frame = read_schedule_table(response.text)
+        return self._cache_schedule(tournament, season, frame, keep_completed=self.match_store is None)
+
+    def _cache_schedule(
+        self, tournament: TournamentEnum, season: Optional[str], frame: pd.DataFrame, keep_completed: bool
+    ) -> CachedSchedule:
+        schedule = CachedSchedule(frame, self.config.max_cached_ranges)
+        if season is None:
+            self.schedules.set((tournament, season), schedule, ttl=self.schedule_ttl(frame))
+        elif keep_completed:
+            # Completed seasons never change
+            self.schedules.set((tournament, season), schedule)
+        return schedule
+
+    def get_matches(
+        self,
+        tournaments: List[TournamentEnum],
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+    ) -> Dict[TournamentEnum, List[Match]]:
+        """Blocking `aget_matches`, safe to call from inside an event loop as well.
+
+        Schedules are downloaded one after another with a blocking client and
+        kept in the same in-memory cache as the async path; the match store is
+        only used by the async path, so completed seasons are cached in memory.
+        """
+        now = datetime.datetime.now()
+        if start_date is None:
+            start_date = now
+        if end_date is None:
+            end_date = now
+        start_strf = start_date.strftime("%Y-%m-%d")
+        end_strf = end_date.strftime("%Y-%m-%d")
+
+        current = self.season_of(now)
+        parts: Dict[TournamentEnum, List[pd.DataFrame]] = {t: [] for t in tournaments}
+        with httpx.Client() as client:
+            for season in self.seasons_between(start_date, end_date):
+                if season > current:
+                    continue
+                for t in tournaments:
+                    key = (t, None if season == current else season)
+                    schedule = self.schedules.get(key)
+                    if schedule is None:
+                        schedule = self._download_schedule_sync(client, *key)
+                    parts[t].append(self._matches_in_range(schedule, start_strf, end_strf))
+        return {t: self.matches_from_frame(frame) for t, frame in self._join_parts(parts).items()}
+
+    def _download_schedule_sync(self, client: httpx.Client, tournament: TournamentEnum, season: Optional[str]) -> CachedSchedule:
+        response = client.get(
+            self.schedule_url(tournament, season),
+            headers={"User-Agent": self.config.user_agent},
+            timeout=self.config.timeout,
+            follow_redirects=True,
+        )
+        response.raise_for_status()
+        FETCHED_BYTES.labels("fbref").inc(len(response.content))
+        with track("parse", "fbref_schedule"):
+            frame = read_schedule_table(response.text)
+        return self._cache_schedule(tournament, season, frame, keep_completed=True)
 
     @staticmethod
     def parse_matches(
         matches_df: pd.DataFrame, start_strf: str, end_strf: str
     ) -> List[Match]:
-        matches_df = matches_df[
+        return FbrefFetcher.matches_from_frame(
+            FbrefFetcher.parse_matches_frame(matches_df, start_strf, end_strf)
+        )
+
+    @staticmethod
+    def parse_matches_frame(
+        matches_df: pd.DataFrame, start_strf: str, end_strf: str
+    ) -> pd.DataFrame:
+        """Parses the rows of a schedule table between two dates into a typed frame with `MATCH_COLUMNS`.
+
+        Whole columns are parsed at once. Rows without a parseable date and
+        time (spacer rows, matches not scheduled yet) are dropped.
+        """
+        rows = matches_df[
             (matches_df["Date"] >= start_strf) & (matches_df["Date"] <= end_strf)
         ]
-        matches: List[Match] = []
-        for m in matches_df.to_dict("records"):
-            match = Match(
-                week=int(m["Wk"]),
-                date_time=datetime.datetime.strptime(
-                    m["Date"] + " " + m["Time"], "%Y-%m-%d %H:%M"
-                ),
-                home=Team(name=m["Home"]),
-                away=Team(name=m["Away"]),
-                score=Score.from_str(m["Score"]) if not pd.isna(m["Score"]) else None,
-                home_xg=float(m["xG"]) if not pd.isna(m["xG"]) else None,
-                away_xg=float(m["xG.1"]) if not pd.isna(m["xG.1"]) else None,
+        if rows.empty:
+            return empty_match_frame()
+        date_time = pd.to_datetime(
+            rows["Date"].astype("string") + " " + rows["Time"].astype("string"),
+            format="%Y-%m-%d %H:%M",
+            errors="coerce",
+        )
+        goals = rows["Score"].astype("string").str.split("–", n=1, expand=True).reindex(columns=[0, 1])
+        frame = pd.DataFrame({
+            "week": pd.to_numeric(rows["Wk"], errors="coerce").astype("Int64"),
+            "date_time": date_time,
+            "home": rows["Home"].astype(object),
+            "away": rows["Away"].astype(object),
+            "home_goals": pd.to_numeric(goals[0].str.strip(), errors="coerce").astype("Int64"),
+            "away_goals": pd.to_numeric(goals[1].str.strip(), errors="coerce").astype("Int64"),
+            "home_xg": pd.to_numeric(rows["xG"], errors="coerce").astype(float),
+            "away_xg": pd.to_numeric(rows["xG.1"], errors="coerce").astype(float),
+        })
+        return frame[frame["date_time"].notna() & frame["week"].notna()].reset_index(drop=True)
+
+    @staticmethod
+    def matches_from_frame(frame: pd.DataFrame) -> List[Match]:
+        """Builds `Match` models from a typed match frame, validating all rows in one call."""
+        def column(name: str) -> List[Any]:
+            values = frame[name]
+            return values.astype(object).where(values.notna(), None).tolist()
+
+        records = [
+            {
+                "week": week,
+                "date_time": date_time,
+                "home": {"name": home},
+                "away": {"name": away},
+                "score": {"home": home_goals, "away": away_goals} if home_goals is not None and away_goals is not None else None,
+                "home_xg": home_xg,
+                "away_xg": away_xg,
+            }
+            for week, date_time, home, away, home_goals, away_goals, home_xg, away_xg in zip(
+                column("week"), frame["date_time"].dt.to_pydatetime().tolist(), column("home"), column("away"),
+                column("home_goals"), column("away_goals"), column("home_xg"), column("away_xg"),
             )
-            matches.append(match)
-        return matches
+        ]
+        return MATCH_LIST.validate_python(records)
 
 
 
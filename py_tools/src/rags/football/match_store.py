@@ -0,0 +1,142 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+import pandas as pd
+
+from src.rags.executors import Executors
+from src.rags.football.config import MatchStoreConfig
+from src.rags.football.fbref import FbrefFetcher, Match, TournamentEnum, empty_match_frame
+
+T = TypeVar("T")
+
+
+class MatchStore:
+    """SQLite store of the matches of completed seasons.
+
+    Matches are indexed by tournament and date, so date-range queries across
+    seasons and tournaments are answered by the index instead of downloads. A
+    season is marked stored only after all its matches are written, in the same
+    transaction.
+    """
+
+    def __init__(self, config: MatchStoreConfig, executors: Optional[Executors] = None):
+        self.config = config
+        self.executors = executors
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    async def has_season(self, tournament: TournamentEnum, season: str) -> bool:
+        return await self._run_io(self._has_season, tournament, season)
+
+    async def put_season(self, tournament: TournamentEnum, season: str, matches: pd.DataFrame) -> None:
+        """Replaces the matches of a season, a typed match frame, and marks it stored."""
+        await self._run_io(self._put_season, tournament, season, matches)
+
+    async def query(self, tournaments: List[TournamentEnum], start_date: str, end_date: str) -> Dict[TournamentEnum, List[Match]]:
+        """Returns the stored matches of the tournaments between two inclusive YYYY-MM-DD dates."""
+        frames = await self.query_frames(tournaments, start_date, end_date)
+        return {t: FbrefFetcher.matches_from_frame(frame) for t, frame in frames.items()}
+
+    async def query_frames(self, tournaments: List[TournamentEnum], start_date: str, end_date: str) -> Dict[TournamentEnum, pd.DataFrame]:
+        """Same as `query`, as typed match frames."""
+        return await self._run_io(self._query, tournaments, start_date, end_date)
+
+    async def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    async def _run_io(self, fn: Callable[..., T], *args: Any) -> T:
+        """Runs a blocking SQLite call on the shared I/O pool, else on a default thread."""
+        if self.executors is None:
+            return await asyncio.to_thread(fn, *args)
+        return await self.executors.run_io(fn, *args)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.config.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.config.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS matches (
+                    tournament INTEGER NOT NULL,
+                    season TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    time TEXT NOT NULL,
+                    week INTEGER NOT NULL,
+                    home TEXT NOT NULL,
+                    away TEXT NOT NULL,
+                    home_goals INTEGER,
+                    away_goals INTEGER,
+                    home_xg REAL,
+                    away_xg REAL
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS matches_tournament_date ON matches (tournament, date)")
+            conn.execute("CREATE INDEX IF NOT EXISTS matches_tournament_season ON matches (tournament, season)")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS seasons (
+                    tournament INTEGER NOT NULL,
+                    season TEXT NOT NULL,
+                    stored_at REAL NOT NULL,
+                    PRIMARY KEY (tournament, season)
+                )"""
+            )
+            self._conn = conn
+        return self._conn
+
+    def _has_season(self, tournament: TournamentEnum, season: str) -> bool:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT 1 FROM seasons WHERE tournament = ? AND season = ?", (tournament.value, season)
+            ).fetchone()
+        return row is not None
+
+    def _put_season(self, tournament: TournamentEnum, season: str, matches: pd.DataFrame) -> None:
+        columns = ["week", "home", "away", "home_goals", "away_goals", "home_xg", "away_xg"]
+        values = matches[columns].astype(object).where(matches[columns].notna(), None)
+        rows = list(zip(
+            [tournament.value] * len(matches), [season] * len(matches),
+            matches["date_time"].dt.strftime("%Y-%m-%d"), matches["date_time"].dt.strftime("%H:%M"),
+            *(values[column].tolist() for column in columns),
+        ))
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM matches WHERE tournament = ? AND season = ?", (tournament.value, season))
+                conn.executemany("INSERT INTO matches VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                conn.execute(
+                    "INSERT OR REPLACE INTO seasons VALUES (?, ?, ?)", (tournament.value, season, time.time())
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _query(self, tournaments: List[TournamentEnum], start_date: str, end_date: str) -> Dict[TournamentEnum, pd.DataFrame]:
+        placeholders = ", ".join("?" * len(tournaments))
+        with self._lock:
+            rows = self._connect().execute(
+                f"""SELECT tournament, date, time, week, home, away, home_goals, away_goals, home_xg, away_xg
+                FROM matches WHERE tournament IN ({placeholders}) AND date BETWEEN ? AND ?
+                ORDER BY date, time""",
+                (*(t.value for t in tournaments), start_date, end_date),
+            ).fetchall()
+        frame = pd.DataFrame(rows, columns=[
+            "tournament", "date", "time", "week", "home", "away", "home_goals", "away_goals", "home_xg", "away_xg",
+        ])
+        frame["date_time"] = pd.to_datetime(frame["date"] + " " + frame["time"], format="%Y-%m-%d %H:%M")
+        typed = empty_match_frame()
+        return {
+            t: frame.loc[frame["tournament"] == t.value, list(typed.columns)].astype(typed.dtypes.to_dict()).reset_index(drop=True)
+            for t in tournaments
+        }
@@ -0,0 +1,115 @@
+import re
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from lxml import etree  # type: ignore[import-untyped]
+
+# Raw schedule columns, named the way pd.read_html named them
+SCHEDULE_COLUMNS = ["Wk", "Date", "Time", "Home", "xG", "Score", "xG.1", "Away"]
+# fbref's data-stat attribute of each needed column
+DATA_STATS = {
+    "gameweek": "Wk",
+    "date": "Date",
+    "start_time": "Time",
+    "home_team": "Home",
+    "home_xg": "xG",
+    "score": "Score",
+    "away_xg": "xG.1",
+    "away_team": "Away",
+}
+SCHEDULE_TABLE = re.compile(r"""<table\b[^>]*\bid=["']?sched_""", re.IGNORECASE)
+SKIPPED_ROW_CLASSES = {"thead", "spacer", "over_header"}
+CHUNK_SIZE = 64 * 1024
+
+
+def _text(cell: etree._Element) -> str:
+    return " ".join("".join(cell.itertext()).split())
+
+
+def _time(cell: etree._Element) -> str:
+    # "20:00 (21:00)": the venue time, followed by the visitor's local time when rendered
+    for span in cell.iter("span"):
+        venue_time = span.get("data-venue-time")
+        if venue_time:
+            return str(venue_time)
+    text = _text(cell)
+    return text.split()[0] if text else ""
+
+
+def _header_keys(row: etree._Element) -> List[Optional[str]]:
+    """The schedule column of every header cell, from its data-stat or else its text."""
+    keys: List[Optional[str]] = []
+    seen_xg = False
+    for cell in row:
+        key = DATA_STATS.get(cell.get("data-stat", ""))
+        if key is None:
+            text = _text(cell)
+            if text == "xG":
+                key = "xG.1" if seen_xg else "xG"
+                seen_xg = True
+            elif text in SCHEDULE_COLUMNS:
+                key = text
+        keys.append(key)
+    return keys
+
+
+def read_schedule_table(html: str) -> pd.DataFrame:
+    """Extracts the schedule table out of an fbref schedule page.
+
+    The table is located by its id (`sched_...`) with a regex scan, and only
+    the HTML from there on is fed to lxml's pull parser, in chunks, until the
+    table ends. Only the schedule columns are kept, rows are dropped from the
+    tree as they are read, and the columns come out typed: floats for week and
+    xG, strings (NaN when empty) otherwise. Header rows repeated inside the
+    table and spacer rows are skipped.
+    """
+    match = SCHEDULE_TABLE.search(html)
+    if match is None:
+        raise ValueError("No schedule table found")
+    parser = etree.HTMLPullParser(events=("end",), tag=("table", "tr"))
+    columns: Dict[str, List[Optional[str]]] = {name: [] for name in SCHEDULE_COLUMNS}
+    header: List[Optional[str]] = []
+    done = False
+
+    for start in range(match.start(), len(html), CHUNK_SIZE):
+        parser.feed(html[start:start + CHUNK_SIZE])
+        for _, element in parser.read_events():
+            if element.tag == "table":
+                done = True
+                break
+            if element.getparent() is not None and element.getparent().tag == "thead":
+                header = _header_keys(element)
+            elif not SKIPPED_ROW_CLASSES.intersection((element.get("class") or "").split()):
+                values: Dict[str, str] = {}
+                for i, cell in enumerate(element):
+                    key = DATA_STATS.get(cell.get("data-stat", "")) or (header[i] if i < len(header) else None)
+                    if key is not None:
+                        values[key] = _time(cell) if key == "Time" else _text(cell)
+                if values:
+                    for name in SCHEDULE_COLUMNS:
+                        columns[name].append(values.get(name) or None)
+            # Rows are not needed once read
+            element.clear()
+            parent = element.getparent()
+            while parent is not None and element.getprevious() is not None:
+                del parent[0]
+        if done:
+            break
+
+    def strings(name: str) -> np.ndarray:
+        return np.array([np.nan if value is None else value for value in columns[name]], dtype=object)
+
+    def floats(name: str) -> np.ndarray:
+        return pd.to_numeric(pd.Series(strings(name)), errors="coerce").to_numpy(dtype=float)
+
+    return pd.DataFrame({
+        "Wk": floats("Wk"),
+        "Date": strings("Date"),
+        "Time": strings("Time"),
+        "Home": strings("Home"),
+        "xG": floats("xG"),
+        "Score": strings("Score"),
+        "xG.1": floats("xG.1"),
+        "Away": strings("Away"),
+    })
@@ -1,3 +1,15 @@
+import asyncio
+import datetime
+from typing import Any, List, Tuple
+from unittest.mock import patch
+
+import httpx
+import numpy as np
+import pandas as pd
+import pytest
+from src.rags.football.config import FbrefConfig
+from src.rags.football.fbref import FbrefFetcher, Match, Score, Team, TournamentEnum, match_columns
+
 # from src.rags.football.fbref import FbrefFetcher, TournamentEnum
 
 # def test_fetcher():
@@ -9,4 +21,105 @@
 #     assert list(matches.keys())[0] == TournamentEnum.La_Liga
 #     assert len(matches[TournamentEnum.La_Liga]) > 0
 
-#     print(matches)
\ No newline at end of file
+#     print(matches)
+
+
+def schedule_html(rows: List[Tuple[Any, ...]]) -> str:
+    header = "<tr><th>Wk</th><th>Day</th><th>Date</th><th>Time</th><th>Home</th><th>xG</th><th>Score</th><th>xG</th><th>Away</th></tr>"
+    body = "".join(
+        f"<tr><td>{wk}</td><td>Sat</td><td>{date}</td><td>{time}</td><td>{home}</td>"
+        f"<td>{hxg}</td><td>{score}</td><td>{axg}</td><td>{away}</td></tr>"
+        for wk, date, time, home, hxg, score, axg, away in rows
+    )
+    return f"<html><body><table id='sched_all'><thead>{header}</thead><tbody>{body}</tbody></table></body></html>"
+
+def make_fetcher(today: str, requests: List[str]) -> FbrefFetcher:
+    rows = [
+        (1, today, "20:00", "Arsenal", "1.2", "2–1", "0.8", "Chelsea"),
+        (2, "2999-01-01", "15:00", "Chelsea", "", "", "", "Arsenal"),
+    ]
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(str(request.url))
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, text=schedule_html(rows))
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return FbrefFetcher(FbrefConfig(), http_client=client)
+
+@pytest.mark.asyncio
+async def test_aget_matches_downloads_concurrently_and_caches() -> None:
+    now = datetime.datetime.now()
+    requests: List[str] = []
+    fetcher = make_fetcher(now.strftime("%Y-%m-%d"), requests)
+    tournaments = [TournamentEnum.La_Liga, TournamentEnum.Premier_League]
+    results = await asyncio.gather(*(fetcher.aget_matches(tournaments, start_date=now) for _ in range(3)))
+    assert sorted(requests) == sorted(fetcher.schedule_url(t) for t in tournaments)
+    for matches in results:
+        assert [m.home.name for m in matches[TournamentEnum.La_Liga]] == ["Arsenal"]
+        score = matches[TournamentEnum.Premier_League][0].score
+        assert score is not None and score.home == 2
+        assert matches[TournamentEnum.Premier_League][0].away_xg == 0.8
+
+    await fetcher.aget_matches([TournamentEnum.La_Liga], start_date=now)
+    assert len(requests) == 2
+
+@pytest.mark.asyncio
+async def test_get_matches_blocks_without_needing_a_free_event_loop() -> None:
+    now = datetime.datetime.now()
+    requests: List[str] = []
+    rows = [(1, now.strftime("%Y-%m-%d"), "20:00", "Arsenal", "1.2", "2–1", "0.8", "Chelsea")]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(str(request.url))
+        return httpx.Response(200, text=schedule_html(rows))
+
+    blocking_client = httpx.Client
+    fetcher = FbrefFetcher(FbrefConfig())
+    with patch("httpx.Client", lambda: blocking_client(transport=httpx.MockTransport(handler))):
+        # Called from a coroutine, where a nested asyncio.run would fail
+        matches = fetcher.get_matches([TournamentEnum.La_Liga], start_date=now)
+        fetcher.get_matches([TournamentEnum.La_Liga], start_date=now)
+    assert [m.home.name for m in matches[TournamentEnum.La_Liga]] == ["Arsenal"]
+    assert requests == [fetcher.schedule_url(TournamentEnum.La_Liga)]
+
+def test_schedule_ttl_is_short_on_match_days() -> None:
+    fetcher = FbrefFetcher(FbrefConfig(match_day_ttl=300, ttl=6 * 3600))
+    now = datetime.datetime(2025, 3, 1, 12, 0)
+    match_day = pd.DataFrame({"Date": ["2025-02-22", "2025-03-01", "2025-03-08"]})
+    assert fetcher.schedule_ttl(match_day, now) == 300
+    evening_before = pd.DataFrame({"Date": ["2025-02-22", "2025-03-02"]})
+    assert fetcher.schedule_ttl(evening_before, datetime.datetime(2025, 3, 1, 22, 0)) == 2 * 3600
+    assert fetcher.schedule_ttl(pd.DataFrame({"Date": ["2025-02-22"]}), now) == 6 * 3600
+
+def test_parse_matches_frame_is_typed_and_drops_unscheduled_rows() -> None:
+    raw = pd.DataFrame({
+        "Wk": [1, np.nan, 1, 2, 3],
+        "Day": ["Sat", np.nan, "Sun", "Sat", "Sat"],
+        "Date": ["2024-08-17", np.nan, "2024-08-18", "2024-08-24", "2024-08-31"],
+        "Time": ["20:00", np.nan, "16:30", "15:00", np.nan],
+        "Home": ["Arsenal", np.nan, "Chelsea", "Wolves", "Everton"],
+        "xG": [1.2, np.nan, 0.4, np.nan, np.nan],
+        "Score": ["2–1", np.nan, "0–0", np.nan, np.nan],
+        "xG.1": [0.8, np.nan, 1.1, np.nan, np.nan],
+        "Away": ["Chelsea", np.nan, "Arsenal", "Everton", "Wolves"],
+    })
+    frame = FbrefFetcher.parse_matches_frame(raw, "2024-08-01", "2024-08-31")
+    assert frame["week"].tolist() == [1, 1, 2]
+    assert str(frame["home_goals"].dtype) == "Int64"
+    assert frame["home_goals"].isna().tolist() == [False, False, True]
+
+    matches = FbrefFetcher.parse_matches(raw, "2024-08-01", "2024-08-31")
+    assert matches[0] == Match(
+        week=1,
+        date_time=datetime.datetime(2024, 8, 17, 20, 0),
+        home=Team(name="Arsenal"),
+        away=Team(name="Chelsea"),
+        score=Score(home=2, away=1),
+        home_xg=1.2,
+        away_xg=0.8,
+    )
+    assert matches[2].score is None and matches[2].home_xg is None
+    assert match_columns(frame)["date_time"][1] == "2024-08-18T16:30:00"
+    assert match_columns(frame)["away_goals"] == [1, 0, None]
+    assert FbrefFetcher.parse_matches(raw, "2025-01-01", "2025-01-31") == []
@@ -0,0 +1,83 @@
+import datetime
+import re
+from pathlib import Path
+from typing import Any, List, Tuple
+
+import httpx
+import pandas as pd
+import pytest
+from src.rags.executors import ExecutorConfig, Executors
+from src.rags.football.config import FbrefConfig, MatchStoreConfig
+from src.rags.football.fbref import FbrefFetcher, Score, TournamentEnum
+from src.rags.football.match_store import MatchStore
+from src.rags.football.test_fbref import schedule_html
+
+def match_frame(rows: List[Tuple[Any, ...]]) -> pd.DataFrame:
+    raw = pd.DataFrame(rows, columns=["Wk", "Date", "Time", "Home", "xG", "Score", "xG.1", "Away"])
+    return FbrefFetcher.parse_matches_frame(raw, "0000-00-00", "9999-99-99")
+
+@pytest.fixture
+def store(tmp_path: Path) -> MatchStore:
+    return MatchStore(MatchStoreConfig(path=str(tmp_path / "matches.sqlite3")))
+
+@pytest.mark.asyncio
+async def test_put_and_query_season(store: MatchStore) -> None:
+    assert not await store.has_season(TournamentEnum.La_Liga, "2022-2023")
+    await store.put_season(TournamentEnum.La_Liga, "2022-2023", match_frame([
+        (18, "2023-01-08", "21:00", "Barcelona", 1.4, "1–0", None, "Atletico"),
+        (3, "2022-09-03", "16:15", "Sevilla", None, None, None, "Barcelona"),
+    ]))
+    assert await store.has_season(TournamentEnum.La_Liga, "2022-2023")
+    matches = await store.query([TournamentEnum.La_Liga, TournamentEnum.Serie_A], "2022-09-01", "2023-01-08")
+    assert [m.home.name for m in matches[TournamentEnum.La_Liga]] == ["Sevilla", "Barcelona"]
+    assert matches[TournamentEnum.La_Liga][1].score == Score(home=1, away=0)
+    assert matches[TournamentEnum.La_Liga][0].score is None
+    assert matches[TournamentEnum.La_Liga][1].home_xg == 1.4
+    assert matches[TournamentEnum.Serie_A] == []
+    frames = await store.query_frames([TournamentEnum.La_Liga], "2022-09-01", "2022-09-30")
+    assert frames[TournamentEnum.La_Liga]["week"].tolist() == [3]
+    await store.close()
+
+@pytest.mark.asyncio
+async def test_store_runs_on_shared_io_pool(tmp_path: Path) -> None:
+    executors = Executors(ExecutorConfig(cpu_workers=0, loop_lag_interval=0))
+    store = MatchStore(MatchStoreConfig(path=str(tmp_path / "matches.sqlite3")), executors=executors)
+    assert not await store.has_season(TournamentEnum.La_Liga, "2022-2023")
+    assert executors.stats()["pools"]["io"]["completed"] == 1
+    await store.close()
+    await executors.close()
+
+@pytest.mark.asyncio
+async def test_completed_seasons_are_downloaded_once(store: MatchStore) -> None:
+    requests: List[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(str(request.url))
+        season = re.search(r"/(\d{4})-(\d{4})/", request.url.path)
+        assert season is not None, request.url
+        year = int(season.group(1))
+        rows = [
+            (1, f"{year}-09-01", "16:00", f"Home {year}", "1.0", "1–0", "0.5", "Away"),
+            (30, f"{year + 1}-04-01", "16:00", f"Home {year + 1}", "2.0", "3–3", "2.5", "Away"),
+        ]
+        return httpx.Response(200, text=schedule_html(rows))
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    fetcher = FbrefFetcher(FbrefConfig(), http_client=client, match_store=store)
+    tournaments = [TournamentEnum.La_Liga, TournamentEnum.Serie_A]
+    start, end = datetime.datetime(2020, 10, 1), datetime.datetime(2022, 3, 31)
+    matches = await fetcher.aget_matches(tournaments, start_date=start, end_date=end)
+    assert [m.home.name for m in matches[TournamentEnum.La_Liga]] == ["Home 2021", "Home 2021"]
+    assert sorted(requests) == sorted(
+        fetcher.schedule_url(t, season) for t in tournaments for season in ("2020-2021", "2021-2022")
+    )
+
+    again = await fetcher.aget_matches(tournaments, start_date=start, end_date=end)
+    assert again == matches
+    assert len(requests) == 4
+
+def test_season_of() -> None:
+    fetcher = FbrefFetcher(FbrefConfig())
+    assert fetcher.season_of(datetime.datetime(2023, 8, 1)) == "2023-2024"
+    assert fetcher.season_of(datetime.datetime(2024, 7, 31)) == "2023-2024"
+    assert fetcher.seasons_between(datetime.datetime(2021, 1, 1), datetime.datetime(2023, 9, 1)) == ["2020-2021", "2021-2022", "2022-2023", "2023-2024"]
@@ -0,0 +1,44 @@
+import io
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from src.rags.football.fbref import FbrefFetcher
+from src.rags.football.schedule_table import SCHEDULE_COLUMNS, read_schedule_table
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+def load_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+def test_reads_schedule_table_by_id() -> None:
+    frame = read_schedule_table(load_fixture("sched_2023-2024_9_1.html"))
+    assert list(frame.columns) == SCHEDULE_COLUMNS
+    # 6 weeks of 2 matches; repeated header rows and spacer rows are skipped
+    assert len(frame) == 12
+    assert frame["Wk"].dtype == np.float64 and frame["xG"].dtype == np.float64
+    assert list(frame.loc[0, ["Date", "Time", "Home", "Score", "Away"]]) == ["2023-08-12", "20:00", "Everton", "3–2", "Luton Town"]
+    unplayed = frame[frame["Wk"] >= 5]
+    assert unplayed["Score"].isna().all() and unplayed["xG"].isna().all() and unplayed["xG.1"].isna().all()
+
+def test_matches_read_html_of_the_schedule_table() -> None:
+    html = load_fixture("sched_2023-2024_9_1.html")
+    # The first table on the page is not the schedule
+    assert "Wk" not in pd.read_html(io.StringIO(html))[0].columns
+    reference = pd.read_html(io.StringIO(html), attrs={"id": "sched_2023-2024_9_1"})[0]
+    reference["Time"] = reference["Time"].str.split().str[0]
+    expected = FbrefFetcher.parse_matches_frame(reference, "0000-00-00", "9999-99-99")
+    actual = FbrefFetcher.parse_matches_frame(read_schedule_table(html), "0000-00-00", "9999-99-99")
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+def test_schedule_without_xg_columns() -> None:
+    frame = read_schedule_table(load_fixture("sched_2017-2018_70_1.html"))
+    assert len(frame) == 8
+    assert frame["xG"].isna().all()
+    matches = FbrefFetcher.parse_matches(frame, "0000-00-00", "9999-99-99")
+    assert len(matches) == 8 and matches[0].score is not None and matches[0].home_xg is None
+
+def test_page_without_schedule_table() -> None:
+    with pytest.raises(ValueError):
+        read_schedule_table("<html><body><table id='stats'><tr><td>1</td></tr></table></body></html>")
@@ -0,0 +1,217 @@
+import asyncio
+import importlib.util
+import ipaddress
+import socket
+import time
+import typing
+from contextlib import contextmanager
+from typing import AsyncIterable, AsyncIterator, Dict, Iterator, Optional, Tuple
+
+import httpcore
+import httpx
+from pydantic import BaseModel, Field
+
+
+class HttpClientConfig(BaseModel):
+    """Connection pool settings of the shared HTTP clients."""
+    max_connections: int = Field(default=100, description="Maximum open connections per client.", ge=1)
+    max_keepalive_connections: int = Field(default=20, description="Maximum idle connections kept alive per client.", ge=0)
+    keepalive_expiry: float = Field(default=30.0, description="Seconds an idle connection is kept alive.", ge=0)
+    http2: bool = Field(default=True, description="Negotiate HTTP/2 with servers that offer it (needs the h2 package).")
+    dns_cache_ttl: float = Field(default=300.0, description="Seconds a resolved host address is reused.", ge=0)
+    timeout: float = Field(default=10.0, description="Default request timeout in seconds.", gt=0)
+
+
+class ClientStats(BaseModel):
+    """Connection reuse numbers of one shared client."""
+    requests: int = 0
+    connections_opened: int = 0
+    dns_lookups: int = 0
+    dns_cache_hits: int = 0
+
+    @property
+    def reuse_ratio(self) -> float:
+        """Fraction of requests that were served on an already open connection."""
+        if not self.requests:
+            return 0.0
+        return max(self.requests - self.connections_opened, 0) / self.requests
+
+
+class CachingDNSBackend(httpcore.AsyncNetworkBackend):
+    """Network backend that caches host resolution and counts opened connections.
+
+    The resolved address is only used to open the socket; TLS still uses the
+    original host name for SNI and certificate checks.
+    """
+
+    def __init__(self, backend: httpcore.AsyncNetworkBackend, ttl: float, stats: ClientStats):
+        self._backend = backend
+        self._ttl = ttl
+        self._stats = stats
+        self._addresses: Dict[Tuple[str, int], Tuple[str, float]] = {}
+
+    async def _resolve(self, host: str, port: int) -> str:
+        try:
+            ipaddress.ip_address(host)
+            return host
+        except ValueError:
+            pass
+        now = time.monotonic()
+        cached = self._addresses.get((host, port))
+        if cached is not None and cached[1] > now:
+            self._stats.dns_cache_hits += 1
+            return cached[0]
+        self._stats.dns_lookups += 1
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        address = str(infos[0][4][0])
+        self._addresses[(host, port)] = (address, now + self._ttl)
+        return address
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: Optional[float] = None,
+        local_address: Optional[str] = None,
+        socket_options: Optional[typing.Iterable[httpcore.SOCKET_OPTION]] = None,
+    ) -> httpcore.AsyncNetworkStream:
+        address = await self._resolve(host, port)
+        self._stats.connections_opened += 1
+        try:
+            return await self._backend.connect_tcp(address, port, timeout, local_address, socket_options)
+        except Exception:
+            # The cached address may have gone stale
+            self._addresses.pop((host, port), None)
+            raise
+
+    async def connect_unix_socket(
+        self,
+        path: str,
+        timeout: Optional[float] = None,
+        socket_options: Optional[typing.Iterable[httpcore.SOCKET_OPTION]] = None,
+    ) -> httpcore.AsyncNetworkStream:
+        return await self._backend.connect_unix_socket(path, timeout, socket_options)
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+@contextmanager
+def _httpx_errors() -> Iterator[None]:
+    """Re-raises httpcore transport errors as the httpx errors of the same name, as httpx's own transport does."""
+    try:
+        yield
+    except Exception as exc:
+        mapped = getattr(httpx, type(exc).__name__, None) if type(exc).__module__.startswith("httpcore") else None
+        if not (isinstance(mapped, type) and issubclass(mapped, httpx.TransportError)):
+            raise
+        raise mapped(str(exc)) from exc
+
+
+class _ResponseStream(httpx.AsyncByteStream):
+    def __init__(self, stream: AsyncIterable[bytes]):
+        self._stream = stream
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        with _httpx_errors():
+            async for part in self._stream:
+                yield part
+
+    async def aclose(self) -> None:
+        aclose = getattr(self._stream, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+class PooledTransport(httpx.AsyncBaseTransport):
+    """httpx transport on top of an `httpcore.AsyncConnectionPool` built by the caller.
+
+    `httpx.AsyncHTTPTransport` creates its pool itself and offers no way to pick
+    the pool's network backend; this transport takes a ready pool instead, so the
+    backend is set through httpcore's public `network_backend` argument.
+    """
+
+    def __init__(self, pool: httpcore.AsyncConnectionPool):
+        self.pool = pool
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        assert isinstance(request.stream, httpx.AsyncByteStream)
+        core_request = httpcore.Request(
+            method=request.method,
+            url=httpcore.URL(
+                scheme=request.url.raw_scheme,
+                host=request.url.raw_host,
+                port=request.url.port,
+                target=request.url.raw_path,
+            ),
+            headers=request.headers.raw,
+            content=request.stream,
+            extensions=request.extensions,
+        )
+        with _httpx_errors():
+            response = await self.pool.handle_async_request(core_request)
+        assert isinstance(response.stream, AsyncIterable)
+        return httpx.Response(
+            status_code=response.status,
+            headers=response.headers,
+            stream=_ResponseStream(response.stream),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self.pool.aclose()
+
+
+class HttpClientRegistry:
+    """App-wide registry of pooled `httpx.AsyncClient`s, one per named upstream.
+
+    Clients keep connections alive between requests, negotiate HTTP/2 when the
+    server offers it and cache DNS. The registry is started and closed in the app
+    lifespan; components are handed a client instead of creating their own.
+    """
+
+    def __init__(self, config: HttpClientConfig):
+        self.config = config
+        self.http2 = config.http2 and importlib.util.find_spec("h2") is not None
+        if config.http2 and not self.http2:
+            print("h2 is not installed, shared HTTP clients fall back to HTTP/1.1")
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._stats: Dict[str, ClientStats] = {}
+
+    def get(self, name: str = "default") -> httpx.AsyncClient:
+        """Returns the shared client for `name`, creating it on first use."""
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._create(name)
+            self._clients[name] = client
+        return client
+
+    async def close(self) -> None:
+        clients, self._clients = self._clients, {}
+        await asyncio.gather(*(client.aclose() for client in clients.values()))
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            name: {**stats.model_dump(), "reuse_ratio": stats.reuse_ratio}
+            for name, stats in self._stats.items()
+        }
+
+    def _create(self, name: str) -> httpx.AsyncClient:
+        stats = self._stats.setdefault(name, ClientStats())
+        transport = PooledTransport(httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(),
+            max_connections=self.config.max_connections,
+            max_keepalive_connections=self.config.max_keepalive_connections,
+            keepalive_expiry=self.config.keepalive_expiry,
+            http2=self.http2,
+            network_backend=CachingDNSBackend(httpcore.AnyIOBackend(), self.config.dns_cache_ttl, stats),
+        ))
+
+        async def count_request(request: httpx.Request) -> None:
+            stats.requests += 1
+
+        return httpx.AsyncClient(
+            transport=transport,
+            timeout=self.config.timeout,
+            event_hooks={"request": [count_request]},
+        )
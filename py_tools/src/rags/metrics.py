@@ -0,0 +1,247 @@
+"""In-process metrics in the Prometheus text format.
+
+Counters, gauges and histograms with labels, cheap enough to leave on: an
+update is a dict lookup of the label values plus an addition, and histogram
+buckets are found with a bisect. Metrics are updated from the event loop
+thread; work running in executor processes is timed at its call site.
+Gauges and counters can also be backed by a function read at scrape time,
+which exposes numbers other components already keep, such as cache hits.
+"""
+import bisect
+import functools
+import inspect
+import math
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+from src.rags.tracing import span
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class _Value:
+    """One labelled series of a counter or gauge."""
+
+    def __init__(self) -> None:
+        self.value = 0.0
+        self.function: Optional[Callable[[], float]] = None
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Reads the value from `function` at scrape time instead."""
+        self.function = function
+
+    def get(self) -> float:
+        return float(self.function()) if self.function is not None else self.value
+
+
+class _HistogramValue:
+    """One labelled series of a histogram."""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), registry: Optional["Registry"] = None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[Tuple[str, ...], Any] = {}
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def labels(self, *values: str, **kwargs: str) -> Any:
+        """The series of one combination of label values, created on first use."""
+        key = values if values else tuple(kwargs[name] for name in self.labelnames)
+        series = self._series.get(key)
+        if series is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}, got {key}")
+            series = self._series[key] = self._new_series()
+        return series
+
+    def _new_series(self) -> Any:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for key, series in list(self._series.items()):
+            lines.extend(self._render_series(_format_labels(self.labelnames, key), key, series))
+        return lines
+
+    def _render_series(self, labels: str, key: Tuple[str, ...], series: Any) -> List[str]:
+        return [f"{self.name}{labels} {_format_value(series.get())}"]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _new_series(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def _new_series(self) -> _Value:
+        return _Value()
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS, registry: Optional["Registry"] = None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames, registry)
+
+    def _new_series(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _render_series(self, labels: str, key: Tuple[str, ...], series: _HistogramValue) -> List[str]:
+        lines = []
+        cumulative = 0
+        names = self.labelnames + ("le",)
+        for bound, count in zip(self.buckets + (math.inf,), series.counts):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{_format_labels(names, key + (_format_value(bound),))} {cumulative}")
+        lines.append(f"{self.name}_sum{labels} {_format_value(series.sum)}")
+        lines.append(f"{self.name}_count{labels} {series.count}")
+        return lines
+
+
+class Registry:
+    """The metrics exposed on one `/metrics` endpoint."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                # A failing scrape-time function must not hide every other metric
+                lines.append(f"# {metric.name} failed: {_escape(str(e))}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = Histogram("rag_stage_duration_seconds", "Latency of pipeline stages.", ["stage", "kind"])
+STAGE_ERRORS = Counter("rag_stage_errors_total", "Pipeline stage calls that raised.", ["stage", "kind"])
+STAGE_IN_FLIGHT = Gauge("rag_stage_in_flight", "Pipeline stage calls currently running.", ["stage", "kind"])
+FETCH_RESULTS = Counter("rag_fetch_results_total", "Page fetches by fetcher kind and final result status.", ["kind", "status"])
+FETCHED_BYTES = Counter("rag_fetched_bytes_total", "Response body bytes downloaded.", ["source"])
+CACHE_REQUESTS = Counter("rag_cache_requests_total", "Cache lookups by cache and outcome.", ["cache", "outcome"])
+CACHE_HIT_RATIO = Gauge("rag_cache_hit_ratio", "Fraction of cache lookups that were hits since start.", ["cache"])
+HTTP_REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Latency of API requests.", ["route", "method", "status"])
+
+
+@contextmanager
+def track(stage: str, kind: str = "") -> Iterator[None]:
+    """Times a pipeline stage, counting calls in flight and calls that raise, and traces it as a span."""
+    in_flight = STAGE_IN_FLIGHT.labels(stage, kind)
+    in_flight.inc()
+    start = time.perf_counter()
+    try:
+        with span(stage, kind=kind):
+            yield
+    except Exception:
+        STAGE_ERRORS.labels(stage, kind).inc()
+        raise
+    finally:
+        in_flight.dec()
+        STAGE_SECONDS.labels(stage, kind).observe(time.perf_counter() - start)
+
+
+def timed(stage: str, kind: str = "") -> Callable[[F], F]:
+    """Decorator form of `track` for sync and async functions."""
+    def decorator(fn: F) -> F:
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with track(stage, kind):
+                    return await fn(*args, **kwargs)
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with track(stage, kind):
+                return fn(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return decorator
+
+
+def expose_cache(name: str, hits: Callable[[], float], misses: Callable[[], float]) -> None:
+    """Exposes the hit and miss counts a cache already keeps, read at scrape time."""
+    CACHE_REQUESTS.labels(name, "hit").set_function(hits)
+    CACHE_REQUESTS.labels(name, "miss").set_function(misses)
+
+    def ratio() -> float:
+        lookups = hits() + misses()
+        return hits() / lookups if lookups else 0.0
+
+    CACHE_HIT_RATIO.labels(name).set_function(ratio)
@@ -0,0 +1,57 @@
+"""Sampling profiler for the live process.
+
+Every `interval` seconds the stacks of all threads are read with
+`sys._current_frames()` and counted, so nothing is instrumented and the
+profiled code runs at full speed between samples. The result is in the
+collapsed-stack format (`frame;frame;frame count` per line) that
+flamegraph.pl, speedscope and inferno read.
+"""
+import collections
+import os
+import sys
+import threading
+import time
+from types import FrameType
+from typing import Counter, Dict, List, Optional
+
+
+def _frame_name(code_filename: str, name: str, lineno: int) -> str:
+    # The function's first line, so samples anywhere in a function merge into one frame
+    return f"{name} ({os.path.basename(code_filename)}:{lineno})"
+
+
+def sample_stacks(seconds: float, interval: float = 0.005, include_idle: bool = False, max_depth: int = 128) -> Counter[str]:
+    """Samples the stacks of all other threads for `seconds` and counts each collapsed stack.
+
+    Threads blocked in the event loop's selector or waiting for work are
+    idle, and dropped unless `include_idle` is set, so the samples show where
+    CPU time goes.
+    """
+    me = threading.get_ident()
+    names: Dict[int, str] = {}
+    counts: Counter[str] = collections.Counter()
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        for thread in threading.enumerate():
+            if thread.ident is not None and thread.ident not in names:
+                names[thread.ident] = thread.name
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            stack: List[str] = []
+            current: Optional[FrameType] = frame
+            while current is not None and len(stack) < max_depth:
+                code = current.f_code
+                stack.append(_frame_name(code.co_filename, code.co_name, code.co_firstlineno))
+                current = current.f_back
+            if not include_idle and stack and stack[0].startswith(("select (", "poll (", "wait (", "_worker (")):
+                continue
+            stack.append(names.get(ident, f"thread-{ident}"))
+            counts[";".join(reversed(stack))] += 1
+        time.sleep(interval)
+    return counts
+
+
+def collapsed(counts: Counter[str]) -> str:
+    """Renders stack counts in the collapsed-stack format, most frequent first."""
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
@@ -0,0 +1,48 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict
+
+
+class RateLimiter:
+    """Token bucket shared by concurrent callers of a rate limited API.
+
+    Up to `burst` calls go through at once, after which calls are spaced
+    `1 / rate` seconds apart. Waiting callers are served in arrival order.
+    """
+
+    def __init__(self, rate: float, burst: int = 1, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+        self.acquired = 0
+        self.waited = 0
+        self.total_wait_seconds = 0.0
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                wait = (1 - self._tokens) / self.rate
+                self.waited += 1
+                self.total_wait_seconds += wait
+                await asyncio.sleep(wait)
+                self._refill()
+            self._tokens = max(self._tokens - 1, 0.0)
+            self.acquired += 1
+
+    async def __aenter__(self) -> None:
+        await self.acquire()
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        return None
+
+    def stats(self) -> Dict[str, float]:
+        return {"acquired": self.acquired, "waited": self.waited, "total_wait_seconds": self.total_wait_seconds}
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self._tokens = min(self._tokens + (now - self._updated) * self.rate, float(self.burst))
+        self._updated = now
@@ -0,0 +1,57 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class _Call(Generic[V]):
+    def __init__(self, task: "asyncio.Task[V]"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight(Generic[K, V]):
+    """Coalesces concurrent calls with the same key into one in-flight task.
+
+    The first caller starts the work; callers arriving while it runs await the
+    same task. Each caller awaits it through `asyncio.shield`, so a caller that
+    is cancelled (a client disconnecting, a deadline passing) only stops waiting.
+    The work itself is cancelled once the last waiter is gone. Once the task
+    finishes the key is forgotten, so results are never served stale. Callers
+    share the result object and must copy it before mutating it.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[K, _Call[V]] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: K, fn: Callable[[], Awaitable[V]]) -> V:
+        call = self._calls.get(key)
+        if call is None or call.task.cancelled():
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+        else:
+            self.coalesced += 1
+        self.calls += 1
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Nobody is left to use the result
+                self._forget(key, call)
+                call.task.cancel()
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": self.in_flight()}
+
+    def _forget(self, key: K, call: "_Call[V]") -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
@@ -0,0 +1,77 @@
+import asyncio
+import math
+import threading
+import time
+import pytest
+from src.rags.executors import ExecutorConfig, Executors
+
+@pytest.mark.asyncio
+async def test_run_io_bounds_calls_in_flight() -> None:
+    executors = Executors(ExecutorConfig(io_workers=2, max_queued_io=1, cpu_workers=0, loop_lag_interval=0))
+    release = threading.Event()
+
+    def blocking(i: int) -> int:
+        release.wait(5)
+        return i
+
+    tasks = [asyncio.create_task(executors.run_io(blocking, i)) for i in range(5)]
+    await asyncio.sleep(0.05)
+    stats = executors.stats()["pools"]["io"]
+    assert stats["in_flight"] == 3
+    assert stats["waiting"] == 2
+    release.set()
+    assert await asyncio.gather(*tasks) == [0, 1, 2, 3, 4]
+    stats = executors.stats()["pools"]["io"]
+    assert stats["completed"] == 5
+    assert stats["max_in_flight"] == 3
+    assert stats["total_run_seconds"] > 0
+    await executors.close()
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_keeps_slot_until_call_finishes() -> None:
+    executors = Executors(ExecutorConfig(io_workers=1, max_queued_io=0, cpu_workers=0, loop_lag_interval=0))
+    release = threading.Event()
+    first = asyncio.create_task(executors.run_io(release.wait, 5))
+    await asyncio.sleep(0.05)
+    first.cancel()
+    second = asyncio.create_task(executors.run_io(int, "1"))
+    await asyncio.sleep(0.05)
+    stats = executors.stats()["pools"]["io"]
+    # The cancelled call still occupies the only worker
+    assert stats["in_flight"] == 1
+    assert stats["waiting"] == 1
+    release.set()
+    assert await second == 1
+    stats = executors.stats()["pools"]["io"]
+    assert stats["in_flight"] == 0
+    assert stats["completed"] == 2
+    await executors.close()
+
+@pytest.mark.asyncio
+async def test_run_io_passes_kwargs_and_counts_failures() -> None:
+    executors = Executors(ExecutorConfig(cpu_workers=0, loop_lag_interval=0))
+    assert await executors.run_io(int, "ff", base=16) == 255
+    with pytest.raises(ValueError):
+        await executors.run_io(int, "not a number")
+    assert executors.stats()["pools"]["io"]["failed"] == 1
+    await executors.close()
+
+@pytest.mark.asyncio
+async def test_run_cpu_uses_process_pool() -> None:
+    executors = Executors(ExecutorConfig(cpu_workers=1, loop_lag_interval=0))
+    assert await executors.run_cpu(math.factorial, 10) == 3628800
+    assert executors.stats()["pools"]["cpu"]["completed"] == 1
+    assert executors.stats()["pools"]["io"]["completed"] == 0
+    await executors.close()
+
+@pytest.mark.asyncio
+async def test_loop_lag_is_sampled() -> None:
+    executors = Executors(ExecutorConfig(cpu_workers=0, loop_lag_interval=0.01))
+    await executors.start()
+    await asyncio.sleep(0.02)
+    time.sleep(0.05)  # Block the loop
+    await asyncio.sleep(0.02)
+    loop_stats = executors.stats()["loop"]
+    assert loop_stats["samples"] >= 1
+    assert loop_stats["max_lag_seconds"] >= 0.03
+    await executors.close()
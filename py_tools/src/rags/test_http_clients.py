@@ -0,0 +1,66 @@
+import asyncio
+import socket
+import httpx
+import pytest
+from unittest.mock import patch
+from src.rags.http_clients import CachingDNSBackend, HttpClientConfig, HttpClientRegistry
+
+async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Minimal keep-alive HTTP/1.1 server answering every request with 'ok'."""
+    try:
+        while True:
+            await reader.readuntil(b"\r\n\r\n")
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: keep-alive\r\n\r\nok")
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        writer.close()
+
+@pytest.mark.asyncio
+async def test_shared_client_reuses_connections_and_caches_dns() -> None:
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    server_port = server.sockets[0].getsockname()[1]
+    registry = HttpClientRegistry(HttpClientConfig(http2=False))
+    client = registry.get("web")
+    assert registry.get("web") is client
+    for _ in range(5):
+        response = await client.get(f"http://localhost:{server_port}/")
+        assert response.text == "ok"
+    stats = registry.stats()["web"]
+    assert stats["requests"] == 5
+    assert stats["connections_opened"] == 1
+    assert stats["reuse_ratio"] == 0.8
+    assert stats["dns_lookups"] == 1
+    await registry.close()
+    assert client.is_closed
+    assert not registry.get("web").is_closed
+    await registry.close()
+    server.close()
+
+@pytest.mark.asyncio
+async def test_shared_client_connects_through_caching_backend() -> None:
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    server_port = server.sockets[0].getsockname()[1]
+    hosts = []
+    connect_tcp = CachingDNSBackend.connect_tcp
+
+    async def record(self: CachingDNSBackend, host: str, port: int, *args: object, **kwargs: object) -> object:
+        hosts.append(host)
+        return await connect_tcp(self, host, port, *args, **kwargs)  # type: ignore[arg-type]
+
+    registry = HttpClientRegistry(HttpClientConfig(http2=False))
+    with patch.object(CachingDNSBackend, "connect_tcp", record):
+        response = await registry.get().get(f"http://localhost:{server_port}/")
+    assert response.text == "ok"
+    assert hosts == ["localhost"]
+    await registry.close()
+    server.close()
+
+@pytest.mark.asyncio
+async def test_shared_client_raises_httpx_errors() -> None:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        closed_port = s.getsockname()[1]
+    registry = HttpClientRegistry(HttpClientConfig(http2=False))
+    with pytest.raises(httpx.ConnectError):
+        await registry.get().get(f"http://127.0.0.1:{closed_port}/")
+    await registry.close()
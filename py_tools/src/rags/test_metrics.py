@@ -0,0 +1,60 @@
+import pytest
+from src.rags.metrics import REGISTRY, STAGE_ERRORS, STAGE_IN_FLIGHT, STAGE_SECONDS, Counter, Gauge, Histogram, Registry, timed, track
+
+def test_render_prometheus_text() -> None:
+    registry = Registry()
+    requests = Counter("requests_total", "Requests.", ["path"], registry=registry)
+    requests.labels("/a").inc()
+    requests.labels(path='/"b"').inc(2)
+    size = Gauge("queue_size", "Queue size.", registry=registry)
+    size.labels().set_function(lambda: 7)
+    latency = Histogram("latency_seconds", "Latency.", buckets=[0.1, 1], registry=registry)
+    for value in (0.05, 0.1, 0.5, 3):
+        latency.observe(value)
+    assert registry.render().splitlines() == [
+        "# HELP requests_total Requests.",
+        "# TYPE requests_total counter",
+        'requests_total{path="/a"} 1.0',
+        'requests_total{path="/\\"b\\""} 2.0',
+        "# HELP queue_size Queue size.",
+        "# TYPE queue_size gauge",
+        "queue_size 7.0",
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.1"} 2',
+        'latency_seconds_bucket{le="1.0"} 3',
+        'latency_seconds_bucket{le="+Inf"} 4',
+        "latency_seconds_sum 3.65",
+        "latency_seconds_count 4",
+    ]
+
+def test_registry_rejects_duplicates_and_survives_failing_functions() -> None:
+    registry = Registry()
+    gauge = Gauge("broken", "Broken.", registry=registry)
+    gauge.labels().set_function(lambda: 1 / 0)
+    Counter("ok_total", "Ok.", registry=registry).inc()
+    with pytest.raises(ValueError):
+        Counter("ok_total", "Ok.", registry=registry)
+    text = registry.render()
+    assert "# broken failed: division by zero" in text
+    assert "ok_total 1.0" in text
+
+@pytest.mark.asyncio
+async def test_track_and_timed_record_stages() -> None:
+    @timed("test_stage", "async")
+    async def work(fail: bool) -> int:
+        assert STAGE_IN_FLIGHT.labels("test_stage", "async").get() == 1
+        if fail:
+            raise RuntimeError("boom")
+        return 1
+
+    assert await work(False) == 1
+    with pytest.raises(RuntimeError):
+        await work(True)
+    assert STAGE_SECONDS.labels("test_stage", "async").count == 2
+    assert STAGE_ERRORS.labels("test_stage", "async").get() == 1
+    assert STAGE_IN_FLIGHT.labels("test_stage", "async").get() == 0
+
+    with track("test_stage", "sync"):
+        pass
+    assert 'rag_stage_duration_seconds_count{stage="test_stage",kind="sync"} 1' in REGISTRY.render()
@@ -0,0 +1,21 @@
+import threading
+from src.rags.profiler import collapsed, sample_stacks
+
+def busy_loop(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+def test_sample_stacks_finds_busy_function() -> None:
+    stop = threading.Event()
+    thread = threading.Thread(target=busy_loop, args=(stop,), name="busy")
+    thread.start()
+    try:
+        counts = sample_stacks(0.2, interval=0.005)
+    finally:
+        stop.set()
+        thread.join()
+    busy = [stack for stack in counts if stack.startswith("busy;")]
+    assert busy and all("busy_loop (test_profiler.py:" in stack for stack in busy)
+    lines = collapsed(counts).splitlines()
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) == max(counts.values())
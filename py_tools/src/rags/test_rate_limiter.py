@@ -0,0 +1,32 @@
+import asyncio
+from typing import List
+
+import pytest
+from src.rags.rate_limiter import RateLimiter
+
+@pytest.mark.asyncio
+async def test_burst_then_spaced_by_rate() -> None:
+    loop = asyncio.get_running_loop()
+    limiter = RateLimiter(rate=20, burst=2)
+    start = loop.time()
+    times: List[float] = []
+
+    async def call() -> None:
+        async with limiter:
+            times.append(loop.time() - start)
+
+    await asyncio.gather(*(call() for _ in range(4)))
+    assert times[1] < 0.02
+    # The two calls over the burst wait 1 / rate each, one after the other
+    assert times[3] >= 0.09
+    assert limiter.stats()["acquired"] == 4
+    assert limiter.stats()["waited"] == 2
+
+@pytest.mark.asyncio
+async def test_tokens_refill_over_time() -> None:
+    now = [0.0]
+    limiter = RateLimiter(rate=1, burst=1, clock=lambda: now[0])
+    await limiter.acquire()
+    now[0] = 1.0
+    await limiter.acquire()
+    assert limiter.waited == 0
@@ -0,0 +1,72 @@
+import asyncio
+import pytest
+from src.rags.single_flight import SingleFlight
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution() -> None:
+    flight: SingleFlight[str, int] = SingleFlight()
+    runs = 0
+
+    async def work() -> int:
+        nonlocal runs
+        runs += 1
+        await asyncio.sleep(0.01)
+        return 42
+
+    results = await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+    assert results == [42] * 5
+    assert runs == 1
+    assert flight.stats() == {"calls": 5, "coalesced": 4, "in_flight": 0}
+    # Finished calls are not cached
+    assert await flight.do("key", work) == 42
+    assert runs == 2
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_work() -> None:
+    flight: SingleFlight[str, str] = SingleFlight()
+    release = asyncio.Event()
+
+    async def work() -> str:
+        await release.wait()
+        return "done"
+
+    first = asyncio.create_task(flight.do("key", work))
+    second = asyncio.create_task(flight.do("key", work))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+    assert await second == "done"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+@pytest.mark.asyncio
+async def test_work_is_cancelled_when_every_caller_leaves() -> None:
+    flight: SingleFlight[str, str] = SingleFlight()
+    cancelled = asyncio.Event()
+
+    async def work() -> str:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return "unreachable"
+
+    caller = asyncio.create_task(flight.do("key", work))
+    await asyncio.sleep(0)
+    caller.cancel()
+    await asyncio.wait_for(cancelled.wait(), 1)
+    assert flight.in_flight() == 0
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_caller() -> None:
+    flight: SingleFlight[str, str] = SingleFlight()
+
+    async def work() -> str:
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(flight.do("key", work), flight.do("key", work), return_exceptions=True)
+    assert all(isinstance(r, ValueError) for r in results)
+    assert flight.in_flight() == 0
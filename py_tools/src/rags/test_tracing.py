@@ -0,0 +1,65 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+from src.rags.metrics import track
+from src.rags.tracing import TraceExporter, TracingConfig, current_span, span, start_trace
+
+@pytest.mark.asyncio
+async def test_spans_of_concurrent_tasks_nest_under_their_parent() -> None:
+    async def fetch(url: str, delay: float) -> None:
+        with span("page", url=url):
+            with track("fetch", "static"):
+                await asyncio.sleep(delay)
+
+    with start_trace("GET /web_search") as trace:
+        with span("search"):
+            await asyncio.gather(fetch("https://a.com", 0.01), fetch("https://slow.com", 0.05))
+    assert current_span() is None
+    tree = trace.to_dict()
+    assert tree["name"] == "GET /web_search" and tree["spans"] == 6
+    search = tree["children"][0]
+    assert [page["attributes"]["url"] for page in search["children"]] == ["https://a.com", "https://slow.com"]
+    assert search["children"][1]["children"][0]["attributes"] == {"kind": "static"}
+    assert search["children"][1]["duration_ms"] >= 50
+
+    timing = trace.server_timing()
+    assert timing.startswith("total;dur=")
+    assert 'page;dur=' in timing and 'desc="2x slowest https://slow.com"' in timing
+    assert "fetch-static;dur=" in timing
+
+def test_span_outside_trace_and_span_limit() -> None:
+    with span("orphan") as orphan:
+        assert orphan is None
+    with start_trace("request", max_spans=2) as trace:
+        with span("one"):
+            pass
+        with pytest.raises(ValueError):
+            with span("two") as failing:
+                raise ValueError()
+        assert failing is None
+    assert trace.spans == 2 and trace.dropped == 1
+    with start_trace("request") as trace:
+        with pytest.raises(ValueError):
+            with span("failing"):
+                raise ValueError()
+    assert trace.root.children[0].attributes == {"error": "ValueError"}
+
+@pytest.mark.asyncio
+async def test_exporter_keeps_slow_traces(tmp_path: Path) -> None:
+    path = tmp_path / "traces.jsonl"
+    exporter = TraceExporter(TracingConfig(path=str(path), min_duration=0.02))
+    with exporter.trace("fast") as fast:
+        pass
+    with exporter.trace("slow") as slow:
+        await asyncio.sleep(0.03)
+    await exporter.export(fast)
+    await exporter.export(slow)
+    lines = path.read_text().splitlines()
+    assert [json.loads(line)["name"] for line in lines] == ["slow"]
+    assert [trace["name"] for trace in exporter.recent] == ["slow"]
+
+    disabled = TraceExporter(TracingConfig(enabled=False))
+    with disabled.trace("request") as trace:
+        assert trace is None and current_span() is None
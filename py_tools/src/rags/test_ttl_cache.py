@@ -0,0 +1,41 @@
+from src.rags.ttl_cache import TTLCache
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def test_get_and_expire() -> None:
+    clock = FakeClock()
+    cache: TTLCache[str, int] = TTLCache(default_ttl=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=20)
+    assert cache.get("a") == 1
+    clock.now = 15
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert cache.hits == 2
+    assert cache.misses == 1
+
+def test_lru_eviction_by_entries() -> None:
+    cache: TTLCache[str, int] = TTLCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert "a" in cache
+    assert "b" not in cache
+    assert cache.evictions == 1
+
+def test_lru_eviction_by_size() -> None:
+    cache: TTLCache[str, str] = TTLCache(max_size=10)
+    cache.set("a", "x" * 4, size=4)
+    cache.set("b", "x" * 4, size=4)
+    cache.set("c", "x" * 4, size=4)
+    assert len(cache) == 2
+    assert cache.size == 8
+    cache.set("huge", "x" * 11, size=11)
+    assert "huge" not in cache
+    assert cache.size == 8
@@ -0,0 +1,198 @@
+"""Lightweight per-request tracing.
+
+A trace is a tree of timed spans. The span being recorded is held in a context
+variable, so spans opened by tasks started inside a span (concurrent page
+fetches, coalesced work) become its children without passing anything
+around. Outside a trace, `span` costs one context variable lookup.
+"""
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class TracingConfig(BaseModel):
+    """Configuration of request tracing and the local trace exporter."""
+    enabled: bool = Field(default=True, description="Record a span tree for every API request.")
+    server_timing: bool = Field(default=True, description="Summarize the spans of a request in a Server-Timing response header.")
+    path: Optional[str] = Field(default=".cache/traces.jsonl", description="JSON lines file exported traces are appended to; None keeps them in memory only.")
+    min_duration: float = Field(default=1.0, description="Requests faster than this many seconds are not exported.", ge=0)
+    keep_recent: int = Field(default=100, description="Exported traces kept in memory for the traces endpoint.", ge=0)
+    max_spans: int = Field(default=5000, description="Spans recorded per trace; further spans are counted but dropped.", ge=1)
+
+
+class Span:
+    """One timed operation of a trace."""
+
+    __slots__ = ("name", "attributes", "start", "end", "children", "trace")
+
+    def __init__(self, name: str, attributes: Dict[str, Any], trace: "Trace"):
+        self.name = name
+        self.attributes = attributes
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.children: List["Span"] = []
+        self.trace = trace
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3),
+            "unfinished": self.end is None,
+            "attributes": self.attributes,
+            "children": [child.to_dict(origin) for child in self.children],
+        }
+
+
+class Trace:
+    """The span tree of one request."""
+
+    def __init__(self, name: str, attributes: Dict[str, Any], max_spans: int):
+        self.max_spans = max_spans
+        self.spans = 1
+        self.dropped = 0
+        self.started_at = time.time()
+        self.root = Span(name, attributes, self)
+
+    @property
+    def duration(self) -> float:
+        return self.root.duration
+
+    def walk(self) -> Iterator[Span]:
+        stack = list(self.root.children)
+        while stack:
+            span = stack.pop()
+            yield span
+            stack.extend(span.children)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "started_at": self.started_at,
+            "spans": self.spans,
+            "dropped_spans": self.dropped,
+            **self.root.to_dict(self.root.start),
+        }
+
+    def server_timing(self, max_entries: int = 10) -> str:
+        """A Server-Timing header value: per span name, the slowest span and how many there were.
+
+        Spans of a name often run concurrently, so their summed time would
+        overstate it; the slowest one, with its url when it has one, is what
+        points at the culprit.
+        """
+        groups: Dict[str, List[Span]] = {}
+        for span in self.walk():
+            kind = span.attributes.get("kind")
+            groups.setdefault(f"{span.name}-{kind}" if kind else span.name, []).append(span)
+        slowest = sorted(
+            ((name, max(spans, key=lambda s: s.duration), len(spans)) for name, spans in groups.items()),
+            key=lambda entry: entry[1].duration,
+            reverse=True,
+        )[:max_entries]
+        entries = [f"total;dur={self.duration * 1000:.1f}"]
+        for name, span, count in slowest:
+            desc = f"{count}x"
+            if "url" in span.attributes:
+                desc += f" slowest {span.attributes['url']}"
+            desc = desc.replace("\\", "\\\\").replace('"', '\\"')
+            entries.append(f'{_token(name)};dur={span.duration * 1000:.1f};desc="{desc}"')
+        return ", ".join(entries)
+
+
+def _token(name: str) -> str:
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in name)
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("rag_current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+@contextmanager
+def start_trace(name: str, max_spans: int = 5000, **attributes: Any) -> Iterator[Trace]:
+    """Records a new trace rooted at the current context."""
+    trace = Trace(name, attributes, max_spans)
+    token = _current.set(trace.root)
+    try:
+        yield trace
+    finally:
+        trace.root.end = time.perf_counter()
+        _current.reset(token)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Records a child span of the current span; does nothing outside a trace."""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    trace = parent.trace
+    if trace.spans >= trace.max_spans:
+        trace.dropped += 1
+        yield None
+        return
+    trace.spans += 1
+    child = Span(name, attributes, trace)
+    parent.children.append(child)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.attributes["error"] = type(e).__name__
+        raise
+    finally:
+        child.end = time.perf_counter()
+        _current.reset(token)
+
+
+class TraceExporter:
+    """Appends slow traces to a local JSON lines file and keeps the latest in memory."""
+
+    def __init__(self, config: TracingConfig):
+        self.config = config
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=config.keep_recent)
+        self.exported = 0
+
+    def trace(self, name: str, **attributes: Any) -> Any:
+        """Starts a request trace, or a no-op when tracing is disabled."""
+        if not self.config.enabled:
+            return _no_trace()
+        return start_trace(name, max_spans=self.config.max_spans, **attributes)
+
+    async def export(self, trace: Optional[Trace]) -> None:
+        if trace is None or trace.duration < self.config.min_duration:
+            return
+        record = trace.to_dict()
+        self.recent.append(record)
+        self.exported += 1
+        if self.config.path:
+            try:
+                await asyncio.to_thread(self._append, json.dumps(record, default=str))
+            except OSError as e:
+                print(f"Error exporting trace: {e}")
+
+    def _append(self, line: str) -> None:
+        directory = os.path.dirname(self.config.path or "")
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.config.path or "", "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+@contextmanager
+def _no_trace() -> Iterator[None]:
+    yield None
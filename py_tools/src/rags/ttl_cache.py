@@ -0,0 +1,88 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Optional, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """In-memory LRU cache with per-entry expiry and optional entry and size budgets.
+
+    Entries are evicted least recently used first once either `max_entries` or
+    `max_size` (the sum of the sizes given to `set`) is exceeded.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_size: Optional[int] = None,
+        default_ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self.clock = clock
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[K, Tuple[V, Optional[float], int]]" = OrderedDict()
+
+    def get(self, key: K) -> Optional[V]:
+        """Returns the cached value, or None if it is missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, expires_at, _ = entry
+        if expires_at is not None and expires_at <= self.clock():
+            self.pop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None, size: int = 1) -> None:
+        """Stores a value for `ttl` seconds (the default ttl if None, forever if both are None)."""
+        self.pop(key)
+        if self.max_size is not None and size > self.max_size:
+            return
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = self.clock() + ttl if ttl is not None else None
+        self._entries[key] = (value, expires_at, size)
+        self.size += size
+        self._evict()
+
+    def pop(self, key: K) -> Optional[V]:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self.size -= entry[2]
+        return entry[0]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def _evict(self) -> None:
+        while self._entries and (
+            (self.max_entries is not None and len(self._entries) > self.max_entries)
+            or (self.max_size is not None and self.size > self.max_size)
+        ):
+            _, (_, _, size) = self._entries.popitem(last=False)
+            self.size -= size
+            self.evictions += 1
@@ -0,0 +1,214 @@
+import asyncio
+import traceback
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, CrawlResult  # type: ignore[import-untyped]
+
+from src.rags.web_search.config import BrowserPoolConfig
+
+
+def default_crawler_factory() -> AsyncWebCrawler:
+    """Creates a headless crawler with crawl4ai's default browser settings."""
+    return AsyncWebCrawler(config=BrowserConfig(headless=True, verbose=False))
+
+
+class PooledBrowser:
+    """A warm crawler (one browser process) and the page slots leased out of it."""
+
+    def __init__(self, crawler_factory: Callable[[], AsyncWebCrawler], pages_per_browser: int):
+        self.crawler = crawler_factory()
+        self.pages = asyncio.Semaphore(pages_per_browser)
+        self.leases = 0
+        self.pages_in_use = 0
+        self.pages_served = 0
+        self.consecutive_failures = 0
+        self.retiring = False
+
+    async def start(self) -> None:
+        await self.crawler.start()
+
+    async def close(self) -> None:
+        try:
+            await self.crawler.close()
+        except Exception:
+            print(f"Error closing browser: {traceback.format_exc()}")
+
+    async def crawl(self, url: str, run_config: Optional[CrawlerRunConfig] = None) -> CrawlResult:
+        """Leases a page from this browser, crawls the url and returns the page."""
+        async with self.pages:
+            self.pages_in_use += 1
+            try:
+                result = await self.crawler.arun(url=url, config=run_config)
+            except Exception:
+                self.consecutive_failures += 1
+                raise
+            finally:
+                self.pages_in_use -= 1
+                self.pages_served += 1
+        if getattr(result, "success", True):
+            self.consecutive_failures = 0
+        else:
+            self.consecutive_failures += 1
+        return result
+
+    def is_healthy(self, config: BrowserPoolConfig) -> bool:
+        """A browser is unhealthy once it crashed repeatedly or served enough pages to be leaking."""
+        return (
+            getattr(self.crawler, "ready", True)
+            and self.consecutive_failures < config.max_consecutive_failures
+            and self.pages_served < config.max_pages_per_browser
+        )
+
+
+class BrowserPool:
+    """Long-lived pool of warm headless browsers shared by all requests.
+
+    Browsers are started once (in the app lifespan) and reused. Every crawl
+    leases the least loaded browser and a page slot in it, so a single browser
+    never has more than `pages_per_browser` pages open. Crashed or leaking
+    browsers are recycled once they are idle, in a background task owned by the
+    pool: the replacement is launched first, and the old browser is not leased
+    again meanwhile.
+    """
+
+    def __init__(
+        self,
+        config: BrowserPoolConfig,
+        crawler_factory: Callable[[], AsyncWebCrawler] = default_crawler_factory,
+        run_config: Optional[CrawlerRunConfig] = None,
+    ):
+        self.config = config
+        self.crawler_factory = crawler_factory
+        self.run_config = run_config or CrawlerRunConfig(page_timeout=int(config.page_timeout * 1000))
+        self.browsers: List[PooledBrowser] = []
+        self.recycled = 0
+        self._lock = asyncio.Lock()
+        # Notified whenever a browser joins the pool
+        self._browser_added = asyncio.Condition()
+        self._health_task: Optional[asyncio.Task[None]] = None
+        self._recycling: Dict[PooledBrowser, asyncio.Task[None]] = {}
+
+    async def start(self) -> None:
+        """Launches the warm browsers and the background health check."""
+        async with self._lock:
+            while len(self.browsers) < self.config.size:
+                self.browsers.append(await self._launch())
+        await self._notify_browser_added()
+        if self._health_task is None:
+            self._health_task = asyncio.create_task(self._health_check_loop())
+
+    async def close(self) -> None:
+        """Stops the health check, lets running recycles finish and closes every browser."""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        await asyncio.gather(*self._recycling.values(), return_exceptions=True)
+        async with self._lock:
+            browsers, self.browsers = self.browsers, []
+        await asyncio.gather(*(b.close() for b in browsers))
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[PooledBrowser]:
+        """Leases the least loaded healthy browser for the duration of the block.
+
+        When every browser is being recycled, waits for a replacement to come up.
+        """
+        browser = await self._pick()
+        browser.leases += 1
+        try:
+            yield browser
+        finally:
+            browser.leases -= 1
+            self._retire_if_unhealthy(browser)
+
+    async def crawl(self, url: str) -> CrawlResult:
+        """Crawls a single url on a pooled browser."""
+        async with self.lease() as browser:
+            return await browser.crawl(url, self.run_config)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "browsers": len(self.browsers),
+            "leases": sum(b.leases for b in self.browsers),
+            "pages_in_use": sum(b.pages_in_use for b in self.browsers),
+            "pages_served": sum(b.pages_served for b in self.browsers),
+            "recycled": self.recycled,
+        }
+
+    async def _pick(self) -> PooledBrowser:
+        while True:
+            if not self.browsers:
+                await self.start()
+            candidates = [b for b in self.browsers if not b.retiring]
+            if candidates:
+                return min(candidates, key=lambda b: (b.pages_in_use + b.leases, b.pages_served))
+            async with self._browser_added:
+                await self._browser_added.wait()
+
+    async def _notify_browser_added(self) -> None:
+        async with self._browser_added:
+            self._browser_added.notify_all()
+
+    def _retire_if_unhealthy(self, browser: PooledBrowser) -> None:
+        """Stops leasing an unhealthy browser and recycles it in the background once it is idle."""
+        if browser.is_healthy(self.config):
+            return
+        browser.retiring = True
+        if browser.leases == 0 and browser not in self._recycling and browser in self.browsers:
+            task = asyncio.create_task(self._recycle(browser))
+            self._recycling[browser] = task
+            task.add_done_callback(lambda _: self._recycling.pop(browser, None))
+
+    async def _launch(self) -> PooledBrowser:
+        browser = PooledBrowser(self.crawler_factory, self.config.pages_per_browser)
+        await browser.start()
+        return browser
+
+    async def _recycle(self, browser: PooledBrowser) -> None:
+        """Replaces a browser with a freshly launched one, closing the old one once the new one is up.
+
+        A failed relaunch still retires the old browser; the health check tops
+        the pool back up later.
+        """
+        replacement: Optional[PooledBrowser] = None
+        try:
+            replacement = await self._launch()
+        except Exception:
+            print(f"Error relaunching browser: {traceback.format_exc()}")
+        async with self._lock:
+            if browser in self.browsers:
+                self.browsers.remove(browser)
+                self.recycled += 1
+            if replacement is not None:
+                self.browsers.append(replacement)
+        await self._notify_browser_added()
+        await browser.close()
+
+    async def _health_check_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.config.health_check_interval)
+            try:
+                await self.health_check()
+            except Exception:
+                print(f"Error in browser health check: {traceback.format_exc()}")
+
+    async def health_check(self) -> None:
+        """Recycles idle unhealthy browsers and tops the pool back up to its size."""
+        for browser in list(self.browsers):
+            self._retire_if_unhealthy(browser)
+        async with self._lock:
+            missing = self.config.size - len(self.browsers)
+        for _ in range(missing):
+            try:
+                browser = await self._launch()
+            except Exception:
+                print(f"Error launching browser: {traceback.format_exc()}")
+                break
+            async with self._lock:
+                self.browsers.append(browser)
+            await self._notify_browser_added()
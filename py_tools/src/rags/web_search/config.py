@@ -1,3 +1,4 @@
+from typing import List, Optional
 from pydantic import BaseModel, HttpUrl, Field
 
 class SearchConfig(BaseModel):
@@ -8,8 +9,73 @@ class SearchConfig(BaseModel):
         default="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36",
         description="User agent string to use for requests."
     )
-    timeout: int = Field(10, description="Timeout for requests in seconds.", ge=1)
+    timeout: int = Field(default=10, description="Timeout for requests in seconds.", ge=1)
+    deadline: Optional[float] = Field(default=30.0, description="Default overall time budget of a search and retrieve in seconds.", gt=0)
+    max_concurrent_fetches: int = Field(default=16, description="Maximum page fetches in flight across all requests.", ge=1)
+    max_concurrent_per_host: int = Field(default=2, description="Maximum page fetches in flight to a single host.", ge=1)
+    max_concurrent_static: int = Field(default=16, description="Maximum static (httpx) fetches in flight.", ge=1)
+    max_concurrent_dynamic: int = Field(default=4, description="Maximum dynamic (browser) fetches in flight.", ge=1)
+    max_concurrent_reddit: int = Field(default=2, description="Maximum Reddit fetches in flight.", ge=1)
+    coalesce_window: float = Field(default=5.0, description="Seconds of deadline a page fetch is shared across: requests whose deadlines end in the same window share one fetch.", gt=0)
 
 class SearxngConfig(SearchConfig):
     """Configuration for the Searxng search engine."""
-    base_url: HttpUrl = "https://searx.space/" # type: ignore
\ No newline at end of file
+    base_url: HttpUrl = "https://searx.space/" # type: ignore
+    lazy_paging: bool = Field(default=False, description="Fetch the next results page only while the deduplicated results fall short of num_results.")
+
+class BrowserPoolConfig(BaseModel):
+    """Configuration for the shared headless browser pool."""
+    size: int = Field(default=2, description="Number of warm browsers kept alive.", ge=1)
+    pages_per_browser: int = Field(default=4, description="Maximum concurrent pages leased from one browser.", ge=1)
+    max_pages_per_browser: int = Field(default=200, description="Pages served before a browser is recycled to bound memory leaks.", ge=1)
+    max_consecutive_failures: int = Field(default=3, description="Consecutive crawl failures before a browser is considered crashed.", ge=1)
+    health_check_interval: float = Field(default=30.0, description="Seconds between background health checks.", gt=0)
+    page_timeout: float = Field(default=20.0, description="Seconds a browser waits for a page to load.", gt=0)
+
+
+class ContentCacheConfig(BaseModel):
+    """Configuration for the scraped-content cache."""
+    path: str = Field(default=".cache/content_cache.sqlite3", description="SQLite file backing the disk tier, shared by all workers on a host.")
+    memory_max_bytes: int = Field(default=64 * 1024 * 1024, description="Size budget of the in-process LRU tier.", ge=0)
+    disk_max_bytes: int = Field(default=1024 * 1024 * 1024, description="Size budget of the disk tier.", ge=0)
+    static_ttl: int = Field(default=6 * 3600, description="Seconds a static page stays fresh before it is revalidated.", ge=0)
+    dynamic_ttl: int = Field(default=6 * 3600, description="Seconds a browser-rendered page stays fresh.", ge=0)
+    reddit_ttl: int = Field(default=15 * 60, description="Seconds a Reddit thread stays fresh.", ge=0)
+    evict_every: int = Field(default=32, description="Writes between disk tier eviction passes.", ge=1)
+
+
+class SearchResultsCacheConfig(BaseModel):
+    """Configuration for the search-results cache. TTLs depend on the query time range."""
+    max_entries: int = Field(default=1024, description="Maximum number of cached queries.", ge=1)
+    day_ttl: int = Field(default=10 * 60, description="Seconds results of a 'day' query stay cached.", ge=0)
+    month_ttl: int = Field(default=2 * 3600, description="Seconds results of a 'month' query stay cached.", ge=0)
+    year_ttl: int = Field(default=12 * 3600, description="Seconds results of a 'year' query stay cached.", ge=0)
+    unbounded_ttl: int = Field(default=24 * 3600, description="Seconds results of a query without time range stay cached.", ge=0)
+
+
+class FetchRouterConfig(BaseModel):
+    """Configuration for the tiered static-then-browser fetch router."""
+    min_words: int = Field(default=150, description="Pages with fewer extracted words are escalated to the browser.", ge=0)
+    render_websites: List[str] = Field(default=[], description="Websites known to need a browser; they skip the static tier.")
+    min_samples: int = Field(default=5, description="Static attempts on a domain before its statistics are trusted.", ge=1)
+    min_static_success_rate: float = Field(default=0.5, description="Domains below this static success rate go straight to the browser.", ge=0, le=1)
+    min_static_yield_ratio: float = Field(default=0.3, description="Domains whose static pages yield less than this fraction of the browser's words go straight to the browser.", ge=0)
+    explore_every: int = Field(default=20, description="Every n-th page of a browser-routed domain still tries the static tier, so the router can change its mind.", ge=1)
+    stats_path: Optional[str] = Field(default=".cache/fetch_router_stats.json", description="File the per-domain statistics are persisted to.")
+    save_every: int = Field(default=50, description="Recorded fetches between saves of the statistics.", ge=1)
+
+
+class DedupConfig(BaseModel):
+    """Configuration for collapsing near-duplicate results (syndicated articles, mirrors, crossposts)."""
+    max_distance: int = Field(default=3, description="Largest SimHash Hamming distance of two near-duplicate pages. The 4-band index finds every pair up to 3.", ge=0, le=3)
+    min_words: int = Field(default=50, description="Pages shorter than this are never collapsed, their fingerprints are too noisy.", ge=1)
+    shingle_size: int = Field(default=3, description="Words per shingle hashed into the fingerprint.", ge=1)
+    max_alternates: int = Field(default=5, description="Alternate urls listed per kept result.", ge=0)
+
+
+class RedditConfig(BaseModel):
+    """Configuration for budgeted Reddit thread extraction."""
+    max_comments: int = Field(default=30, description="Comment budget: only the highest scored comments of a thread are kept.", ge=0)
+    max_depth: int = Field(default=3, description="Deepest reply level read; 0 reads top-level comments only.", ge=0)
+    requests_per_second: float = Field(default=1.0, description="Reddit API requests allowed per second, shared by all fetches.", gt=0)
+    burst: int = Field(default=4, description="Reddit API requests allowed at once before the rate applies.", ge=1)
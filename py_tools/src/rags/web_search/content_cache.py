@@ -0,0 +1,271 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+from pydantic import BaseModel, Field
+
+from src.rags.executors import Executors
+from src.rags.ttl_cache import TTLCache
+from src.rags.web_search.config import ContentCacheConfig
+from src.rags.web_search.fetcher_kind import FetcherKind
+from src.rags.web_search.url_utils import normalize_url
+
+
+T = TypeVar("T")
+FINGERPRINT_BANDS = 4
+
+
+def _to_sqlite(fingerprint: int) -> int:
+    """Maps an unsigned 64-bit fingerprint onto SQLite's signed INTEGER."""
+    return fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+
+
+def _from_sqlite(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+def fingerprint_bands(fingerprint: int) -> List[int]:
+    """Splits a 64-bit fingerprint into 16-bit bands; fingerprints within 3 bits share at least one."""
+    return [(fingerprint >> (16 * i)) & 0xFFFF for i in range(FINGERPRINT_BANDS)]
+
+
+class CachedPage(BaseModel):
+    """Scraped content of one page plus the validators needed to revalidate it."""
+    url: str = Field(..., description="Normalized url of the page.")
+    kind: FetcherKind = Field(..., description="Fetcher that produced the content.")
+    content: str = Field(..., description="Extracted page content.")
+    etag: Optional[str] = Field(default=None, description="ETag response header of the fetch.")
+    last_modified: Optional[str] = Field(default=None, description="Last-Modified response header of the fetch.")
+    fetched_at: float = Field(..., description="Unix time the content was fetched or last revalidated.")
+    expires_at: float = Field(..., description="Unix time the content stops being fresh.")
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        return (time.time() if now is None else now) < self.expires_at
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional GET headers for revalidating a stale entry."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    @property
+    def size(self) -> int:
+        return len(self.content)
+
+
+class ContentCache:
+    """Two-tier cache of scraped page content keyed by normalized url.
+
+    The memory tier is a per-process LRU. The disk tier is a SQLite database in
+    WAL mode with zlib-compressed content, so several uvicorn workers on one host
+    can share it. Stale entries are kept until evicted so that static pages can be
+    revalidated with a conditional GET instead of being downloaded again.
+    """
+
+    def __init__(self, config: ContentCacheConfig, executors: Optional[Executors] = None):
+        self.config = config
+        self.executors = executors
+        self.memory: TTLCache[str, CachedPage] = TTLCache(max_size=config.memory_max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def ttl_for(self, kind: FetcherKind) -> int:
+        return {
+            FetcherKind.Static: self.config.static_ttl,
+            FetcherKind.Dynamic: self.config.dynamic_ttl,
+            FetcherKind.Reddit: self.config.reddit_ttl,
+        }[kind]
+
+    async def get(self, url: str) -> Optional[CachedPage]:
+        """Returns the cached page for a url, fresh or stale, or None.
+
+        A stale memory entry is checked against the disk tier first, where
+        another worker may already have stored a fresher copy.
+        """
+        key = normalize_url(url)
+        entry = self.memory.get(key)
+        if entry is None or not entry.is_fresh():
+            stored = await self._run_io(self._disk_get, key)
+            if stored is not None and (entry is None or stored.expires_at > entry.expires_at):
+                entry = stored
+                self.memory.set(key, entry, size=entry.size)
+        if entry is not None and entry.is_fresh():
+            self.hits += 1
+        else:
+            self.misses += 1
+        return entry
+
+    async def put(
+        self,
+        url: str,
+        kind: FetcherKind,
+        content: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> CachedPage:
+        """Stores freshly fetched content in both tiers."""
+        now = time.time()
+        entry = CachedPage(
+            url=normalize_url(url),
+            kind=kind,
+            content=content,
+            etag=etag,
+            last_modified=last_modified,
+            fetched_at=now,
+            expires_at=now + self.ttl_for(kind),
+        )
+        self.memory.set(entry.url, entry, size=entry.size)
+        await self._run_io(self._disk_put, entry)
+        return entry
+
+    async def revalidated(self, entry: CachedPage) -> CachedPage:
+        """Marks a stale entry fresh again after the origin answered 304 Not Modified."""
+        self.revalidations += 1
+        return await self.put(entry.url, entry.kind, entry.content, entry.etag, entry.last_modified)
+
+    async def match_fingerprints(self, fingerprints: Dict[str, int], max_distance: int) -> Dict[str, List[str]]:
+        """Stores content fingerprints of pages and returns, per url, the other
+        cached pages whose fingerprint is within `max_distance` bits."""
+        if not fingerprints:
+            return {}
+        return await self._run_io(self._disk_match_fingerprints, fingerprints, max_distance)
+
+    async def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "revalidations": self.revalidations,
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory.size,
+        }
+
+    async def _run_io(self, fn: Callable[..., T], *args: Any) -> T:
+        """Runs a blocking SQLite call on the shared I/O pool, else on a default thread."""
+        if self.executors is None:
+            return await asyncio.to_thread(fn, *args)
+        return await self.executors.run_io(fn, *args)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.config.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.config.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    content BLOB NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    size INTEGER NOT NULL
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS pages_accessed_at ON pages (accessed_at)")
+            # SimHash fingerprints split into 16-bit bands, so near-duplicates are found by exact band lookups
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS fingerprints (
+                    url TEXT PRIMARY KEY,
+                    fingerprint INTEGER NOT NULL,
+                    band0 INTEGER NOT NULL,
+                    band1 INTEGER NOT NULL,
+                    band2 INTEGER NOT NULL,
+                    band3 INTEGER NOT NULL
+                )"""
+            )
+            for i in range(FINGERPRINT_BANDS):
+                conn.execute(f"CREATE INDEX IF NOT EXISTS fingerprints_band{i} ON fingerprints (band{i})")
+            self._conn = conn
+        return self._conn
+
+    def _disk_get(self, key: str) -> Optional[CachedPage]:
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT kind, content, etag, last_modified, fetched_at, expires_at FROM pages WHERE url = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE pages SET accessed_at = ? WHERE url = ?", (time.time(), key))
+        kind, content, etag, last_modified, fetched_at, expires_at = row
+        return CachedPage(
+            url=key,
+            kind=FetcherKind(kind),
+            content=zlib.decompress(content).decode(),
+            etag=etag,
+            last_modified=last_modified,
+            fetched_at=fetched_at,
+            expires_at=expires_at,
+        )
+
+    def _disk_put(self, entry: CachedPage) -> None:
+        blob = zlib.compress(entry.content.encode())
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (entry.url, entry.kind.value, blob, entry.etag, entry.last_modified,
+                 entry.fetched_at, entry.expires_at, time.time(), len(blob)),
+            )
+            self._writes += 1
+            if self._writes % self.config.evict_every == 0:
+                self._evict(conn)
+
+    def _disk_match_fingerprints(self, fingerprints: Dict[str, int], max_distance: int) -> Dict[str, List[str]]:
+        matches: Dict[str, List[str]] = {}
+        with self._lock:
+            conn = self._connect()
+            for url, fingerprint in fingerprints.items():
+                rows = conn.execute(
+                    "SELECT url, fingerprint FROM fingerprints WHERE url != ? AND "
+                    "(band0 = ? OR band1 = ? OR band2 = ? OR band3 = ?)",
+                    (url, *fingerprint_bands(fingerprint)),
+                ).fetchall()
+                near = [other for other, value in rows if (_from_sqlite(value) ^ fingerprint).bit_count() <= max_distance]
+                if near:
+                    matches[url] = near
+            conn.executemany(
+                "INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?, ?, ?)",
+                [(url, _to_sqlite(fingerprint), *fingerprint_bands(fingerprint)) for url, fingerprint in fingerprints.items()],
+            )
+        return matches
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Deletes least recently accessed pages until the disk tier fits its budget.
+
+        A single statement, so concurrent workers never see a half-evicted table.
+        """
+        conn.execute(
+            """DELETE FROM pages WHERE url IN (
+                SELECT url FROM (
+                    SELECT url, SUM(size) OVER (ORDER BY accessed_at DESC, url) AS running FROM pages
+                ) WHERE running > ?
+            )""",
+            (self.config.disk_max_bytes,),
+        )
+        conn.execute("DELETE FROM fingerprints WHERE url NOT IN (SELECT url FROM pages)")
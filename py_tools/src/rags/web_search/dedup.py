@@ -0,0 +1,101 @@
+import hashlib
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from pydantic import HttpUrl
+
+from src.rags.web_search.config import DedupConfig
+from src.rags.web_search.content_cache import ContentCache, fingerprint_bands
+from src.rags.web_search.search_result import ResultStatus, SearchResult
+from src.rags.web_search.url_utils import normalize_url
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """64-bit SimHash of the word shingles of a text.
+
+    Shingles are hashed with blake2b rather than `hash()`, so fingerprints are
+    stable across processes and can be stored.
+    """
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    if len(tokens) < shingle_size:
+        shingles = Counter([" ".join(tokens)])
+    else:
+        shingles = Counter(" ".join(tokens[i:i + shingle_size]) for i in range(len(tokens) - shingle_size + 1))
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "little") for s in shingles],
+        dtype="<u8",
+    )
+    weights = np.fromiter(shingles.values(), dtype=np.int64, count=len(shingles))
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    votes = weights @ (bits.astype(np.int64) * 2 - 1)
+    return int(np.packbits(votes > 0, bitorder="little").view("<u8")[0])
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class NearDuplicateFilter:
+    """Collapses results whose scraped content is nearly identical.
+
+    Results are visited in search rank order; a result within `max_distance` bits
+    of an already kept one is dropped and its url is listed in the kept result's
+    `alternate_urls`. With a content cache, fingerprints are stored with the
+    cached pages and pages seen by earlier requests are listed as alternates too.
+    """
+
+    def __init__(self, config: DedupConfig, content_cache: Optional[ContentCache] = None):
+        self.config = config
+        self.content_cache = content_cache
+
+    def fingerprint(self, result: SearchResult) -> Optional[int]:
+        if result.status != ResultStatus.Complete or len(result.content.split()) < self.config.min_words:
+            return None
+        return simhash(result.content, self.config.shingle_size)
+
+    async def collapse(self, results: List[SearchResult]) -> List[SearchResult]:
+        return [result for _, result in await self.collapse_indexed(results)]
+
+    async def collapse_indexed(self, results: List[SearchResult]) -> List[Tuple[int, SearchResult]]:
+        """Same as `collapse`, with the position in `results` of each kept result."""
+        fingerprints = [self.fingerprint(result) for result in results]
+        kept: List[Tuple[SearchResult, Optional[int]]] = []
+        positions: List[int] = []
+        index: Dict[Tuple[int, int], List[int]] = {}
+        for position, (result, fingerprint) in enumerate(zip(results, fingerprints)):
+            duplicate_of = None
+            if fingerprint is not None:
+                for band_key in enumerate(fingerprint_bands(fingerprint)):
+                    for k in index.get(band_key, []):
+                        kept_fingerprint = kept[k][1]
+                        if kept_fingerprint is not None and hamming(fingerprint, kept_fingerprint) <= self.config.max_distance:
+                            duplicate_of = k
+                            break
+                    if duplicate_of is not None:
+                        break
+            if duplicate_of is None:
+                if fingerprint is not None:
+                    for band_key in enumerate(fingerprint_bands(fingerprint)):
+                        index.setdefault(band_key, []).append(len(kept))
+                kept.append((result.model_copy(update={"alternate_urls": list(result.alternate_urls)}), fingerprint))
+                positions.append(position)
+            else:
+                self._add_alternate(kept[duplicate_of][0], str(result.url))
+
+        if self.content_cache is not None:
+            by_url = {normalize_url(str(r.url)): fp for r, fp in kept if fp is not None}
+            matches = await self.content_cache.match_fingerprints(by_url, self.config.max_distance)
+            for result, fingerprint in kept:
+                if fingerprint is not None:
+                    for url in matches.get(normalize_url(str(result.url)), []):
+                        self._add_alternate(result, url)
+        return [(position, result) for position, (result, _) in zip(positions, kept)]
+
+    def _add_alternate(self, result: SearchResult, url: str) -> None:
+        known = {normalize_url(str(result.url))} | {normalize_url(str(u)) for u in result.alternate_urls}
+        if normalize_url(url) not in known and len(result.alternate_urls) < self.config.max_alternates:
+            result.alternate_urls.append(HttpUrl(url))
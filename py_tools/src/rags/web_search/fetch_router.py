@@ -0,0 +1,119 @@
+import json
+import os
+import traceback
+from typing import Dict
+from urllib.parse import urlparse
+
+from pydantic import BaseModel, Field
+
+from src.rags.web_search.config import FetchRouterConfig
+from src.rags.web_search.fetcher_kind import FetcherKind
+
+
+class TierStats(BaseModel):
+    """Outcome statistics of one fetch tier on one domain."""
+    attempts: int = 0
+    successes: int = 0
+    total_words: int = 0
+    total_latency: float = 0.0
+
+    @property
+    def success_rate(self) -> float:
+        return self.successes / self.attempts if self.attempts else 0.0
+
+    @property
+    def avg_words(self) -> float:
+        return self.total_words / self.successes if self.successes else 0.0
+
+    @property
+    def avg_latency(self) -> float:
+        return self.total_latency / self.attempts if self.attempts else 0.0
+
+
+class DomainStats(BaseModel):
+    static: TierStats = Field(default_factory=TierStats)
+    dynamic: TierStats = Field(default_factory=TierStats)
+
+
+class FetchRouter:
+    """Decides whether a page is tried with a cheap httpx GET or sent to the browser.
+
+    Pages start on the static tier and escalate to the browser when the extracted
+    text is thin, as it is for JavaScript shells. Per-domain success rate, content
+    yield and latency of each tier are kept so that domains which never render
+    statically skip the static tier, and they are persisted across restarts.
+    """
+
+    def __init__(self, config: FetchRouterConfig):
+        self.config = config
+        self.domains: Dict[str, DomainStats] = {}
+        self._unsaved = 0
+
+    @staticmethod
+    def domain(url: str) -> str:
+        host = (urlparse(url).hostname or "").lower()
+        return host[4:] if host.startswith("www.") else host
+
+    def choose(self, url: str) -> FetcherKind:
+        """Returns the tier a page should start on."""
+        if any(site in url for site in self.config.render_websites):
+            return FetcherKind.Dynamic
+        stats = self.domains.get(self.domain(url))
+        if stats is None or stats.static.attempts < self.config.min_samples:
+            return FetcherKind.Static
+        static, dynamic = stats.static, stats.dynamic
+        static_works = static.success_rate >= self.config.min_static_success_rate and (
+            dynamic.successes == 0 or static.avg_words >= self.config.min_static_yield_ratio * dynamic.avg_words
+        )
+        if static_works or dynamic.attempts % self.config.explore_every == 0:
+            return FetcherKind.Static
+        return FetcherKind.Dynamic
+
+    def needs_browser(self, html: str, text: str) -> bool:
+        """True when the statically extracted text is too thin.
+
+        A page whose text reached `min_words` is kept, even when its markup
+        mentions JavaScript or carries an empty app root next to the rendered
+        content; JavaScript shells are caught by the text they fail to yield.
+        """
+        return len(text.split()) < self.config.min_words
+
+    def record(self, url: str, kind: FetcherKind, success: bool, words: int, latency: float) -> None:
+        """Records the outcome of fetching a page on a tier."""
+        stats = self.domains.setdefault(self.domain(url), DomainStats())
+        tier = stats.static if kind == FetcherKind.Static else stats.dynamic
+        tier.attempts += 1
+        tier.total_latency += latency
+        if success:
+            tier.successes += 1
+            tier.total_words += words
+        self._unsaved += 1
+        if self._unsaved >= self.config.save_every:
+            self.save()
+
+    def load(self) -> None:
+        path = self.config.stats_path
+        if not path or not os.path.exists(path):
+            return
+        try:
+            with open(path) as f:
+                self.domains = {d: DomainStats.model_validate(s) for d, s in json.load(f).items()}
+        except Exception:
+            print(f"Error loading fetch router stats from {path}: {traceback.format_exc()}")
+
+    def save(self) -> None:
+        """Writes the statistics atomically so a concurrent reader never sees a partial file."""
+        path = self.config.stats_path
+        self._unsaved = 0
+        if not path:
+            return
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({d: s.model_dump() for d, s in self.domains.items()}, f)
+            os.replace(tmp_path, path)
+        except Exception:
+            print(f"Error saving fetch router stats to {path}: {traceback.format_exc()}")
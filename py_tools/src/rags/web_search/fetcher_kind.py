@@ -0,0 +1,6 @@
+from enum import Enum
+
+class FetcherKind(str, Enum):
+    Static = "static"
+    Dynamic = "dynamic"
+    Reddit = "reddit"
@@ -0,0 +1,181 @@
+import re
+from typing import Dict, List, Optional, Set
+
+import lxml.html  # type: ignore[import-untyped]
+from lxml import etree
+
+from src.rags.web_search.html_parser import HTMLParser
+from src.rags.web_search.search_result import SearchResult
+
+BOILERPLATE_TAGS = [
+    "script", "style", "noscript", "nav", "footer", "aside", "form",
+    "iframe", "svg", "button", "template", "select", "object", "embed",
+]
+BOILERPLATE_ROLES = {"navigation", "banner", "contentinfo", "complementary", "search", "dialog"}
+BOILERPLATE_NAMES = re.compile(
+    r"(^|[\s_-])(ads?|advert\w*|sponsor\w*|promo\w*|banner|cookie\w*|consent|gdpr|nav|navbar|menu|"
+    r"sidebar|footer|breadcrumbs?|social|share|sharing|newsletter|subscribe|related|recommended|"
+    r"comments?|popup|modal|outbrain|taboola)($|[\s_-])",
+    re.IGNORECASE,
+)
+# Elements named like boilerplate are only dropped when they hold at most this share of the page's paragraph text
+BOILERPLATE_MAX_TEXT_SHARE = 0.25
+PARAGRAPH_TAGS = ("p", "pre")
+BLOCK_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6", "p", "li", "pre", "blockquote", "tr", "dt", "dd", "figcaption")
+CONTAINER_TAGS = {"div", "section", "article", "main", "td", "body"}
+
+
+def _clean(text: str) -> str:
+    return " ".join(text.split())
+
+
+class LxmlHTMLParser(HTMLParser):
+    """Fast HTML parser on lxml's C parser that extracts the main content of a page.
+
+    Boilerplate (navigation, headers, footers, ads, cookie banners, forms) is
+    dropped, the densest content container is picked, and its headings,
+    paragraphs, list items and table rows are emitted in document order, either as
+    plain text or as markdown.
+    """
+
+    def __init__(self, markdown: bool = False):
+        self.markdown = markdown
+        self._parser = self._new_parser()
+
+    @staticmethod
+    def _new_parser() -> lxml.html.HTMLParser:
+        return lxml.html.HTMLParser(encoding="utf-8", remove_comments=True, remove_pis=True)
+
+    def __getstate__(self) -> Dict[str, bool]:
+        # lxml parsers cannot be pickled, rebuild it when sent to a worker process
+        return {"markdown": self.markdown}
+
+    def __setstate__(self, state: Dict[str, bool]) -> None:
+        self.markdown = state["markdown"]
+        self._parser = self._new_parser()
+
+    def parse(self, html: str, search_result: SearchResult) -> SearchResult:
+        """Parses HTML and extracts the main text content."""
+        search_result.content = self.extract(html)
+        return search_result
+
+    def extract(self, html: str) -> str:
+        try:
+            doc = lxml.html.document_fromstring(html.encode("utf-8", "replace"), parser=self._parser)
+        except (etree.ParserError, ValueError):
+            return ""
+        self._remove_boilerplate(doc)
+        container = self._main_container(doc)
+        if container is None:
+            return ""
+        blocks = self._blocks(container)
+        if not blocks:
+            return _clean(container.text_content())
+        return "\n".join(blocks) if self.markdown else " ".join(blocks)
+
+    @staticmethod
+    def _remove_boilerplate(doc: lxml.html.HtmlElement) -> None:
+        """Drops boilerplate, keeping every element that holds the main content.
+
+        Nothing that contains an article, a main element or the densest paragraph
+        block is dropped, so a layout wrapper named like boilerplate
+        ("content-sidebar-wrap", "page has-sidebar") keeps its content. Class and
+        id names are only trusted on elements holding little of the page's
+        paragraph text.
+        """
+        text_below: Dict[lxml.html.HtmlElement, int] = {}
+        block_text: Dict[lxml.html.HtmlElement, int] = {}
+        for p in doc.iter(*PARAGRAPH_TAGS):
+            length = len(p.text_content().strip())
+            parent = p.getparent()
+            if parent is not None:
+                block_text[parent] = block_text.get(parent, 0) + length
+            for ancestor in p.iterancestors():
+                text_below[ancestor] = text_below.get(ancestor, 0) + length
+        total = text_below.get(doc, 0)
+        content = doc.xpath("//article | //main | //*[@role='main']")
+        if block_text:
+            content.append(max(block_text, key=block_text.__getitem__))
+        protected: Set[lxml.html.HtmlElement] = set()
+        for el in content:
+            protected.add(el)
+            protected.update(el.iterancestors())
+
+        doomed = list(doc.iter(*BOILERPLATE_TAGS))
+        # Page headers are boilerplate, article headers hold the title
+        doomed.extend(
+            el for el in doc.iter("header")
+            if not any(a.tag in ("article", "main") for a in el.iterancestors())
+        )
+        for el in doc.iter(etree.Element):
+            if el.get("role") in BOILERPLATE_ROLES or el.get("aria-hidden") == "true":
+                doomed.append(el)
+                continue
+            names = f"{el.get('class', '')} {el.get('id', '')}"
+            if (
+                names.strip()
+                and el.tag not in ("html", "body", "main", "article")
+                and text_below.get(el, 0) <= total * BOILERPLATE_MAX_TEXT_SHARE
+                and BOILERPLATE_NAMES.search(names)
+            ):
+                doomed.append(el)
+        for el in doomed:
+            if el not in protected and el.getparent() is not None:
+                el.drop_tree()
+
+    @staticmethod
+    def _main_container(doc: lxml.html.HtmlElement) -> Optional[lxml.html.HtmlElement]:
+        """Picks the article/main element, else the container with the most paragraph text."""
+        for path in ("//article", "//main", "//*[@role='main']"):
+            candidates = doc.xpath(path)
+            if candidates:
+                return max(candidates, key=lambda el: len(el.text_content()))
+        scores: Dict[lxml.html.HtmlElement, float] = {}
+        for p in doc.iter("p", "pre", "li", "td"):
+            length = len(p.text_content().strip())
+            if length < 25:
+                continue
+            parent = p.getparent()
+            weight = 1.0
+            while parent is not None and weight > 0.2:
+                if parent.tag in CONTAINER_TAGS:
+                    scores[parent] = scores.get(parent, 0.0) + length * weight
+                    weight /= 2
+                parent = parent.getparent()
+        if scores:
+            return max(scores, key=scores.__getitem__)
+        body = doc.find("body")
+        return body if body is not None else doc
+
+    def _blocks(self, container: lxml.html.HtmlElement) -> List[str]:
+        blocks: List[str] = []
+        emitted: Set[lxml.html.HtmlElement] = set()
+        for el in container.iter(*BLOCK_TAGS):
+            if any(ancestor in emitted for ancestor in el.iterancestors()):
+                continue
+            emitted.add(el)
+            if el.tag == "tr":
+                cells = [_clean(cell.text_content()) for cell in el.iter("td", "th")]
+                if not any(cells):
+                    continue
+                text = f"| {' | '.join(cells)} |" if self.markdown else " | ".join(cells)
+            elif el.tag == "pre" and self.markdown:
+                text = f"```\n{el.text_content().strip()}\n```"
+            else:
+                text = _clean(el.text_content())
+                if not text:
+                    continue
+                if self.markdown:
+                    text = self._markdown_prefix(el.tag) + text
+            blocks.append(text)
+        return blocks
+
+    @staticmethod
+    def _markdown_prefix(tag: str) -> str:
+        if tag[0] == "h" and tag[1:].isdigit():
+            return "#" * int(tag[1:]) + " "
+        if tag in ("li", "dd"):
+            return "- "
+        if tag == "blockquote":
+            return "> "
+        return ""
@@ -0,0 +1,97 @@
+import math
+import re
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from src.rags.web_search.search_params import PassageParams
+from src.rags.web_search.search_result import ResultStatus, SearchResult
+
+TOKEN_PATTERN = re.compile(r"\w+")
+PASSAGE_SEPARATOR = " ... "
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count of a text (about four characters per token)."""
+    return math.ceil(len(text) / 4)
+
+
+class PassageRanker:
+    """Keeps only the passages of scraped pages that are relevant to the query.
+
+    Each result's content is cut into passages of `passage_words` words, all
+    passages of the request are scored against the query with BM25, and the
+    best `top_k` passages that fit in `token_budget` tokens are kept. Results
+    keep their search rank order and their selected passages keep page order.
+    Results with no selected passage are kept, without content and with a
+    `NoRelevantPassage` status, so the caller still sees every page it searched.
+    """
+
+    def __init__(self, params: PassageParams):
+        self.params = params
+
+    def rank(self, query: str, results: List[SearchResult]) -> List[SearchResult]:
+        passages: List[Tuple[int, str]] = []
+        for i, result in enumerate(results):
+            passages.extend((i, passage) for passage in self.split(result.content))
+        if not passages:
+            return results
+
+        scores = self.score(query, [passage for _, passage in passages])
+        # Stable sort: ties, such as passages without any query term, keep search rank and page order
+        order = np.argsort(-scores, kind="stable")
+        selected: List[int] = []
+        budget = self.params.token_budget
+        for j in order:
+            if len(selected) == self.params.top_k:
+                break
+            tokens = estimate_tokens(passages[j][1])
+            if tokens > budget:
+                continue
+            budget -= tokens
+            selected.append(int(j))
+
+        by_result: Dict[int, List[str]] = {}
+        for j in sorted(selected):
+            i, passage = passages[j]
+            by_result.setdefault(i, []).append(passage)
+        return [
+            result.model_copy(update={"content": PASSAGE_SEPARATOR.join(by_result[i])}) if i in by_result
+            else result.model_copy(update={"content": "", "status": ResultStatus.NoRelevantPassage})
+            for i, result in enumerate(results)
+        ]
+
+    def split(self, content: str) -> List[str]:
+        words = content.split()
+        size = self.params.passage_words
+        return [" ".join(words[start:start + size]) for start in range(0, len(words), size)]
+
+    def score(self, query: str, passages: List[str]) -> np.ndarray:
+        """BM25 score of every passage, over a term-frequency matrix of the query terms."""
+        terms = {term: j for j, term in enumerate(dict.fromkeys(TOKEN_PATTERN.findall(query.lower())))}
+        n = len(passages)
+        if not terms:
+            return np.zeros(n)
+        lengths = np.empty(n)
+        rows: List[int] = []
+        cols: List[int] = []
+        for i, passage in enumerate(passages):
+            tokens = TOKEN_PATTERN.findall(passage.lower())
+            lengths[i] = len(tokens)
+            for token in tokens:
+                j = terms.get(token)
+                if j is not None:
+                    rows.append(i)
+                    cols.append(j)
+        if not rows:
+            return np.zeros(n)
+        tf = np.bincount(
+            np.asarray(rows) * len(terms) + np.asarray(cols), minlength=n * len(terms)
+        ).reshape(n, len(terms)).astype(float)
+        df = np.count_nonzero(tf, axis=0)
+        idf = np.log((n - df + 0.5) / (df + 0.5) + 1.0)
+        k1, b = self.params.k1, self.params.b
+        avg_length = max(lengths.mean(), 1.0)
+        norm = k1 * (1 - b + b * lengths / avg_length)
+        scores: np.ndarray = (tf * (k1 + 1) / (tf + norm[:, None])) @ idf
+        return scores
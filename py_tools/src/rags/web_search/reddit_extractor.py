@@ -0,0 +1,69 @@
+import heapq
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import asyncpraw
+from asyncpraw.models import MoreComments  # type: ignore[attr-defined]
+
+from src.rags.rate_limiter import RateLimiter
+from src.rags.web_search.config import RedditConfig
+
+
+def format_reddit_submission(title: str, score: int, selftext: str, comments: Sequence[Tuple[int, int, str]]) -> str:
+    """Builds the text of a Reddit submission from its (index, upvotes, body) comments."""
+    lines = [f"Title: {title} (Upvotes:{score})\nContent: {selftext}\nComments:\n"]
+    lines.extend(f"{i}. (Upvotes:{comment_score}) {body}\n" for i, comment_score, body in comments)
+    return "".join(lines)
+
+
+def top_comments(comments: Iterable[Any], k: int, max_depth: int) -> List[Tuple[int, int, str]]:
+    """The `k` highest scored comments of a comment forest down to `max_depth` reply levels.
+
+    The tree is walked once, keeping the best comments so far in a min-heap of
+    size `k`. Returns (rank, upvotes, body) by descending score; ties keep
+    thread order. Unloaded "more comments" stubs are skipped.
+    """
+    if k <= 0:
+        return []
+    heap: List[Tuple[int, int, str]] = []
+    order = 0
+    stack = [(comment, 0) for comment in reversed(list(comments))]
+    while stack:
+        comment, depth = stack.pop()
+        if isinstance(comment, MoreComments):
+            continue
+        # Earlier comments win ties, so they compare greater
+        entry = (comment.score, -order, comment.body)
+        order += 1
+        if len(heap) < k:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+        if depth < max_depth:
+            stack.extend((reply, depth + 1) for reply in reversed(list(comment.replies)))
+    best = sorted(heap, reverse=True)
+    return [(rank, score, body) for rank, (score, _, body) in enumerate(best)]
+
+
+class RedditExtractor:
+    """Extracts Reddit threads within a comment budget.
+
+    Only the top `max_comments` comments by score down to `max_depth` reply
+    levels are kept. Submission fetches from all concurrent searches share one
+    rate limiter. Threads are not cached here; the scraper's content cache
+    keeps them for `ContentCacheConfig.reddit_ttl` seconds.
+    """
+
+    def __init__(self, config: RedditConfig, client: asyncpraw.Reddit, rate_limiter: Optional[RateLimiter] = None):
+        self.config = config
+        self.client = client
+        self.rate_limiter = rate_limiter or RateLimiter(config.requests_per_second, config.burst)
+
+    async def extract(self, url: str) -> str:
+        async with self.rate_limiter:
+            # Submission attributes are fetched lazily, so they are not declared on the class
+            submission: Any = await self.client.submission(url=url)
+        comments = top_comments(submission.comments, self.config.max_comments, self.config.max_depth)
+        return format_reddit_submission(submission.title, submission.score, submission.selftext, comments)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {"rate_limiter": self.rate_limiter.stats()}
@@ -0,0 +1,126 @@
+import asyncio
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncIterator, Dict
+from urllib.parse import urlparse
+
+from pydantic import BaseModel, Field, computed_field
+
+from src.rags.web_search.config import SearchConfig
+from src.rags.web_search.fetcher_kind import FetcherKind
+
+
+class QueueStats(BaseModel):
+    """Queue depth and wait time numbers for one scheduler pool."""
+    limit: int = Field(..., description="Maximum fetches in flight.")
+    in_flight: int = Field(default=0, description="Fetches currently running.")
+    queued: int = Field(default=0, description="Fetches currently waiting for a slot.")
+    max_queued: int = Field(default=0, description="Highest queue depth observed.")
+    completed: int = Field(default=0, description="Fetches that got a slot and finished.")
+    total_wait_seconds: float = Field(default=0.0, description="Summed time spent waiting for a slot.")
+    max_wait_seconds: float = Field(default=0.0, description="Longest time spent waiting for a slot.")
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def avg_wait_seconds(self) -> float:
+        return self.total_wait_seconds / self.completed if self.completed else 0.0
+
+
+class SchedulerStats(BaseModel):
+    """Snapshot of the scheduler state."""
+    total: QueueStats
+    pools: Dict[FetcherKind, QueueStats]
+    hosts_in_flight: Dict[str, int]
+
+
+class _HostSlots:
+    """The slots of one host and the fetches using them."""
+
+    def __init__(self, limit: int):
+        self.semaphore = asyncio.Semaphore(limit)
+        # Fetches holding or waiting for a slot; the host is dropped when none is left
+        self.users = 0
+        self.in_flight = 0
+
+
+class FetchScheduler:
+    """Bounds page fetch concurrency globally, per host and per fetcher kind.
+
+    A fetch acquires its host slot first, then its fetcher pool slot and finally
+    a global slot, so it never occupies a scarce global slot while it is only
+    waiting on a busy host.
+    """
+
+    def __init__(self, max_concurrent: int, max_per_host: int, pool_limits: Dict[FetcherKind, int]):
+        self.max_per_host = max_per_host
+        self._global = asyncio.Semaphore(max_concurrent)
+        self._pools = {kind: asyncio.Semaphore(limit) for kind, limit in pool_limits.items()}
+        self._hosts: Dict[str, _HostSlots] = {}
+        self._total = QueueStats(limit=max_concurrent)
+        self._pool_stats = {kind: QueueStats(limit=limit) for kind, limit in pool_limits.items()}
+
+    @classmethod
+    def from_config(cls, config: SearchConfig) -> "FetchScheduler":
+        return cls(
+            max_concurrent=config.max_concurrent_fetches,
+            max_per_host=config.max_concurrent_per_host,
+            pool_limits={
+                FetcherKind.Static: config.max_concurrent_static,
+                FetcherKind.Dynamic: config.max_concurrent_dynamic,
+                FetcherKind.Reddit: config.max_concurrent_reddit,
+            },
+        )
+
+    @asynccontextmanager
+    async def slot(self, kind: FetcherKind, url: str) -> AsyncIterator[None]:
+        """Waits for a host, pool and global slot and holds them for the block."""
+        host = urlparse(url).hostname or ""
+        stats = (self._total, self._pool_stats[kind])
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for s in stats:
+            s.queued += 1
+            s.max_queued = max(s.max_queued, s.queued)
+        async with AsyncExitStack() as stack:
+            try:
+                stack.push_async_callback(self._release_host, host)
+                await stack.enter_async_context(self._acquire_host(host))
+                await stack.enter_async_context(self._pools[kind])
+                await stack.enter_async_context(self._global)
+            finally:
+                for s in stats:
+                    s.queued -= 1
+            waited = loop.time() - start
+            host_slots = self._hosts[host]
+            host_slots.in_flight += 1
+            for s in stats:
+                s.in_flight += 1
+            try:
+                yield
+            finally:
+                host_slots.in_flight -= 1
+                for s in stats:
+                    s.in_flight -= 1
+                    s.completed += 1
+                    s.total_wait_seconds += waited
+                    s.max_wait_seconds = max(s.max_wait_seconds, waited)
+
+    def _acquire_host(self, host: str) -> asyncio.Semaphore:
+        host_slots = self._hosts.get(host)
+        if host_slots is None:
+            host_slots = self._hosts[host] = _HostSlots(self.max_per_host)
+        host_slots.users += 1
+        return host_slots.semaphore
+
+    async def _release_host(self, host: str) -> None:
+        host_slots = self._hosts[host]
+        host_slots.users -= 1
+        if host_slots.users == 0:
+            # Drop idle hosts so the table does not grow with every domain ever seen
+            del self._hosts[host]
+
+    def stats(self) -> SchedulerStats:
+        return SchedulerStats(
+            total=self._total.model_copy(),
+            pools={kind: s.model_copy() for kind, s in self._pool_stats.items()},
+            hosts_in_flight={host: host_slots.in_flight for host, host_slots in self._hosts.items()},
+        )
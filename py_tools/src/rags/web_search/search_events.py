@@ -0,0 +1,28 @@
+from typing import Dict, List, Literal, Union
+from pydantic import BaseModel, Field, HttpUrl
+from src.rags.web_search.search_result import SearchResult
+
+class SnippetsEvent(BaseModel):
+    """Search engine results with their snippets, sent before any page is scraped."""
+    type: Literal["snippets"] = "snippets"
+    results: List[SearchResult] = Field(..., description="Search results holding the search engine snippets.")
+
+class ResultEvent(BaseModel):
+    """A single scraped result, sent as soon as its page completes."""
+    type: Literal["result"] = "result"
+    index: int = Field(..., description="Position of the result in the snippets list.")
+    result: SearchResult = Field(..., description="The scraped search result.")
+
+class DuplicatesEvent(BaseModel):
+    """Near-duplicate results collapsed after all pages were scraped, as search_and_retrieve collapses them."""
+    type: Literal["duplicates"] = "duplicates"
+    dropped: List[int] = Field(default=[], description="Positions of results that duplicate a better ranked one.")
+    alternate_urls: Dict[int, List[HttpUrl]] = Field(default={}, description="Alternate urls of the kept results by position.")
+
+class SummaryEvent(BaseModel):
+    """Final record of a streamed search."""
+    type: Literal["summary"] = "summary"
+    num_results: int = Field(..., description="Number of scraped results sent.")
+    elapsed_seconds: float = Field(..., description="Wall time of the whole search.")
+
+SearchEvent = Union[SnippetsEvent, ResultEvent, DuplicatesEvent, SummaryEvent]
@@ -13,3 +13,18 @@ class SearchParams(BaseModel):
     website: Optional[str] = Field(default=None, description="Specific website to search within.")
     num_results: int = Field(default=10, description="Desired number of search results.", ge=1)
     time_range: Optional[SearchTimeRange] = Field(default=None, description="Time range for the search (e.g., day, month, year).")
+
+
+class BatchSearchParams(BaseModel):
+    """Several related search queries answered with one shared scrape."""
+    queries: List[SearchParams] = Field(..., description="The search queries.", min_length=1)
+    deadline: Optional[float] = Field(default=None, description="Seconds to spend scraping before returning snippets for unfinished pages.", gt=0)
+
+
+class PassageParams(BaseModel):
+    """How scraped pages are cut into passages and which passages are kept."""
+    passage_words: int = Field(default=120, description="Words per passage.", ge=10)
+    top_k: int = Field(default=8, description="Passages kept over all results.", ge=1)
+    token_budget: int = Field(default=2000, description="Estimated LLM tokens the kept passages may add up to.", ge=1)
+    k1: float = Field(default=1.5, description="BM25 term frequency saturation.", ge=0)
+    b: float = Field(default=0.75, description="BM25 passage length normalization.", ge=0, le=1)
@@ -1,18 +1,120 @@
-from typing import List
+import asyncio
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from src.rags.web_search.search_engine import SearchEngine
-from src.rags.web_search.search_params import SearchParams
-from src.rags.web_search.search_result import SearchResult
+from src.rags.web_search.search_params import PassageParams, SearchParams
+from src.rags.web_search.passage_ranker import PassageRanker
+from src.rags.web_search.dedup import NearDuplicateFilter
+from src.rags.single_flight import SingleFlight
+from src.rags.web_search.search_result import BatchSearchResults, ResultStatus, SearchResult
+from src.rags.web_search.url_utils import normalize_url
 from src.rags.web_search.web_scraper import WebScraper
+from src.rags.web_search.search_events import DuplicatesEvent, ResultEvent, SearchEvent, SnippetsEvent, SummaryEvent
 
 class SearchRAG:
     """Main class for performing search and retrieval."""
 
-    def __init__(self, search_engine: SearchEngine, web_scraper: WebScraper):
+    def __init__(self, search_engine: SearchEngine, web_scraper: WebScraper, default_deadline: Optional[float] = None, dedup: Optional[NearDuplicateFilter] = None):
         self.search_engine = search_engine
         self.web_scraper = web_scraper
+        self.default_deadline = default_deadline
+        self.dedup = dedup
+        self.inflight: SingleFlight[Tuple[str, Optional[float]], List[SearchResult]] = SingleFlight()
 
-    async def search_and_retrieve(self, params: SearchParams) -> List[SearchResult]:
-        """Performs a search, scrapes the results, and returns parsed data."""
-        search_results = await self.search_engine.search(params)
-        parsed_results = await self.web_scraper.scrape(search_results)
+    def _remaining(self, deadline: Optional[float], start: float) -> Optional[float]:
+        """Seconds left of the request's time budget, or None when unbounded."""
+        deadline = self.default_deadline if deadline is None else deadline
+        if deadline is None:
+            return None
+        return max(deadline - (time.monotonic() - start), 0.0)
+
+    async def _search(self, params: SearchParams, timeout: Optional[float]) -> List[SearchResult]:
+        """Runs a search within `timeout` seconds; a search that runs out of time finds nothing."""
+        try:
+            return await asyncio.wait_for(self.search_engine.search(params), timeout)
+        except asyncio.TimeoutError:
+            print(f"Error searching {params.query!r}: no results within {timeout} seconds")
+            return []
+
+    async def search_and_retrieve(self, params: SearchParams, deadline: Optional[float] = None, passages: Optional[PassageParams] = None) -> List[SearchResult]:
+        """Performs a search, scrapes the results, and returns parsed data.
+
+        The search and the scrape share `deadline` seconds (or the default deadline):
+        each stage gets the time the previous ones left, and pages not scraped in
+        time keep their search snippet and are marked as timed out. Near-duplicate pages are
+        collapsed into the best ranked copy. With `passages`, only the passages
+        most relevant to the query are returned. Identical concurrent requests share
+        one search and scrape.
+        """
+        key = (params.model_dump_json(), deadline)
+        shared = await self.inflight.do(key, lambda: self._search_and_scrape(params, deadline))
+        parsed_results = [result.model_copy() for result in shared]
+        if self.dedup is not None:
+            parsed_results = await self.dedup.collapse(parsed_results)
+        if passages is not None:
+            parsed_results = PassageRanker(passages).rank(params.query, parsed_results)
         return parsed_results
+
+    async def _search_and_scrape(self, params: SearchParams, deadline: Optional[float]) -> List[SearchResult]:
+        start = time.monotonic()
+        search_results = await self._search(params, self._remaining(deadline, start))
+        return await self.web_scraper.scrape(search_results, deadline=self._remaining(deadline, start))
+
+    async def search_and_retrieve_stream(self, params: SearchParams, deadline: Optional[float] = None) -> AsyncIterator[SearchEvent]:
+        """Performs a search and yields the snippets, then each scraped result as it completes, then a summary.
+
+        With a near-duplicate filter, the duplicates found among the scraped
+        results are sent before the summary, so the stream ends with the same
+        results as `search_and_retrieve`.
+        """
+        start = time.monotonic()
+        search_results = await self._search(params, self._remaining(deadline, start))
+        yield SnippetsEvent(results=[r.model_copy() for r in search_results])
+        num_results = 0
+        scraped = list(search_results)
+        async for i, result in self.web_scraper.scrape_iter(search_results, deadline=self._remaining(deadline, start)):
+            num_results += 1
+            scraped[i] = result
+            yield ResultEvent(index=i, result=result)
+        if self.dedup is not None:
+            kept = await self.dedup.collapse_indexed(scraped)
+            positions = {i for i, _ in kept}
+            yield DuplicatesEvent(
+                dropped=[i for i in range(len(scraped)) if i not in positions],
+                alternate_urls={i: result.alternate_urls for i, result in kept if result.alternate_urls},
+            )
+        yield SummaryEvent(num_results=num_results, elapsed_seconds=time.monotonic() - start)
+
+    async def batch_search_and_retrieve(self, queries: List[SearchParams], deadline: Optional[float] = None) -> BatchSearchResults:
+        """Runs several searches concurrently and scrapes every distinct page once.
+
+        URLs are deduplicated on their normalized form, so a page returned by
+        several queries is fetched a single time and its content is mapped back
+        to each query. Results whose page was not scraped keep their own snippet.
+        """
+        start = time.monotonic()
+        per_query = await asyncio.gather(*(self._search(params, self._remaining(deadline, start)) for params in queries))
+        unique: Dict[str, SearchResult] = {}
+        for search_results in per_query:
+            for result in search_results:
+                unique.setdefault(normalize_url(str(result.url)), result)
+        scraped = await self.web_scraper.scrape(list(unique.values()), deadline=self._remaining(deadline, start))
+        by_url = dict(zip(unique.keys(), scraped))
+
+        results: List[List[SearchResult]] = []
+        for search_results in per_query:
+            query_results = []
+            for result in search_results:
+                page = by_url[normalize_url(str(result.url))]
+                if page.status == ResultStatus.Complete:
+                    query_results.append(result.model_copy(update={"content": page.content, "status": page.status}))
+                else:
+                    query_results.append(result.model_copy(update={"status": page.status}))
+            if self.dedup is not None:
+                query_results = await self.dedup.collapse(query_results)
+            results.append(query_results)
+        return BatchSearchResults(
+            results=results,
+            total_results=sum(len(search_results) for search_results in per_query),
+            unique_pages=len(unique),
+        )
@@ -1,7 +1,29 @@
-from pydantic import BaseModel, HttpUrl, Field
+from enum import Enum
+from typing import List
+from pydantic import BaseModel, HttpUrl, Field, computed_field
+
+class ResultStatus(str, Enum):
+    Complete = "complete"
+    SnippetOnly = "snippet_only"
+    TimedOut = "timed_out"
+    NoRelevantPassage = "no_relevant_passage"
 
 class SearchResult(BaseModel):
     """Represents a single search result."""
     url: HttpUrl = Field(..., description="URL of the search result.")
     title: str = Field(..., description="Title of the page.")
-    content: str = Field(..., description="Content of the page (e.g., extracted text).")
\ No newline at end of file
+    content: str = Field(..., description="Content of the page (e.g., extracted text).")
+    status: ResultStatus = Field(default=ResultStatus.SnippetOnly, description="Whether content holds the scraped page, only the search snippet, the snippet of a page that timed out, or nothing because none of the page's passages was relevant enough to keep.")
+    alternate_urls: List[HttpUrl] = Field(default_factory=list, description="Other urls with nearly the same content, collapsed into this result.")
+
+class BatchSearchResults(BaseModel):
+    """Results of a batch of queries, in query order, with how much scraping the dedup saved."""
+    results: List[List[SearchResult]] = Field(..., description="The results of each query.")
+    total_results: int = Field(..., description="Search results over all queries, duplicates included.")
+    unique_pages: int = Field(..., description="Distinct pages scraped.")
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def overlap_ratio(self) -> float:
+        """Fraction of search results that reused a page scraped for another result."""
+        return 1 - self.unique_pages / self.total_results if self.total_results else 0.0
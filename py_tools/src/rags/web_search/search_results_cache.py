@@ -0,0 +1,52 @@
+from typing import List, Optional, Tuple
+
+from src.rags.ttl_cache import TTLCache
+from src.rags.web_search.config import SearchResultsCacheConfig
+from src.rags.web_search.search_params import SearchParams, SearchTimeRange
+from src.rags.web_search.search_result import SearchResult
+
+CacheKey = Tuple[str, Optional[str], Optional[SearchTimeRange]]
+
+
+class SearchResultsCache:
+    """Caches search engine results per (query, website, time_range).
+
+    An entry holds every result fetched for the query and whether the engine had
+    nothing more to give, so it can answer any later request for at most that many
+    results. Results are copied in and out because the scraper mutates them.
+    """
+
+    def __init__(self, config: SearchResultsCacheConfig):
+        self.config = config
+        self.cache: TTLCache[CacheKey, Tuple[List[SearchResult], bool]] = TTLCache(max_entries=config.max_entries)
+
+    @staticmethod
+    def key(params: SearchParams) -> CacheKey:
+        return (params.query.strip().lower(), params.website, params.time_range)
+
+    def ttl_for(self, time_range: Optional[SearchTimeRange]) -> int:
+        if time_range == SearchTimeRange.Day:
+            return self.config.day_ttl
+        elif time_range == SearchTimeRange.Month:
+            return self.config.month_ttl
+        elif time_range == SearchTimeRange.Year:
+            return self.config.year_ttl
+        return self.config.unbounded_ttl
+
+    def get(self, params: SearchParams) -> Optional[List[SearchResult]]:
+        """Returns cached results if they can satisfy `params.num_results`."""
+        entry = self.cache.get(self.key(params))
+        if entry is None:
+            return None
+        results, exhausted = entry
+        if len(results) < params.num_results and not exhausted:
+            return None
+        return [r.model_copy() for r in results[:params.num_results]]
+
+    def set(self, params: SearchParams, results: List[SearchResult], exhausted: bool) -> None:
+        """Stores results; `exhausted` marks that no further results are available."""
+        self.cache.set(
+            self.key(params),
+            ([r.model_copy() for r in results], exhausted),
+            ttl=self.ttl_for(params.time_range),
+        )
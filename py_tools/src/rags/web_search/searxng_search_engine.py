@@ -1,8 +1,9 @@
 import asyncio
 import httpx
+from contextlib import nullcontext
 from bs4 import BeautifulSoup
 from datetime import date, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncContextManager, Dict, List, Optional, Tuple
 
 from pydantic import BaseModel, HttpUrl
 
@@ -10,6 +11,10 @@ from src.rags.web_search.search_engine import SearchEngine
 from src.rags.web_search.search_params import SearchParams
 from src.rags.web_search.search_result import SearchResult
 from src.rags.web_search.config import SearxngConfig
+from src.rags.web_search.search_results_cache import SearchResultsCache
+from src.rags.web_search.url_utils import normalize_url
+from src.rags.single_flight import SingleFlight
+from src.rags.metrics import FETCHED_BYTES, timed
 
 class SearxngResult(BaseModel):
     url: str
@@ -20,13 +25,35 @@ class SearxngSearchEngine(SearchEngine):
     """Searxng implementation of the SearchEngine."""
     config: SearxngConfig
 
-    async def _fetch_page(self, client: httpx.AsyncClient, url: str, data: Dict[str, Any]) -> List[SearxngResult]:
-        """Fetches the content of a single page."""
+    def __init__(self, config: SearxngConfig, results_cache: Optional[SearchResultsCache] = None, http_client: Optional[httpx.AsyncClient] = None):
+        super().__init__(config)
+        self.results_cache = results_cache
+        self.http_client = http_client
+        self.inflight: SingleFlight[Tuple[str, Tuple[Tuple[str, Any], ...]], List[SearxngResult]] = SingleFlight()
+
+    async def _fetch_page(self, url: str, data: Dict[str, Any]) -> List[SearxngResult]:
+        """Fetches the content of a single page, sharing the request with identical concurrent ones.
+
+        The shared request runs on a client owned by the engine, not by the search
+        that started it, so it survives that search finishing or being cancelled.
+        """
+        key = (url, tuple(sorted(data.items())))
+        return list(await self.inflight.do(key, lambda: self._post_page(url, data)))
+
+    async def _post_page(self, url: str, data: Dict[str, Any]) -> List[SearxngResult]:
         headers = {"User-Agent": self.config.user_agent}
-        response = await client.post(url, headers=headers, data=data, timeout=self.config.timeout)
+        async with self._client() as client:
+            response = await client.post(url, headers=headers, data=data, timeout=self.config.timeout)
         response.raise_for_status()
+        FETCHED_BYTES.labels("searxng").inc(len(response.content))
         return [SearxngResult.model_validate(r) for r in response.json()['results']]
 
+    def _client(self) -> AsyncContextManager[httpx.AsyncClient]:
+        """The shared pooled client when there is one, else a client for one request."""
+        if self.http_client is not None:
+            return nullcontext(self.http_client)
+        return httpx.AsyncClient()
+
     def _parse_search_results(self, searxng_results: List[SearxngResult]) -> List[SearchResult]:
         """Parses the search results page HTML."""
         return [
@@ -38,41 +65,76 @@ class SearxngSearchEngine(SearchEngine):
         ]
 
 
+    def _build_query(self, params: SearchParams, page_num: int) -> Dict[str, Any]:
+        """Builds the Searxng form data for one results page."""
+        data = {
+            "q": params.query,
+            "format": "json",  # Request HTML format for easier parsing
+            "pageno": str(page_num + 1),
+            "safesearch": 0,
+            "language": "auto",
+            "category_general": 1,
+        }
+
+        # Add optional parameters
+        if params.website:
+            data["q"] += f" site:{params.website}"
+
+        if params.time_range is not None:
+            data["time_range"] = params.time_range.value
+        return data
+
+    @timed("search", "searxng")
     async def search(self, params: SearchParams) -> List[SearchResult]:
         """Searches using Searxng and returns parsed results."""
+        if self.results_cache is not None:
+            cached = self.results_cache.get(params)
+            if cached is not None:
+                return cached
+
         print(f"Searching for '{params.query}' on {self.config.base_url}")
+        # Construct the search URL for Searxng
+        search_url = f"{self.config.base_url}search"
+        if self.config.lazy_paging:
+            results, exhausted = await self._search_lazily(search_url, params)
+        else:
+            results, exhausted = await self._search_all_pages(search_url, params), True
+
+        if self.results_cache is not None:
+            self.results_cache.set(params, results, exhausted)
+        return results[:params.num_results]
+
+    async def _search_all_pages(self, search_url: str, params: SearchParams) -> List[SearchResult]:
+        """Fetches all `max_pages` pages concurrently."""
         results: List[SearchResult] = []
         tasks = []
+        for page_num in range(self.config.max_pages):
+            # Fetch the page asynchronously
+            tasks.append(self._fetch_page(search_url, data=self._build_query(params, page_num)))
 
-        async with httpx.AsyncClient() as client:
-            for page_num in range(self.config.max_pages):
-                # Construct the search URL for Searxng
-                search_url = f"{self.config.base_url}search"
-
-                # Build the query parameters
-                data = {
-                    "q": params.query,
-                    "format": "json",  # Request HTML format for easier parsing
-                    "pageno": str(page_num + 1),
-                    "safesearch": 0,
-                    "language": "auto",
-                    "category_general": 1,
-                }
-
-                # Add optional parameters
-                if params.website:
-                    data["q"] += f" site:{params.website}"
+        pages = await asyncio.gather(*tasks)
 
-                if params.time_range is not None:
-                    data["time_range"] = params.time_range.value
+        for page in pages:
+            page_results = self._parse_search_results(page)
+            results.extend(page_results)
+        return results
 
-                # Fetch the page asynchronously
-                tasks.append(self._fetch_page(client, search_url, data=data))
+    async def _search_lazily(self, search_url: str, params: SearchParams) -> Tuple[List[SearchResult], bool]:
+        """Fetches pages one at a time until there are `num_results` distinct urls.
 
-            pages = await asyncio.gather(*tasks)
-
-            for page in pages:
-                page_results = self._parse_search_results(page)
-                results.extend(page_results)
-
-        return results[:params.num_results]
+        Returns the results and whether the engine ran out of results.
+        """
+        results: List[SearchResult] = []
+        seen = set()
+        for page_num in range(self.config.max_pages):
+            page = await self._fetch_page(search_url, data=self._build_query(params, page_num))
+            if not page:
+                return results, True
+            for result in self._parse_search_results(page):
+                key = normalize_url(str(result.url))
+                if key not in seen:
+                    seen.add(key)
+                    results.append(result)
+            if len(results) >= params.num_results:
+                return results, False
+        return results, True
@@ -0,0 +1,112 @@
+import asyncio
+import pytest
+from typing import Any, List
+from types import SimpleNamespace
+from unittest.mock import Mock
+from pydantic import HttpUrl
+from src.rags.web_search.browser_pool import BrowserPool
+from src.rags.web_search.config import BrowserPoolConfig, SearchConfig
+from src.rags.web_search.html_parser import HTMLParser
+from src.rags.web_search.search_result import SearchResult
+from src.rags.web_search.web_scraper import WebScraper
+
+class FakeCrawler:
+    instances: List["FakeCrawler"] = []
+
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+        self.ready = False
+        self.closed = False
+        self.urls: List[str] = []
+        FakeCrawler.instances.append(self)
+
+    async def start(self) -> "FakeCrawler":
+        self.ready = True
+        return self
+
+    async def close(self) -> None:
+        self.closed = True
+
+    async def arun(self, url: str, config: Any = None) -> SimpleNamespace:
+        self.urls.append(url)
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("browser crashed")
+        return SimpleNamespace(success=True, markdown=f"markdown of {url}")
+
+@pytest.fixture(autouse=True)
+def reset_instances() -> None:
+    FakeCrawler.instances = []
+
+@pytest.mark.asyncio
+async def test_pool_reuses_warm_browsers() -> None:
+    pool = BrowserPool(BrowserPoolConfig(size=2), crawler_factory=FakeCrawler)
+    await pool.start()
+    results = await asyncio.gather(*(pool.crawl(f"http://example.com/{i}") for i in range(10)))
+    await pool.close()
+    assert [r.markdown for r in results] == [f"markdown of http://example.com/{i}" for i in range(10)]
+    assert len(FakeCrawler.instances) == 2
+    assert all(c.closed for c in FakeCrawler.instances)
+
+@pytest.mark.asyncio
+async def test_pool_recycles_leaking_browser() -> None:
+    pool = BrowserPool(BrowserPoolConfig(size=1, max_pages_per_browser=2), crawler_factory=FakeCrawler)
+    await pool.start()
+    for i in range(3):
+        await pool.crawl(f"http://example.com/{i}")
+    assert pool.recycled == 1
+    assert len(pool.browsers) == 1
+    assert FakeCrawler.instances[1].urls == ["http://example.com/2"]
+    await pool.close()
+    assert FakeCrawler.instances[0].closed
+
+@pytest.mark.asyncio
+async def test_pool_recycles_crashed_browser() -> None:
+    crawlers = iter([FakeCrawler(fail=True), FakeCrawler()])
+    pool = BrowserPool(BrowserPoolConfig(size=1, max_consecutive_failures=1), crawler_factory=lambda: next(crawlers))
+    await pool.start()
+    with pytest.raises(RuntimeError):
+        await pool.crawl("http://example.com/")
+    result = await pool.crawl("http://example.com/")
+    await pool.close()
+    assert result.success
+    assert pool.recycled == 1
+
+class SlowStartCrawler(FakeCrawler):
+    async def start(self) -> "FakeCrawler":
+        await asyncio.sleep(0.05)
+        return await super().start()
+
+@pytest.mark.asyncio
+async def test_recycle_runs_in_the_background() -> None:
+    crawlers = iter([FakeCrawler(), SlowStartCrawler()])
+    pool = BrowserPool(BrowserPoolConfig(size=1, max_pages_per_browser=1), crawler_factory=lambda: next(crawlers))
+    await pool.start()
+    # The crawl that wore the browser out does not wait for the relaunch
+    await asyncio.wait_for(pool.crawl("http://example.com/0"), 0.03)
+    waiting = asyncio.create_task(pool.crawl("http://example.com/1"))
+    await asyncio.sleep(0.01)
+    # A caller cancelled while the replacement launches does not cost the pool its browser
+    waiting.cancel()
+    result = await pool.crawl("http://example.com/2")
+    assert result.success and pool.recycled == 1 and len(pool.browsers) == 1
+    await pool.close()
+    assert [c.urls for c in FakeCrawler.instances] == [["http://example.com/0"], ["http://example.com/2"]]
+    assert all(c.closed for c in FakeCrawler.instances)
+
+@pytest.mark.asyncio
+async def test_scraper_crawls_dynamic_pages_through_pool() -> None:
+    pool = BrowserPool(BrowserPoolConfig(size=2), crawler_factory=FakeCrawler)
+    await pool.start()
+    config = Mock(spec=SearchConfig)
+    config.timeout = 10
+    scraper = WebScraper(config=config, html_parser=Mock(spec=HTMLParser), browser_pool=pool)
+    search_results = [
+        SearchResult(url=HttpUrl(f"http://example.com/{i}"), title="Example", content="Example website")
+        for i in range(3)
+    ]
+    scraped_results = await scraper.scrape(search_results)
+    await pool.close()
+    assert [r.content for r in scraped_results] == [f"markdown of http://example.com/{i}" for i in range(3)]
+    # Each page leases the least loaded browser itself
+    assert sorted(len(c.urls) for c in FakeCrawler.instances) == [1, 2]
@@ -0,0 +1,112 @@
+import sqlite3
+from pathlib import Path
+import httpx
+import pytest
+from unittest.mock import AsyncMock, Mock
+from pydantic import HttpUrl
+from src.rags.web_search.config import ContentCacheConfig, SearchConfig
+from src.rags.web_search.content_cache import ContentCache
+from src.rags.web_search.fetcher_kind import FetcherKind
+from src.rags.web_search.html_parser import HTMLParser
+from src.rags.web_search.search_result import ResultStatus, SearchResult
+from src.rags.web_search.url_utils import normalize_url
+from src.rags.web_search.web_scraper import WebScraper
+
+@pytest.fixture
+def cache_config(tmp_path: Path) -> ContentCacheConfig:
+    return ContentCacheConfig(path=str(tmp_path / "cache.sqlite3"))
+
+def test_normalize_url() -> None:
+    assert normalize_url("HTTPS://Example.COM:443/a?b=2&utm_source=x&a=1#frag") == "https://example.com/a?a=1&b=2"
+    assert normalize_url("http://example.com") == "http://example.com/"
+    assert normalize_url("http://example.com:8080/?fbclid=1") == "http://example.com:8080/"
+
+@pytest.mark.asyncio
+async def test_put_and_get_across_instances(cache_config: ContentCacheConfig) -> None:
+    cache = ContentCache(cache_config)
+    await cache.put("https://example.com/a?utm_source=x", FetcherKind.Static, "content", etag='"v1"')
+    await cache.close()
+
+    other_worker = ContentCache(cache_config)
+    entry = await other_worker.get("https://EXAMPLE.com/a")
+    assert entry is not None
+    assert entry.content == "content"
+    assert entry.is_fresh()
+    assert entry.validators() == {"If-None-Match": '"v1"'}
+    assert other_worker.stats()["hits"] == 1
+    await other_worker.close()
+
+@pytest.mark.asyncio
+async def test_disk_eviction(cache_config: ContentCacheConfig) -> None:
+    cache_config.evict_every = 1
+    cache_config.disk_max_bytes = 1
+    cache = ContentCache(cache_config)
+    await cache.put("https://example.com/a", FetcherKind.Dynamic, "a" * 100)
+    cache.memory.clear()
+    assert await cache.get("https://example.com/a") is None
+    await cache.close()
+
+@pytest.mark.asyncio
+async def test_scraper_serves_fresh_content_from_cache(cache_config: ContentCacheConfig) -> None:
+    cache = ContentCache(cache_config)
+    await cache.put("https://example.com/", FetcherKind.Dynamic, "Cached Content")
+    scraper = WebScraper(config=Mock(spec=SearchConfig), html_parser=Mock(spec=HTMLParser), content_cache=cache)
+    search_results = [SearchResult(url=HttpUrl("https://example.com"), title="Example", content="Example website")]
+    scraped_results = await scraper.scrape(search_results)
+    assert scraped_results[0].content == "Cached Content"
+    await cache.close()
+
+@pytest.mark.asyncio
+async def test_scraper_revalidates_stale_static_page(cache_config: ContentCacheConfig) -> None:
+    cache_config.static_ttl = 0
+    cache = ContentCache(cache_config)
+    await cache.put("https://example.com/", FetcherKind.Static, "Cached Content", etag='"v1"')
+    config = Mock(spec=SearchConfig)
+    config.user_agent = "Test User Agent"
+    config.timeout = 10
+    html_parser = Mock(spec=HTMLParser)
+    scraper = WebScraper(config=config, html_parser=html_parser, content_cache=cache, static_websites=["example.com"])
+    search_result = SearchResult(url=HttpUrl("https://example.com"), title="Example", content="Example website")
+    async with httpx.AsyncClient() as client:
+        client.get = AsyncMock(return_value=Mock(status_code=304))  # type: ignore[method-assign]
+        scraper.http_client = client
+        scraped_result = await scraper._fetch_and_parse_page(search_result)
+    assert scraped_result.content == "Cached Content"
+    assert client.get.call_args.kwargs["headers"]["If-None-Match"] == '"v1"'
+    assert cache.revalidations == 1
+    html_parser.parse.assert_not_called()
+    await cache.close()
+
+@pytest.mark.asyncio
+async def test_stale_memory_entry_is_refreshed_from_disk(cache_config: ContentCacheConfig) -> None:
+    stale_config = cache_config.model_copy(update={"static_ttl": 0})
+    worker = ContentCache(stale_config)
+    await worker.put("https://example.com/", FetcherKind.Static, "old")
+    other_worker = ContentCache(cache_config)
+    await other_worker.put("https://example.com/", FetcherKind.Static, "new")
+    entry = await worker.get("https://example.com/")
+    assert entry is not None
+    assert entry.content == "new"
+    assert entry.is_fresh()
+    assert worker.stats()["hits"] == 1
+    await worker.close()
+    await other_worker.close()
+
+@pytest.mark.asyncio
+async def test_scraper_treats_failing_cache_as_miss() -> None:
+    cache = Mock(spec=ContentCache)
+    cache.get = AsyncMock(side_effect=sqlite3.OperationalError("database is locked"))
+    cache.put = AsyncMock()
+    config = Mock(spec=SearchConfig)
+    config.user_agent = "Test User Agent"
+    config.timeout = 10
+    html_parser = Mock(spec=HTMLParser)
+    html_parser.parse.side_effect = lambda html, result: result.model_copy(update={"content": "Fresh Content"})
+    scraper = WebScraper(config=config, html_parser=html_parser, content_cache=cache, static_websites=["example.com"])
+    search_result = SearchResult(url=HttpUrl("https://example.com"), title="Example", content="Example website")
+    async with httpx.AsyncClient() as client:
+        client.get = AsyncMock(return_value=Mock(status_code=200, text="<html></html>", content=b"<html></html>", headers=httpx.Headers()))  # type: ignore[method-assign]
+        scraper.http_client = client
+        scraped_result = await scraper._fetch_and_parse_page(search_result)
+    assert scraped_result.content == "Fresh Content"
+    assert scraped_result.status == ResultStatus.Complete
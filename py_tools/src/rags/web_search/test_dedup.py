@@ -0,0 +1,52 @@
+import random
+from pathlib import Path
+import pytest
+from pydantic import HttpUrl
+from src.rags.web_search.config import ContentCacheConfig, DedupConfig
+from src.rags.web_search.content_cache import ContentCache
+from src.rags.web_search.dedup import NearDuplicateFilter, hamming, simhash
+from src.rags.web_search.search_result import ResultStatus, SearchResult
+
+WORDS = "goal match league season striker transfer coach club stadium fans injury derby title win loss draw".split()
+
+def article(seed: int, n_words: int = 300) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) + str(rng.randint(0, 50)) for _ in range(n_words))
+
+def make_result(url: str, content: str, status: ResultStatus = ResultStatus.Complete) -> SearchResult:
+    return SearchResult(url=HttpUrl(url), title=url, content=content, status=status)
+
+def test_simhash_is_close_for_near_duplicates() -> None:
+    text = article(1)
+    syndicated = "Reuters. " + text + " Share this article."
+    assert simhash(text) == simhash(text)
+    assert hamming(simhash(text), simhash(syndicated)) <= 3
+    assert hamming(simhash(text), simhash(article(2))) > 10
+
+@pytest.mark.asyncio
+async def test_collapse_keeps_best_ranked_copy() -> None:
+    text = article(1)
+    results = [
+        make_result("http://first.com/a", article(3)),
+        make_result("http://origin.com/story", text),
+        make_result("http://mirror.com/story", "Copied from origin. " + text),
+        make_result("http://short.com", "too short to fingerprint"),
+        make_result("http://snippet.com", text, status=ResultStatus.SnippetOnly),
+    ]
+    collapsed = await NearDuplicateFilter(DedupConfig()).collapse(results)
+    assert [str(r.url) for r in collapsed] == [
+        "http://first.com/a", "http://origin.com/story", "http://short.com/", "http://snippet.com/",
+    ]
+    assert [str(u) for u in collapsed[1].alternate_urls] == ["http://mirror.com/story"]
+    assert results[1].alternate_urls == []
+
+@pytest.mark.asyncio
+async def test_collapse_finds_duplicates_across_requests(tmp_path: Path) -> None:
+    cache = ContentCache(ContentCacheConfig(path=str(tmp_path / "cache.sqlite3")))
+    dedup = NearDuplicateFilter(DedupConfig(), content_cache=cache)
+    text = article(1)
+    first = await dedup.collapse([make_result("http://origin.com/story", text)])
+    assert first[0].alternate_urls == []
+    second = await dedup.collapse([make_result("http://mirror.com/story?utm_source=x", text + " Related: more")])
+    assert [str(u) for u in second[0].alternate_urls] == ["http://origin.com/story"]
+    await cache.close()
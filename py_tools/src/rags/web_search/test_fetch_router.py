@@ -0,0 +1,101 @@
+from pathlib import Path
+from typing import Optional
+import httpx
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+from pydantic import HttpUrl
+from src.rags.web_search.basic_html_parser import BasicHTMLParser
+from src.rags.web_search.config import FetchRouterConfig, SearchConfig
+from src.rags.web_search.fetch_router import FetchRouter
+from src.rags.web_search.fetcher_kind import FetcherKind
+from src.rags.web_search.search_result import ResultStatus, SearchResult
+from src.rags.web_search.web_scraper import WebScraper
+
+ARTICLE = "<html><body>" + "<p>" + "word " * 200 + "</p></body></html>"
+JS_SHELL = '<html><body><div id="root"></div><noscript>Please enable JavaScript</noscript></body></html>'
+
+@pytest.fixture
+def router(tmp_path: Path) -> FetchRouter:
+    return FetchRouter(FetchRouterConfig(min_words=50, min_samples=2, explore_every=3, stats_path=str(tmp_path / "stats.json")))
+
+@pytest.fixture
+def mock_config() -> Mock:
+    config = Mock(spec=SearchConfig)
+    config.user_agent = "Test User Agent"
+    config.timeout = 10
+    return config
+
+def test_needs_browser(router: FetchRouter) -> None:
+    assert not router.needs_browser(ARTICLE, "word " * 200)
+    assert router.needs_browser(ARTICLE, "word " * 10)
+    assert router.needs_browser(JS_SHELL, "")
+    # Shell markers next to enough rendered text do not escalate
+    assert not router.needs_browser(JS_SHELL + ARTICLE, "word " * 200)
+
+def test_learns_domains_that_need_a_browser(router: FetchRouter) -> None:
+    url = "https://www.spa.com/page"
+    assert router.choose(url) == FetcherKind.Static
+    for _ in range(2):
+        router.record(url, FetcherKind.Static, success=False, words=0, latency=0.1)
+        router.record(url, FetcherKind.Dynamic, success=True, words=500, latency=2.0)
+    assert router.choose("https://spa.com/other") == FetcherKind.Dynamic
+    router.record(url, FetcherKind.Dynamic, success=True, words=500, latency=2.0)
+    # Every explore_every-th page is still probed statically
+    assert router.choose(url) == FetcherKind.Static
+
+def test_render_websites_skip_static_tier(router: FetchRouter) -> None:
+    router.config.render_websites = ["twitter.com"]
+    assert router.choose("https://twitter.com/x") == FetcherKind.Dynamic
+
+def test_stats_persist_across_restarts(router: FetchRouter) -> None:
+    router.record("https://example.com/", FetcherKind.Static, success=True, words=300, latency=0.2)
+    router.save()
+    restarted = FetchRouter(router.config)
+    restarted.load()
+    assert restarted.domains["example.com"].static.avg_words == 300
+
+@pytest.mark.asyncio
+async def test_scraper_uses_static_tier_when_page_renders(router: FetchRouter, mock_config: Mock) -> None:
+    scraper = WebScraper(config=mock_config, html_parser=BasicHTMLParser(), fetch_router=router)
+    search_result = SearchResult(url=HttpUrl("https://example.com"), title="Example", content="Example website")
+    async with httpx.AsyncClient() as client:
+        client.get = AsyncMock(return_value=Mock(status_code=200, text=ARTICLE, content=ARTICLE.encode(), headers={}))  # type: ignore[method-assign]
+        with patch.object(WebScraper, "_fetch_and_parse_dynamic_page") as dynamic:
+            scraper.http_client = client
+            scraped_result = await scraper._fetch_and_parse_page(search_result)
+    dynamic.assert_not_called()
+    assert scraped_result.status == ResultStatus.Complete
+    assert router.domains["example.com"].static.successes == 1
+
+@pytest.mark.asyncio
+async def test_scraper_keeps_rendered_page_with_noscript_banner(router: FetchRouter, mock_config: Mock) -> None:
+    scraper = WebScraper(config=mock_config, html_parser=BasicHTMLParser(), fetch_router=router)
+    search_result = SearchResult(url=HttpUrl("https://example.com"), title="Example", content="Example website")
+    page = ARTICLE.replace("<body>", "<body><noscript>Please enable JavaScript</noscript>")
+    async with httpx.AsyncClient() as client:
+        client.get = AsyncMock(return_value=Mock(status_code=200, text=page, content=page.encode(), headers={}))  # type: ignore[method-assign]
+        with patch.object(WebScraper, "_fetch_and_parse_dynamic_page") as dynamic:
+            scraper.http_client = client
+            scraped_result = await scraper._fetch_and_parse_page(search_result)
+    dynamic.assert_not_called()
+    assert scraped_result.status == ResultStatus.Complete
+
+@pytest.mark.asyncio
+async def test_scraper_escalates_js_shell_to_browser(router: FetchRouter, mock_config: Mock) -> None:
+    scraper = WebScraper(config=mock_config, html_parser=BasicHTMLParser(), fetch_router=router)
+    search_result = SearchResult(url=HttpUrl("https://spa.com"), title="Example", content="Example website")
+
+    async def dynamic_page(self: WebScraper, search_result: SearchResult, timeout: Optional[float] = None) -> SearchResult:
+        assert search_result.content == "Example website"
+        search_result.content = "Rendered Content"
+        search_result.status = ResultStatus.Complete
+        return search_result
+
+    async with httpx.AsyncClient() as client:
+        client.get = AsyncMock(return_value=Mock(status_code=200, text=JS_SHELL, content=JS_SHELL.encode(), headers={}))  # type: ignore[method-assign]
+        with patch.object(WebScraper, "_fetch_and_parse_dynamic_page", dynamic_page):
+            scraper.http_client = client
+            scraped_result = await scraper._fetch_and_parse_page(search_result)
+    assert scraped_result.content == "Rendered Content"
+    assert router.domains["spa.com"].static.attempts == 1
+    assert router.domains["spa.com"].static.successes == 0
@@ -0,0 +1,76 @@
+import pickle
+import pytest
+from pydantic import HttpUrl
+from src.rags.web_search.lxml_html_parser import LxmlHTMLParser
+from src.rags.web_search.search_result import SearchResult
+
+PAGE = """
+<html><head><title>T</title><script>var x = 1;</script><style>p {}</style></head><body>
+<header><nav><a href="/">Home</a><a href="/about">About</a></nav></header>
+<div id="cookie-banner">We use cookies.</div>
+<div class="layout">
+  <aside class="sidebar"><p>Sidebar links that are long enough to count as text.</p></aside>
+  <article>
+    <h1>Main title</h1>
+    <p>First paragraph of the article body.</p>
+    <ul><li>Point one</li><li>Point <b>two</b></li></ul>
+    <div class="ad-slot">Buy now!</div>
+    <table><tr><th>a</th><th>b</th></tr><tr><td>1</td><td>2</td></tr></table>
+  </article>
+</div>
+<footer><p>Copyright footer text.</p></footer>
+</body></html>
+"""
+
+def make_result() -> SearchResult:
+    return SearchResult(url=HttpUrl("http://example.com"), title="Example", content="")
+
+def test_parse_extracts_main_content() -> None:
+    result = LxmlHTMLParser().parse(PAGE, make_result())
+    assert result.content == "Main title First paragraph of the article body. Point one Point two a | b 1 | 2"
+
+def test_parse_markdown() -> None:
+    result = LxmlHTMLParser(markdown=True).parse(PAGE, make_result())
+    assert result.content.split("\n") == [
+        "# Main title",
+        "First paragraph of the article body.",
+        "- Point one",
+        "- Point two",
+        "| a | b |",
+        "| 1 | 2 |",
+    ]
+
+def test_parse_picks_densest_container_without_article() -> None:
+    html = (
+        "<body><div class='menu-list'><p>Menu entry that should not be picked up here.</p></div>"
+        "<div><p>A short intro line that is long enough.</p></div>"
+        "<div id='content'><p>The real content paragraph number one is here.</p>"
+        "<p>The real content paragraph number two is here.</p></div></body>"
+    )
+    result = LxmlHTMLParser().parse(html, make_result())
+    assert result.content == "The real content paragraph number one is here. The real content paragraph number two is here."
+
+ARTICLE_TEXT = " ".join(f"Sentence number {i} of the article body." for i in range(20))
+
+@pytest.mark.parametrize("wrapper", [
+    "<div class='content-sidebar-wrap'><main><p>{}</p></main><div class='sidebar'><p>Sidebar text that is long enough.</p></div></div>",
+    "<div class='page has-sidebar'><div class='entry'><p>{}</p></div></div>",
+    "<div class='site-content with-related'><p>{}</p></div>",
+    "<div class='main-menu-open'><div role='main'><p>{}</p></div></div>",
+    "<div id='ad'><article><p>{}</p></article></div>",
+])
+def test_boilerplate_named_wrapper_keeps_content(wrapper: str) -> None:
+    result = LxmlHTMLParser().parse(f"<body>{wrapper.format(ARTICLE_TEXT)}</body>", make_result())
+    assert result.content == ARTICLE_TEXT
+
+def test_parse_without_blocks_falls_back_to_text() -> None:
+    result = LxmlHTMLParser().parse("<div>No paragraphs   here.</div>", make_result())
+    assert result.content == "No paragraphs here."
+
+def test_parse_empty() -> None:
+    assert LxmlHTMLParser().parse("", make_result()).content == ""
+
+def test_parser_is_picklable() -> None:
+    parser = pickle.loads(pickle.dumps(LxmlHTMLParser(markdown=True)))
+    assert parser.markdown
+    assert parser.parse("<p>Hello</p>", make_result()).content == "Hello"
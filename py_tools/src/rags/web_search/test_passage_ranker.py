@@ -0,0 +1,49 @@
+from pydantic import HttpUrl
+from src.rags.web_search.passage_ranker import PassageRanker, estimate_tokens
+from src.rags.web_search.search_params import PassageParams
+from src.rags.web_search.search_result import ResultStatus, SearchResult
+
+FILLER = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do"
+
+def make_result(url: str, content: str) -> SearchResult:
+    return SearchResult(url=HttpUrl(url), title=url, content=content)
+
+def test_score_prefers_rare_query_terms() -> None:
+    ranker = PassageRanker(PassageParams())
+    scores = ranker.score("python asyncio", [
+        "python python python " + FILLER,
+        "python asyncio event loop " + FILLER,
+        FILLER,
+        "python " + FILLER,
+    ])
+    assert scores.argmax() == 1
+    assert scores[2] == 0
+    assert scores[0] > scores[3]
+
+def test_rank_keeps_top_k_passages_in_order() -> None:
+    eight = " ".join(FILLER.split()[:8])
+    results = [
+        make_result("http://a.com", " ".join([FILLER, "asyncio tutorial " + eight, FILLER])),
+        make_result("http://b.com", FILLER + " " + FILLER),
+        make_result("http://c.com", " ".join([FILLER, FILLER, "asyncio semaphore " + eight])),
+    ]
+    ranker = PassageRanker(PassageParams(passage_words=10, top_k=2))
+    ranked = ranker.rank("asyncio semaphore", results)
+    assert [str(r.url) for r in ranked] == ["http://a.com/", "http://b.com/", "http://c.com/"]
+    assert ranked[0].content == "asyncio tutorial " + eight
+    assert ranked[2].content == "asyncio semaphore " + eight
+    # A page without a selected passage is kept and marked, not dropped
+    assert (ranked[1].content, ranked[1].status) == ("", ResultStatus.NoRelevantPassage)
+    assert ranked[0].status == results[0].status
+    assert results[0].content.startswith(FILLER)
+
+def test_rank_respects_token_budget() -> None:
+    results = [make_result("http://a.com", " ".join(["budget " + FILLER] * 10))]
+    passage_tokens = estimate_tokens("budget " + FILLER)
+    ranker = PassageRanker(PassageParams(passage_words=11, top_k=10, token_budget=3 * passage_tokens))
+    ranked = ranker.rank("budget", results)
+    assert ranked[0].content.count("budget") == 3
+
+def test_rank_without_content() -> None:
+    results = [make_result("http://a.com", "")]
+    assert PassageRanker(PassageParams()).rank("query", results) == results
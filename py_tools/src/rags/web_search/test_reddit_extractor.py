@@ -0,0 +1,36 @@
+import asyncio
+import asyncpraw
+import pytest
+from asyncpraw.models import MoreComments  # type: ignore[attr-defined]
+from typing import Iterable
+from unittest.mock import AsyncMock, Mock
+from src.rags.web_search.config import RedditConfig
+from src.rags.web_search.reddit_extractor import RedditExtractor, top_comments
+
+def comment(score: int, body: str, replies: Iterable[Mock] = ()) -> Mock:
+    return Mock(score=score, body=body, replies=list(replies))
+
+THREAD = [
+    comment(5, "a", [comment(50, "a.1", [comment(99, "a.1.1")]), comment(1, "a.2")]),
+    Mock(spec=MoreComments),
+    comment(20, "b"),
+    comment(5, "c", [comment(7, "c.1")]),
+]
+
+def test_top_comments_by_score_within_depth() -> None:
+    assert top_comments(THREAD, 3, max_depth=2) == [(0, 99, "a.1.1"), (1, 50, "a.1"), (2, 20, "b")]
+    assert top_comments(THREAD, 3, max_depth=0) == [(0, 20, "b"), (1, 5, "a"), (2, 5, "c")]
+    assert [body for _, _, body in top_comments(THREAD, 10, max_depth=1)] == ["a.1", "b", "c.1", "a", "c", "a.2"]
+    assert top_comments(THREAD, 0, max_depth=2) == []
+
+@pytest.mark.asyncio
+async def test_extract_shares_the_rate_limiter() -> None:
+    submission = Mock(title="Post", score=100, selftext="Text", comments=THREAD)
+    client = Mock(spec=asyncpraw.Reddit)
+    client.submission = AsyncMock(return_value=submission)
+    extractor = RedditExtractor(RedditConfig(max_comments=2, max_depth=1, requests_per_second=50, burst=1), client)
+    urls = [f"https://www.reddit.com/r/example/comments/{i}" for i in range(3)]
+    contents = await asyncio.gather(*(extractor.extract(url) for url in urls))
+    assert contents[0] == "Title: Post (Upvotes:100)\nContent: Text\nComments:\n0. (Upvotes:50) a.1\n1. (Upvotes:20) b\n"
+    assert extractor.rate_limiter.waited == 2
+    assert client.submission.await_count == 3
@@ -0,0 +1,75 @@
+import asyncio
+from typing import List, Tuple
+
+import pytest
+from src.rags.web_search.fetcher_kind import FetcherKind
+from src.rags.web_search.scheduler import FetchScheduler
+
+def make_scheduler(max_concurrent: int = 10, max_per_host: int = 10, static: int = 10, dynamic: int = 10, reddit: int = 10) -> FetchScheduler:
+    return FetchScheduler(
+        max_concurrent=max_concurrent,
+        max_per_host=max_per_host,
+        pool_limits={FetcherKind.Static: static, FetcherKind.Dynamic: dynamic, FetcherKind.Reddit: reddit},
+    )
+
+async def run_fetches(scheduler: FetchScheduler, fetches: List[Tuple[FetcherKind, str]]) -> int:
+    running = 0
+    peak = 0
+
+    async def fetch(kind: FetcherKind, url: str) -> None:
+        nonlocal running, peak
+        async with scheduler.slot(kind, url):
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*(fetch(kind, url) for kind, url in fetches))
+    return peak
+
+@pytest.mark.asyncio
+async def test_global_cap() -> None:
+    scheduler = make_scheduler(max_concurrent=3)
+    peak = await run_fetches(scheduler, [(FetcherKind.Static, f"http://host{i}.com/") for i in range(10)])
+    assert peak == 3
+    stats = scheduler.stats()
+    assert stats.total.completed == 10
+    assert stats.total.max_queued == 7
+    assert stats.total.queued == 0
+    assert stats.total.in_flight == 0
+    assert stats.total.max_wait_seconds > 0
+
+@pytest.mark.asyncio
+async def test_per_host_cap() -> None:
+    scheduler = make_scheduler(max_per_host=2)
+    peak = await run_fetches(scheduler, [(FetcherKind.Static, f"http://same.com/{i}") for i in range(6)])
+    assert peak == 2
+    assert scheduler.stats().hosts_in_flight == {}
+
+@pytest.mark.asyncio
+async def test_pool_caps_are_separate() -> None:
+    scheduler = make_scheduler(dynamic=1)
+    fetches = [(FetcherKind.Dynamic, f"http://d{i}.com/") for i in range(3)]
+    fetches += [(FetcherKind.Static, f"http://s{i}.com/") for i in range(3)]
+    peak = await run_fetches(scheduler, fetches)
+    assert peak == 4
+    stats = scheduler.stats()
+    assert stats.pools[FetcherKind.Dynamic].completed == 3
+    assert stats.pools[FetcherKind.Dynamic].max_wait_seconds > 0
+    assert stats.pools[FetcherKind.Reddit].completed == 0
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_releases_queue() -> None:
+    scheduler = make_scheduler(max_concurrent=1)
+    async with scheduler.slot(FetcherKind.Static, "http://a.com/"):
+        waiter = asyncio.create_task(run_fetches(scheduler, [(FetcherKind.Static, "http://b.com/")]))
+        await asyncio.sleep(0.001)
+        assert scheduler.stats().total.queued == 1
+        # b.com holds its host slot but waits for the global one, so it is not in flight
+        assert scheduler.stats().hosts_in_flight == {"a.com": 1, "b.com": 0}
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+    stats = scheduler.stats()
+    assert stats.total.queued == 0
+    assert stats.hosts_in_flight == {}
@@ -1,11 +1,15 @@
 import asyncio
+from typing import AsyncIterator, List, Optional, Tuple
 import pytest
 from unittest.mock import AsyncMock, MagicMock
+from src.rags.web_search.config import DedupConfig
+from src.rags.web_search.dedup import NearDuplicateFilter
+from src.rags.web_search.search_events import DuplicatesEvent, ResultEvent, SnippetsEvent
 from src.rags.web_search.search_rag import SearchRAG
 from src.rags.web_search.search_engine import SearchEngine
 from src.rags.web_search.web_scraper import WebScraper
-from src.rags.web_search.search_params import SearchParams
-from src.rags.web_search.search_result import SearchResult
+from src.rags.web_search.search_params import PassageParams, SearchParams
+from src.rags.web_search.search_result import ResultStatus, SearchResult
 from pydantic import HttpUrl
 
 @pytest.fixture
@@ -39,4 +43,147 @@ async def test_search_and_retrieve(mock_search_engine, mock_web_scraper, mock_se
     mock_search_engine.search.assert_called_once_with(mock_search_params)
     mock_web_scraper.scrape.assert_called_once_with([
         SearchResult(url=HttpUrl("http://example.com"), title="Example", content="Example website")
-    ])
\ No newline at end of file
+    ], deadline=None)
+
+@pytest.mark.asyncio
+async def test_search_and_retrieve_stream(mock_search_engine, mock_web_scraper, mock_search_params):
+    async def scrape_iter(search_results, deadline=None):
+        for i, result in enumerate(search_results):
+            result.content = "Parsed Content"
+            yield i, result
+
+    mock_web_scraper.scrape_iter = scrape_iter
+    search_rag = SearchRAG(search_engine=mock_search_engine, web_scraper=mock_web_scraper)
+    events = [event async for event in search_rag.search_and_retrieve_stream(mock_search_params)]
+    assert [event.type for event in events] == ["snippets", "result", "summary"]
+    assert events[0].results[0].content == "Example website"
+    assert events[1].index == 0
+    assert events[1].result.content == "Parsed Content"
+    assert events[2].num_results == 1
+
+
+@pytest.mark.asyncio
+async def test_search_and_retrieve_passes_remaining_deadline(mock_search_engine, mock_web_scraper, mock_search_params):
+    search_rag = SearchRAG(search_engine=mock_search_engine, web_scraper=mock_web_scraper, default_deadline=5)
+    await search_rag.search_and_retrieve(mock_search_params)
+    assert 0 < mock_web_scraper.scrape.call_args.kwargs["deadline"] <= 5
+    await search_rag.search_and_retrieve(mock_search_params, deadline=1)
+    assert 0 < mock_web_scraper.scrape.call_args.kwargs["deadline"] <= 1
+
+@pytest.mark.asyncio
+async def test_search_and_retrieve_bounds_the_search(mock_search_engine, mock_web_scraper, mock_search_params):
+    async def search(params):
+        await asyncio.sleep(10)
+        return []
+
+    mock_search_engine.search = AsyncMock(side_effect=search)
+    mock_web_scraper.scrape = AsyncMock(return_value=[])
+    search_rag = SearchRAG(search_engine=mock_search_engine, web_scraper=mock_web_scraper)
+    results = await asyncio.wait_for(search_rag.search_and_retrieve(mock_search_params, deadline=0.05), 1)
+    assert results == []
+    assert mock_web_scraper.scrape.call_args.args[0] == []
+    assert mock_web_scraper.scrape.call_args.kwargs["deadline"] == 0
+
+@pytest.mark.asyncio
+async def test_batch_search_scrapes_shared_pages_once(mock_search_engine, mock_web_scraper):
+    shared = "http://example.com/a?utm_source=x"
+    results_by_query = {
+        "first": [
+            SearchResult(url=HttpUrl("http://example.com/a"), title="A", content="Snippet A1"),
+            SearchResult(url=HttpUrl("http://example.com/b"), title="B", content="Snippet B"),
+        ],
+        "second": [
+            SearchResult(url=HttpUrl(shared), title="A", content="Snippet A2"),
+            SearchResult(url=HttpUrl("http://example.com/c"), title="C", content="Snippet C"),
+        ],
+    }
+    mock_search_engine.search = AsyncMock(side_effect=lambda params: results_by_query[params.query])
+
+    async def scrape(search_results, deadline=None):
+        scraped = []
+        for result in search_results:
+            if result.title == "C":
+                scraped.append(result.model_copy(update={"status": ResultStatus.TimedOut}))
+            else:
+                scraped.append(result.model_copy(update={"content": f"Page {result.title}", "status": ResultStatus.Complete}))
+        return scraped
+
+    mock_web_scraper.scrape = AsyncMock(side_effect=scrape)
+    search_rag = SearchRAG(search_engine=mock_search_engine, web_scraper=mock_web_scraper)
+    batch = await search_rag.batch_search_and_retrieve([SearchParams(query="first"), SearchParams(query="second")])
+
+    scraped_urls = [str(r.url) for r in mock_web_scraper.scrape.call_args.args[0]]
+    assert scraped_urls == ["http://example.com/a", "http://example.com/b", "http://example.com/c"]
+    assert [[r.content for r in results] for results in batch.results] == [["Page A", "Page B"], ["Page A", "Snippet C"]]
+    assert str(batch.results[1][0].url) == shared
+    assert batch.results[1][1].status == ResultStatus.TimedOut
+    assert batch.total_results == 4
+    assert batch.unique_pages == 3
+    assert batch.overlap_ratio == 0.25
+
+@pytest.mark.asyncio
+async def test_search_and_retrieve_ranks_passages(mock_search_engine, mock_web_scraper):
+    content = " ".join(["unrelated words here"] * 10 + ["the test passage"] + ["unrelated words here"] * 10)
+    mock_web_scraper.scrape = AsyncMock(return_value=[
+        SearchResult(url=HttpUrl("http://example.com"), title="Example", content=content)
+    ])
+    search_rag = SearchRAG(search_engine=mock_search_engine, web_scraper=mock_web_scraper)
+    results = await search_rag.search_and_retrieve(
+        SearchParams(query="test"), passages=PassageParams(passage_words=10, top_k=1)
+    )
+    assert len(results) == 1
+    assert "test" in results[0].content.split()
+    assert len(results[0].content.split()) == 10
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_requests_are_coalesced(mock_search_engine, mock_web_scraper, mock_search_params):
+    async def search(params):
+        await asyncio.sleep(0.01)
+        return [SearchResult(url=HttpUrl("http://example.com"), title="Example", content="Example website")]
+
+    mock_search_engine.search = AsyncMock(side_effect=search)
+    search_rag = SearchRAG(search_engine=mock_search_engine, web_scraper=mock_web_scraper)
+    first, second = await asyncio.gather(
+        search_rag.search_and_retrieve(mock_search_params),
+        search_rag.search_and_retrieve(SearchParams(query="test", num_results=10)),
+    )
+    assert mock_search_engine.search.call_count == 1
+    assert mock_web_scraper.scrape.call_count == 1
+    assert first == second
+    assert first[0] is not second[0]
+
+@pytest.mark.asyncio
+async def test_stream_collapses_duplicates_like_search_and_retrieve(mock_search_engine: MagicMock, mock_web_scraper: MagicMock, mock_search_params: SearchParams) -> None:
+    text = " ".join(f"word{i}" for i in range(100))
+    pages = {"http://origin.com/": text, "http://mirror.com/": "Copied. " + text, "http://other.com/": text[::-1]}
+    mock_search_engine.search = AsyncMock(side_effect=lambda params: [
+        SearchResult(url=HttpUrl(url), title=url, content="snippet") for url in pages
+    ])
+
+    def scraped(result: SearchResult) -> SearchResult:
+        return result.model_copy(update={"content": pages[str(result.url)], "status": ResultStatus.Complete})
+
+    async def scrape(search_results: List[SearchResult], deadline: Optional[float] = None) -> List[SearchResult]:
+        return [scraped(r) for r in search_results]
+
+    async def scrape_iter(search_results: List[SearchResult], deadline: Optional[float] = None) -> AsyncIterator[Tuple[int, SearchResult]]:
+        for i in reversed(range(len(search_results))):
+            yield i, scraped(search_results[i])
+
+    mock_web_scraper.scrape = AsyncMock(side_effect=scrape)
+    mock_web_scraper.scrape_iter = scrape_iter
+    search_rag = SearchRAG(search_engine=mock_search_engine, web_scraper=mock_web_scraper, dedup=NearDuplicateFilter(DedupConfig()))
+    expected = await search_rag.search_and_retrieve(mock_search_params)
+    events = [event async for event in search_rag.search_and_retrieve_stream(mock_search_params)]
+    assert [event.type for event in events] == ["snippets", "result", "result", "result", "duplicates", "summary"]
+    snippets, *scraped_events, duplicates, _ = events
+    assert isinstance(snippets, SnippetsEvent) and isinstance(duplicates, DuplicatesEvent)
+    results = list(snippets.results)
+    for event in scraped_events:
+        assert isinstance(event, ResultEvent)
+        results[event.index] = event.result
+    for i, urls in duplicates.alternate_urls.items():
+        results[i] = results[i].model_copy(update={"alternate_urls": urls})
+    streamed = [r for i, r in enumerate(results) if i not in duplicates.dropped]
+    assert [str(r.url) for r in streamed] == ["http://origin.com/", "http://other.com/"]
+    assert streamed == expected
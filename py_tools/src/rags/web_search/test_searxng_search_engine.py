@@ -1,9 +1,13 @@
+import asyncio
+from typing import Any, List
+
 import pytest
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
 from src.rags.web_search.searxng_search_engine import SearxngSearchEngine
-from src.rags.web_search.search_params import SearchParams
+from src.rags.web_search.search_params import SearchParams, SearchTimeRange
+from src.rags.web_search.search_results_cache import SearchResultsCache
 from src.rags.web_search.search_result import SearchResult
-from src.rags.web_search.config import SearxngConfig
+from src.rags.web_search.config import SearxngConfig, SearchResultsCacheConfig
 import httpx
 from pydantic import HttpUrl
 
@@ -15,6 +19,7 @@ def mock_config():
     config.max_pages = 2
     config.timeout = 10
     config.user_agent = "Test User Agent"
+    config.lazy_paging = False
     return config
 
 @pytest.mark.asyncio
@@ -56,4 +61,80 @@ async def test_search_http_error(mock_config):
     search_engine._fetch_page = AsyncMock(side_effect=httpx.HTTPError("Server Error"))
     
     with pytest.raises(httpx.HTTPError):
-        await search_engine.search(search_params)
\ No newline at end of file
+        await search_engine.search(search_params)
+
+def page_of(*urls):
+    return [SearchResult(url=HttpUrl(url), title="Example", content="Example content") for url in urls]
+
+@pytest.mark.asyncio
+async def test_lazy_paging_stops_when_enough_results(mock_config):
+    mock_config.lazy_paging = True
+    mock_config.max_pages = 3
+    search_engine = SearxngSearchEngine(config=mock_config)
+    search_engine._fetch_page = AsyncMock(side_effect=[
+        page_of("http://a.com", "http://b.com"),
+        page_of("http://b.com/?utm_source=x", "http://c.com"),
+        page_of("http://d.com"),
+    ])
+    results = await search_engine.search(SearchParams(query="test", num_results=3))
+    assert [str(r.url) for r in results] == ["http://a.com/", "http://b.com/", "http://c.com/"]
+    assert search_engine._fetch_page.call_count == 2
+
+@pytest.mark.asyncio
+async def test_lazy_paging_stops_on_empty_page(mock_config):
+    mock_config.lazy_paging = True
+    mock_config.max_pages = 3
+    search_engine = SearxngSearchEngine(config=mock_config)
+    search_engine._fetch_page = AsyncMock(side_effect=[page_of("http://a.com"), []])
+    results = await search_engine.search(SearchParams(query="test", num_results=3))
+    assert len(results) == 1
+    assert search_engine._fetch_page.call_count == 2
+
+@pytest.mark.asyncio
+async def test_results_cache_reuses_identical_queries(mock_config):
+    results_cache = SearchResultsCache(SearchResultsCacheConfig())
+    search_engine = SearxngSearchEngine(config=mock_config, results_cache=results_cache)
+    search_engine._fetch_page = AsyncMock(return_value=page_of("http://a.com", "http://b.com"))
+    first = await search_engine.search(SearchParams(query="test", num_results=2))
+    first[0].content = "scraped content"
+    second = await search_engine.search(SearchParams(query="Test ", num_results=2))
+    assert search_engine._fetch_page.call_count == mock_config.max_pages
+    assert [r.url for r in second] == [r.url for r in first]
+    assert second[0].content == "Example content"
+    await search_engine.search(SearchParams(query="test", num_results=2, website="a.com"))
+    assert search_engine._fetch_page.call_count == 2 * mock_config.max_pages
+
+@pytest.mark.asyncio
+async def test_coalesced_page_outlives_the_search_that_started_it(mock_config: Any) -> None:
+    mock_config.max_pages = 1
+    search_engine = SearxngSearchEngine(config=mock_config)
+    posts: List[str] = []
+
+    class Transport(httpx.MockTransport):
+        closed = False
+
+        async def aclose(self) -> None:
+            self.closed = True
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        posts.append(str(request.url))
+        await asyncio.sleep(0.05)
+        assert not transport.closed
+        return httpx.Response(200, json={"results": [{"url": "http://a.com", "title": "A", "content": "Example content"}]})
+
+    transport = Transport(handler)
+    real_client = httpx.AsyncClient
+    with patch("httpx.AsyncClient", lambda: real_client(transport=transport)):
+        leader = asyncio.create_task(search_engine.search(SearchParams(query="test", num_results=1)))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(search_engine.search(SearchParams(query="test", num_results=1)))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        results = await follower
+    assert [str(r.url) for r in results] == ["http://a.com/"]
+    assert len(posts) == 1
+
+def test_results_cache_ttl_depends_on_time_range():
+    results_cache = SearchResultsCache(SearchResultsCacheConfig())
+    assert results_cache.ttl_for(SearchTimeRange.Day) < results_cache.ttl_for(SearchTimeRange.Month)
+    assert results_cache.ttl_for(SearchTimeRange.Year) < results_cache.ttl_for(None)
@@ -1,13 +1,17 @@
 import asyncio
+import threading
+from typing import Any, List, Optional
 from crawl4ai import AsyncWebCrawler
 import httpx
 from pydantic import HttpUrl
 import pytest
-from unittest.mock import AsyncMock, Mock
+from unittest.mock import AsyncMock, Mock, patch
+from src.rags.executors import ExecutorConfig, Executors
 from src.rags.web_search.web_scraper import WebScraper
-from src.rags.web_search.search_result import SearchResult
+from src.rags.web_search.search_result import ResultStatus, SearchResult
 from src.rags.web_search.config import SearchConfig
 from src.rags.web_search.html_parser import HTMLParser
+from src.rags.web_search.reddit_extractor import RedditExtractor
 import asyncpraw
 
 def raise_(ex):
@@ -18,6 +22,7 @@ def mock_config():
     config = Mock(spec=SearchConfig)
     config.user_agent = "Test User Agent"
     config.timeout = 10
+    config.coalesce_window = 5.0
     return config
 
 @pytest.fixture
@@ -94,3 +99,177 @@ async def test_scrape_reddit_page(mock_config, mock_html_parser):
     assert len(scraped_results) == 1
     assert scraped_results[0].content == "Title: Example Reddit Post (Upvotes:100)\nContent: Example selftext\nComments:\n0. (Upvotes:10) Comment 1\n1. (Upvotes:5) Comment 2\n"
     mock_html_parser.parse.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_scrape_reddit_page_with_comment_budget(mock_config, mock_html_parser):
+    extractor = Mock(spec=RedditExtractor)
+    extractor.extract = AsyncMock(return_value="Title: Example Reddit Post (Upvotes:100)\n")
+    scraper = WebScraper(config=mock_config, html_parser=mock_html_parser, reddit_extractor=extractor)
+    search_results = [
+        SearchResult(url=HttpUrl("https://www.reddit.com/r/example/comments/123"), title="Example", content="Example website")
+    ]
+    scraped_results = await scraper.scrape(search_results)
+    assert scraped_results[0].status == ResultStatus.Complete
+    assert scraped_results[0].content == "Title: Example Reddit Post (Upvotes:100)\n"
+    extractor.extract.assert_awaited_once_with("https://www.reddit.com/r/example/comments/123")
+
+@pytest.mark.asyncio
+async def test_scrape_iter_yields_in_completion_order(mock_config, mock_html_parser):
+    scraper = WebScraper(config=mock_config, html_parser=mock_html_parser)
+    delays = {"http://slow.com/": 0.05, "http://fast.com/": 0.0}
+
+    async def fetch_and_parse_page(self, search_result, end=None):
+        await asyncio.sleep(delays[str(search_result.url)])
+        search_result.content = "Parsed Content"
+        return search_result
+
+    search_results = [
+        SearchResult(url=HttpUrl("http://slow.com"), title="Slow", content="Slow website"),
+        SearchResult(url=HttpUrl("http://fast.com"), title="Fast", content="Fast website"),
+    ]
+    with patch.object(WebScraper, "_fetch_and_parse_page", fetch_and_parse_page):
+        order = [i async for i, _ in scraper.scrape_iter(search_results)]
+        scraped_results = await scraper.scrape(search_results)
+    assert order == [1, 0]
+    assert [r.title for r in scraped_results] == ["Slow", "Fast"]
+
+
+@pytest.mark.asyncio
+async def test_scrape_deadline_returns_partial_results(mock_config, mock_html_parser):
+    scraper = WebScraper(config=mock_config, html_parser=mock_html_parser)
+    cancelled = []
+
+    async def fetch_and_parse_page(self, search_result, end=None):
+        try:
+            if "slow" in str(search_result.url):
+                await asyncio.sleep(10)
+            search_result.content = "Parsed Content"
+            search_result.status = ResultStatus.Complete
+            return search_result
+        except asyncio.CancelledError:
+            cancelled.append(str(search_result.url))
+            raise
+
+    search_results = [
+        SearchResult(url=HttpUrl("http://slow.com"), title="Slow", content="Slow snippet"),
+        SearchResult(url=HttpUrl("http://fast.com"), title="Fast", content="Fast snippet"),
+    ]
+    with patch.object(WebScraper, "_fetch_and_parse_page", fetch_and_parse_page):
+        scraped_results = await scraper.scrape(search_results, deadline=0.05)
+    assert cancelled == ["http://slow.com/"]
+    assert scraped_results[0].content == "Slow snippet"
+    assert scraped_results[0].status == ResultStatus.TimedOut
+    assert scraped_results[1].content == "Parsed Content"
+    assert scraped_results[1].status == ResultStatus.Complete
+
+@pytest.mark.asyncio
+async def test_crawl_timeout_is_cut_to_the_deadline(mock_config, mock_html_parser):
+    mock_config.coalesce_window = 0.01
+    scraper = WebScraper(config=mock_config, html_parser=mock_html_parser)
+    timeouts = []
+
+    async def fetch_dynamic(self, search_result, timeout=None):
+        timeouts.append(timeout)
+        return search_result
+
+    with patch.object(WebScraper, "_fetch_and_parse_dynamic_page", fetch_dynamic):
+        await scraper.scrape([SearchResult(url=HttpUrl("http://example.com"), title="Example", content="")], deadline=2)
+        await scraper.scrape([SearchResult(url=HttpUrl("http://example.com"), title="Example", content="")])
+    # Cut to the end of the coalescing window the deadline falls in
+    assert 0 < timeouts[0] <= 2 + mock_config.coalesce_window
+    assert timeouts[1] == mock_config.timeout
+
+@pytest.mark.asyncio
+async def test_scrape_failed_page_is_snippet_only(mock_config, mock_html_parser):
+    scraper = WebScraper(config=mock_config, html_parser=mock_html_parser)
+    search_result = SearchResult(url=HttpUrl("http://example.com"), title="Example", content="Example website")
+
+    class FailingCrawler:
+        async def __aenter__(self):
+            raise RuntimeError("no browser")
+
+        async def __aexit__(self, *exc):
+            return False
+
+    scraped_result = await scraper._fetch_and_parse_dynamic_page(search_result, CrawlerClass=FailingCrawler)
+    assert scraped_result.status == ResultStatus.SnippetOnly
+    assert scraped_result.content == "Example website"
+
+@pytest.mark.asyncio
+async def test_scrape_parses_off_the_event_loop(mock_config, mock_html_parser):
+    executors = Executors(ExecutorConfig(cpu_workers=0, loop_lag_interval=0))
+    scraper = WebScraper(config=mock_config, html_parser=mock_html_parser, executors=executors)
+    threads = []
+
+    def parse(html, search_result):
+        threads.append(threading.current_thread())
+        search_result.content = html
+        return search_result
+
+    mock_html_parser.parse.side_effect = parse
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, text="<p>Parsed</p>"))
+    async with httpx.AsyncClient(transport=transport) as client:
+        result = await scraper._fetch_and_parse_static_page(
+            client, SearchResult(url=HttpUrl("http://example.com"), title="Example", content="")
+        )
+    assert result.content == "<p>Parsed</p>"
+    assert result.status == ResultStatus.Complete
+    assert threads and threads[0] is not threading.main_thread()
+    assert executors.stats()["pools"]["io"]["completed"] == 1
+    await executors.close()
+
+@pytest.mark.asyncio
+async def test_concurrent_fetches_of_one_url_are_coalesced(mock_config, mock_html_parser):
+    scraper = WebScraper(config=mock_config, html_parser=mock_html_parser, static_websites=["example.com"])
+    fetches = 0
+
+    async def fetch_static(self, client, search_result, cached=None, tiered=False, timeout=None):
+        nonlocal fetches
+        fetches += 1
+        await asyncio.sleep(0.01)
+        search_result.content = "Parsed"
+        search_result.status = ResultStatus.Complete
+        return search_result
+
+    results = [
+        SearchResult(url=HttpUrl("http://example.com/a?utm_source=x"), title="One", content="Snippet one"),
+        SearchResult(url=HttpUrl("http://example.com/a"), title="Two", content="Snippet two"),
+    ]
+    with patch.object(WebScraper, "_fetch_and_parse_static_page", fetch_static):
+        scraped = await asyncio.gather(*(scraper._fetch_and_parse_page(r) for r in results))
+    assert fetches == 1
+    assert [(r.title, r.content, r.status) for r in scraped] == [
+        ("One", "Parsed", ResultStatus.Complete), ("Two", "Parsed", ResultStatus.Complete),
+    ]
+    assert scraper.inflight.stats()["coalesced"] == 1
+
+@pytest.mark.asyncio
+async def test_coalesced_fetch_outlives_the_caller_that_started_it(mock_config: Mock, mock_html_parser: Mock) -> None:
+    # A window wide enough that both deadlines fall in it
+    mock_config.coalesce_window = 3600.0
+    scraper = WebScraper(config=mock_config, html_parser=mock_html_parser, static_websites=["example.com"])
+    fetched: List[SearchResult] = []
+    timeouts: List[Optional[float]] = []
+
+    async def fetch_static(self: WebScraper, client: httpx.AsyncClient, search_result: SearchResult, cached: Any = None, tiered: bool = False, timeout: Optional[float] = None) -> SearchResult:
+        fetched.append(search_result)
+        timeouts.append(timeout)
+        await asyncio.sleep(0.05)
+        assert not client.is_closed
+        search_result.content = "Parsed"
+        search_result.status = ResultStatus.Complete
+        return search_result
+
+    leader = SearchResult(url=HttpUrl("http://example.com/a"), title="Leader", content="Leader snippet")
+    follower = SearchResult(url=HttpUrl("http://example.com/a"), title="Follower", content="Follower snippet")
+    with patch.object(WebScraper, "_fetch_and_parse_static_page", fetch_static):
+        leading = asyncio.create_task(scraper.scrape([leader], deadline=0.01))
+        await asyncio.sleep(0)
+        followed = await scraper.scrape([follower], deadline=2)
+        led = await leading
+    assert (led[0].content, led[0].status) == ("Leader snippet", ResultStatus.TimedOut)
+    assert (followed[0].title, followed[0].content, followed[0].status) == ("Follower", "Parsed", ResultStatus.Complete)
+    assert len(fetched) == 1
+    # The shared fetch is not cut to the deadline of the caller that started it
+    assert timeouts[0] is not None and timeouts[0] > 1
+    assert fetched[0] is not leader and fetched[0] is not follower
@@ -1,82 +1,345 @@
 import asyncio
+import math
+import time
 import traceback
 import httpx
+from contextlib import nullcontext
 from playwright.async_api import async_playwright
-from crawl4ai import AsyncWebCrawler
+from crawl4ai import AsyncWebCrawler, CrawlResult  # type: ignore[import-untyped]
 
-from typing import List, Optional, Type
-from pydantic import BaseModel, ConfigDict, Field
-from src.rags.web_search.search_result import SearchResult
+from typing import AsyncContextManager, AsyncIterator, List, Optional, Tuple, Type
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
+from src.rags.web_search.search_result import ResultStatus, SearchResult
 from src.rags.web_search.html_parser import HTMLParser
 from src.rags.web_search.config import SearchConfig
+from src.rags.web_search.browser_pool import BrowserPool
+from src.rags.web_search.scheduler import FetchScheduler
+from src.rags.web_search.fetcher_kind import FetcherKind
+from src.rags.web_search.content_cache import CachedPage, ContentCache
+from src.rags.web_search.fetch_router import FetchRouter
+from src.rags.executors import Executors
+from src.rags.metrics import FETCH_RESULTS, FETCHED_BYTES, track, timed
+from src.rags.tracing import span
+from src.rags.single_flight import SingleFlight
+from src.rags.web_search.reddit_extractor import RedditExtractor, format_reddit_submission
+from src.rags.web_search.url_utils import normalize_url
 import asyncpraw
 
+
 class WebScraper(BaseModel):
     """Handles fetching and parsing of web pages."""
     config: SearchConfig
     html_parser: HTMLParser
     reddit_client: Optional[asyncpraw.Reddit] = None
+    reddit_extractor: Optional[RedditExtractor] = None
+    browser_pool: Optional[BrowserPool] = None
+    scheduler: Optional[FetchScheduler] = None
+    content_cache: Optional[ContentCache] = None
+    fetch_router: Optional[FetchRouter] = None
+    http_client: Optional[httpx.AsyncClient] = None
+    executors: Optional[Executors] = None
     static_websites: List[str] = Field(default=[])
     reddit_prefix: str = Field(default="https://www.reddit.com")
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
+    _inflight: SingleFlight[Tuple[str, Optional[float]], SearchResult] = PrivateAttr(default_factory=SingleFlight)
+
+    @property
+    def inflight(self) -> SingleFlight[Tuple[str, Optional[float]], SearchResult]:
+        return self._inflight
 
-    async def scrape(self, search_results: List[SearchResult], http_async_client: Optional[httpx.AsyncClient] = None) -> List[SearchResult]:
-        """Scrapes a list of search results asynchronously."""
-        if http_async_client is None:
-            http_async_client = httpx.AsyncClient()
-        tasks = [self._fetch_and_parse_page(http_async_client, result) for result in search_results]
-        res = await asyncio.gather(*tasks)
-        await http_async_client.aclose()
+    async def scrape(self, search_results: List[SearchResult], deadline: Optional[float] = None) -> List[SearchResult]:
+        """Scrapes a list of search results asynchronously, within `deadline` seconds if given."""
+        res = list(search_results)
+        async for i, result in self.scrape_iter(search_results, deadline):
+            res[i] = result
         return res
 
-    async def _fetch_and_parse_page(self, client: httpx.AsyncClient, search_result: SearchResult) -> SearchResult:
-        """Fetches a single page and parses it."""
+    async def scrape_iter(self, search_results: List[SearchResult], deadline: Optional[float] = None) -> AsyncIterator[Tuple[int, SearchResult]]:
+        """Scrapes search results concurrently, yielding (index, result) as each page completes.
+
+        When `deadline` seconds pass, the pages still running are cancelled and
+        yielded last with their search snippet and a timed out status. Pages still
+        running when the consumer stops iterating are cancelled too.
+        """
+        loop = asyncio.get_running_loop()
+        end = None if deadline is None else loop.time() + deadline
+        tasks = {
+            asyncio.ensure_future(self._fetch_and_parse_indexed(i, result, end)): i
+            for i, result in enumerate(search_results)
+        }
+        pending = set(tasks)
+        try:
+            while pending:
+                timeout = None if end is None else max(end - loop.time(), 0)
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            # Wait for cancelled fetches so their scheduler slots and browser pages are freed
+            await asyncio.gather(*pending, return_exceptions=True)
+        for task in sorted(pending, key=tasks.__getitem__):
+            i = tasks[task]
+            result = search_results[i]
+            if result.status != ResultStatus.Complete:
+                result.status = ResultStatus.TimedOut
+            yield i, result
+
+    async def _fetch_and_parse_indexed(self, i: int, search_result: SearchResult, end: Optional[float] = None) -> Tuple[int, SearchResult]:
+        return i, await self._fetch_and_parse_page(search_result, end)
+
+    def _timeout(self, end: Optional[float]) -> float:
+        """The timeout of one fetch: the configured one, cut to the time left until `end` on the loop clock."""
+        if end is None:
+            return self.config.timeout
+        return max(min(self.config.timeout, end - asyncio.get_running_loop().time()), 0.0)
+
+    def _fetcher_kind(self, search_result: SearchResult) -> FetcherKind:
         url_str = str(search_result.url)
-        if any(site in url_str for site in self.static_websites):
-            return await self._fetch_and_parse_static_page(client, search_result)
-        elif url_str.startswith(self.reddit_prefix) and self.reddit_client is not None:
-            return await self._fetch_and_parse_reddit_page(search_result)
+        if self._is_forced_static(search_result):
+            return FetcherKind.Static
+        elif url_str.startswith(self.reddit_prefix) and (self.reddit_client is not None or self.reddit_extractor is not None):
+            return FetcherKind.Reddit
+        elif self.fetch_router is not None:
+            return self.fetch_router.choose(url_str)
         else:
-            return await self._fetch_and_parse_dynamic_page(search_result)
+            return FetcherKind.Dynamic
+
+    def _is_forced_static(self, search_result: SearchResult) -> bool:
+        url_str = str(search_result.url)
+        return any(site in url_str for site in self.static_websites)
+
+    async def _fetch_and_parse_page(self, search_result: SearchResult, end: Optional[float] = None) -> SearchResult:
+        """Fetches a single page and parses it, sharing the work with concurrent fetches of the same url.
+
+        Callers whose deadlines `end` in the same `coalesce_window` share one
+        fetch, which runs until the end of that window, so it never gives up
+        before any of them; each caller stops waiting at its own `end`. The shared
+        work runs on a fresh copy of the result and only uses resources owned by
+        the scraper, so it does not depend on the caller that started it still
+        being there. Each caller copies the outcome into its own result.
+        """
+        shared_end = self._shared_end(end)
+        key = (normalize_url(str(search_result.url)), shared_end)
+        fresh = search_result.model_copy()
+        with span("page", url=str(search_result.url)) as page:
+            try:
+                result = await asyncio.wait_for(
+                    self._inflight.do(key, lambda: self._fetch_and_parse_page_once(fresh, shared_end)),
+                    None if end is None else max(end - asyncio.get_running_loop().time(), 0),
+                )
+                status = result.status
+            except asyncio.TimeoutError:
+                status = ResultStatus.TimedOut
+            if page is not None:
+                page.attributes["status"] = status.value
+        if status == ResultStatus.Complete:
+            search_result.content = result.content
+        search_result.status = status
+        FETCH_RESULTS.labels(self._fetcher_kind(search_result).value, status.value).inc()
+        return search_result
 
-    async def _fetch_and_parse_dynamic_page(self, search_result: SearchResult, CrawlerClass: Type[AsyncWebCrawler] = AsyncWebCrawler) -> SearchResult:
-        """Fetches and parses a dynamic page using Playwright."""
+    def _shared_end(self, end: Optional[float]) -> Optional[float]:
+        """The end of the `coalesce_window` that `end` falls in, on the loop clock."""
+        if end is None:
+            return None
+        window = self.config.coalesce_window
+        return math.ceil(end / window) * window
+
+    async def _fetch_and_parse_page_once(self, search_result: SearchResult, end: Optional[float] = None) -> SearchResult:
+        """Fetches a single page and parses it, serving fresh content from the cache.
+
+        Each fetch is bounded by the time left until `end`, the loop time the
+        request's deadline runs out, so a page is not waited on past it.
+        """
+        kind = self._fetcher_kind(search_result)
+        cached = await self._cache_lookup(search_result)
+        if cached is not None and cached.is_fresh():
+            search_result.content = cached.content
+            search_result.status = ResultStatus.Complete
+            return search_result
+
+        async with self._slot(kind, search_result):
+            if kind == FetcherKind.Static:
+                async with self._static_client() as client:
+                    if self.fetch_router is None or self._is_forced_static(search_result):
+                        return await self._fetch_and_parse_static_page(client, search_result, cached, timeout=self._timeout(end))
+                    start = time.monotonic()
+                    search_result = await self._fetch_and_parse_static_page(client, search_result, cached, tiered=True, timeout=self._timeout(end))
+                self._record_tier(FetcherKind.Static, search_result, start)
+                if search_result.status == ResultStatus.Complete:
+                    return search_result
+            elif kind == FetcherKind.Reddit:
+                return await self._fetch_and_parse_reddit_page(search_result)
+            else:
+                return await self._fetch_and_parse_dynamic_page(search_result, timeout=self._timeout(end))
+
+        # The static tier failed or came back thin: escalate to the browser
+        async with self._slot(FetcherKind.Dynamic, search_result):
+            return await self._fetch_and_parse_dynamic_page(search_result, timeout=self._timeout(end))
+
+    def _static_client(self) -> AsyncContextManager[httpx.AsyncClient]:
+        """The shared pooled client when there is one, else a client for one fetch."""
+        if self.http_client is not None:
+            return nullcontext(self.http_client)
+        return httpx.AsyncClient()
+
+    def _record_tier(self, kind: FetcherKind, search_result: SearchResult, start: float) -> None:
+        """Feeds the outcome of a fetch tier back into the fetch router."""
+        if self.fetch_router is None:
+            return
+        success = search_result.status == ResultStatus.Complete
+        self.fetch_router.record(
+            str(search_result.url),
+            kind,
+            success=success,
+            words=len(search_result.content.split()) if success else 0,
+            latency=time.monotonic() - start,
+        )
+
+    async def _cache_lookup(self, search_result: SearchResult) -> Optional[CachedPage]:
+        """Looks a page up in the content cache; a failing cache counts as a miss."""
+        if self.content_cache is None:
+            return None
         try:
-            async with CrawlerClass() as crawler:
-                # Run the crawler on a URL
-                result = await crawler.arun(url=str(search_result.url))
-                search_result.content = str(result.markdown)
+            return await self.content_cache.get(str(search_result.url))
+        except Exception:
+            print(f"Error reading cached page {search_result.url}: {traceback.format_exc()}")
+            return None
+
+    async def _cache_store(self, kind: FetcherKind, search_result: SearchResult, headers: Optional[httpx.Headers] = None) -> None:
+        """Stores successfully scraped content, with HTTP validators when available."""
+        if self.content_cache is None:
+            return
+        try:
+            await self.content_cache.put(
+                str(search_result.url),
+                kind,
+                search_result.content,
+                etag=headers.get("etag") if headers else None,
+                last_modified=headers.get("last-modified") if headers else None,
+            )
+        except Exception:
+            print(f"Error caching page {search_result.url}: {traceback.format_exc()}")
+
+    def _slot(self, kind: FetcherKind, search_result: SearchResult) -> AsyncContextManager[None]:
+        """Waits for a scheduler slot, if a scheduler is configured."""
+        if self.scheduler is None:
+            return nullcontext()
+        return self.scheduler.slot(kind, str(search_result.url))
+
+    @timed("fetch", "dynamic")
+    async def _fetch_and_parse_dynamic_page(self, search_result: SearchResult, CrawlerClass: Type[AsyncWebCrawler] = AsyncWebCrawler, timeout: Optional[float] = None) -> SearchResult:
+        """Fetches and parses a dynamic page using Playwright.
+
+        Crawls on the shared browser pool, which leases a warm browser for the
+        page, and only falls back to launching a one-off browser without a pool.
+        The crawl gets `timeout` seconds, the configured timeout by default.
+        """
+        url_str = str(search_result.url)
+        start = time.monotonic()
+        try:
+            if self.browser_pool is not None:
+                crawl = self.browser_pool.crawl(url_str)
+            else:
+                crawl = self._crawl_once(url_str, CrawlerClass)
+            result = await asyncio.wait_for(crawl, timeout=self.config.timeout if timeout is None else timeout)
+            if not getattr(result, "success", True):
+                print(f"Error fetching dynamic page {search_result.url}: {getattr(result, 'error_message', '')}")
+                self._record_tier(FetcherKind.Dynamic, search_result, start)
                 return search_result
+            FETCHED_BYTES.labels("dynamic").inc(len(getattr(result, "html", None) or ""))
+            search_result.content = str(result.markdown)
+            search_result.status = ResultStatus.Complete
+            self._record_tier(FetcherKind.Dynamic, search_result, start)
+            await self._cache_store(FetcherKind.Dynamic, search_result)
+            return search_result
         except Exception:
             print(f"Error fetching dynamic page {search_result.url}: {traceback.format_exc()}")
+            self._record_tier(FetcherKind.Dynamic, search_result, start)
             return search_result  # Return the result unchanged in case of error
 
-    async def _fetch_and_parse_static_page(self, client: httpx.AsyncClient, search_result: SearchResult) -> SearchResult:
-        """Fetches and parses a static page using httpx."""
+    @staticmethod
+    async def _crawl_once(url: str, CrawlerClass: Type[AsyncWebCrawler]) -> CrawlResult:
+        async with CrawlerClass() as crawler:
+            # Run the crawler on a URL
+            return await crawler.arun(url=url)
+
+    @timed("fetch", "static")
+    async def _fetch_and_parse_static_page(self, client: httpx.AsyncClient, search_result: SearchResult, cached: Optional[CachedPage] = None, tiered: bool = False, timeout: Optional[float] = None) -> SearchResult:
+        """Fetches and parses a static page using httpx.
+
+        A stale cached copy is revalidated with a conditional GET and reused on 304.
+        On the tiered path a page the fetch router says needs a browser is returned
+        unchanged, so the caller can escalate it.
+        """
+        snippet = search_result.content
         headers = {"User-Agent": self.config.user_agent}
+        if cached is not None:
+            headers.update(cached.validators())
         try:
-            response = await client.get(str(search_result.url), headers=headers, timeout=self.config.timeout)
+            response = await client.get(str(search_result.url), headers=headers, timeout=self.config.timeout if timeout is None else timeout)
+            if cached is not None and cached.validators() and response.status_code == 304:
+                search_result.content = cached.content
+                search_result.status = ResultStatus.Complete
+                if self.content_cache is not None:
+                    await self.content_cache.revalidated(cached)
+                return search_result
             response.raise_for_status()
-            return self.html_parser.parse(response.text, search_result)
+            FETCHED_BYTES.labels("static").inc(len(response.content))
+            search_result = await self._parse_html(response.text, search_result)
+            if tiered and self.fetch_router is not None and self.fetch_router.needs_browser(response.text, search_result.content):
+                search_result.content = snippet
+                return search_result
+            search_result.status = ResultStatus.Complete
+            await self._cache_store(FetcherKind.Static, search_result, response.headers)
+            return search_result
         except httpx.HTTPError:
             print(f"Error fetching static page {search_result.url}: {traceback.format_exc()}")
             return search_result  # Return the result unchanged in case of error
 
+    async def _parse_html(self, html: str, search_result: SearchResult) -> SearchResult:
+        """Parses a page, off the event loop when an executor is configured."""
+        with track("parse", type(self.html_parser).__name__):
+            if self.executors is None:
+                return self.html_parser.parse(html, search_result)
+            return await self.executors.run_cpu(self.html_parser.parse, html, search_result)
+
+    @timed("fetch", "reddit")
     async def _fetch_and_parse_reddit_page(self, search_result: SearchResult) -> SearchResult:
-        """Fetches and parses a Reddit page using AsyncPraw"""
+        """Fetches and parses a Reddit page using AsyncPraw, within the comment budget when there is an extractor."""
+        if self.reddit_extractor is not None:
+            return await self._extract_reddit_page(search_result)
         if self.reddit_client is None:
             raise Exception("Reddit client is not initialized")
         url_str = str(search_result.url)
         try:
             submission = await self.reddit_client.submission(url=url_str)
             # Removed the load call as it is not necessary
-            content = f"Title: {submission.title} (Upvotes:{submission.score})\nContent: {submission.selftext}\nComments:\n"
-            for i, comment in enumerate(submission.comments.list()):
-                if isinstance(comment, asyncpraw.models.MoreComments):
-                    continue
-                content += f"{i}. (Upvotes:{comment.score}) {comment.body}\n"
-            search_result.content = content
+            comments = [
+                (i, comment.score, comment.body)
+                for i, comment in enumerate(submission.comments.list())
+                if not isinstance(comment, asyncpraw.models.MoreComments)
+            ]
+            # Formatting is a cheap join, shipping the comments to a worker process would cost more
+            search_result.content = format_reddit_submission(submission.title, submission.score, submission.selftext, comments)
+            search_result.status = ResultStatus.Complete
+            await self._cache_store(FetcherKind.Reddit, search_result)
+            return search_result
+        except Exception:
+            print(f"Error fetching Reddit page {search_result.url}: {traceback.format_exc()}")
+            return search_result  # Return the result unchanged in case of error
+
+    async def _extract_reddit_page(self, search_result: SearchResult) -> SearchResult:
+        assert self.reddit_extractor is not None
+        try:
+            search_result.content = await self.reddit_extractor.extract(str(search_result.url))
+            search_result.status = ResultStatus.Complete
+            await self._cache_store(FetcherKind.Reddit, search_result)
             return search_result
         except Exception:
             print(f"Error fetching Reddit page {search_result.url}: {traceback.format_exc()}")